@@ -0,0 +1,66 @@
+"""Partial/covering index for the pending-payment working set
+
+Revision ID: a011
+Revises: a010
+Create Date: 2026-10-19
+
+Cria ix_chamados_pendente_pagamento sobre chamados(tecnico_id, data_atendimento)
+restrito ao predicado canônico de "pendente de pagamento"
+(Chamado.pendente_pagamento_condition):
+
+    status_chamado IN ('Concluído', 'SPARE')
+    AND status_validacao = 'Aprovado'
+    AND pago = false AND pagamento_id IS NULL
+
+PostgreSQL: índice parcial com INCLUDE (custo_atribuido) -> index-only scan
+para somatórios de saldo. SQLite: índice parcial equivalente (sem INCLUDE).
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a011_chamados_pendente_pagamento_idx'
+down_revision = 'a010_add_tecnico_extra_fields'
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = 'ix_chamados_pendente_pagamento'
+
+
+def upgrade():
+    """Create the partial index (dialect-specific)."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print(f"[MIGRATION a011] Creating {INDEX_NAME} on chamados")
+    print(f"[INFO] Dialect: {dialect}")
+
+    if dialect == 'postgresql':
+        op.execute(f"""
+            CREATE INDEX IF NOT EXISTS {INDEX_NAME}
+            ON chamados (tecnico_id, data_atendimento)
+            INCLUDE (custo_atribuido)
+            WHERE status_chamado IN ('Concluído', 'SPARE')
+              AND status_validacao = 'Aprovado'
+              AND pago = false
+              AND pagamento_id IS NULL
+        """)
+        op.execute("ANALYZE chamados")
+    else:
+        op.execute(f"""
+            CREATE INDEX IF NOT EXISTS {INDEX_NAME}
+            ON chamados (tecnico_id, data_atendimento)
+            WHERE status_chamado IN ('Concluído', 'SPARE')
+              AND status_validacao = 'Aprovado'
+              AND pago = 0
+              AND pagamento_id IS NULL
+        """)
+
+    print("[OK] Migration a011 completed successfully")
+
+
+def downgrade():
+    """Drop the partial index."""
+    print(f"[MIGRATION a011] Dropping {INDEX_NAME}")
+    op.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+    print("[OK] Downgrade a011 completed")
@@ -0,0 +1,59 @@
+"""Composite (dimension, data_criacao) indexes on stock_movements
+
+Revision ID: a012
+Revises: a011
+Create Date: 2026-10-19
+
+Os relatórios de estoque filtram movimentações por período combinado com
+tipo, item ou técnico. Com os filtros reescritos como intervalo de timestamp
+(StockReportService.periodo_filter), estes índices permitem range scan em vez
+de full scan:
+
+    ix_stock_movements_tipo_data     (tipo_movimento, data_criacao)
+    ix_stock_movements_item_data     (item_lpu_id, data_criacao)
+    ix_stock_movements_origem_data   (origem_tecnico_id, data_criacao)
+    ix_stock_movements_destino_data  (destino_tecnico_id, data_criacao)
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a012_stock_movements_time_indexes'
+down_revision = 'a011_chamados_pendente_pagamento_idx'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_stock_movements_tipo_data', ['tipo_movimento', 'data_criacao']),
+    ('ix_stock_movements_item_data', ['item_lpu_id', 'data_criacao']),
+    ('ix_stock_movements_origem_data', ['origem_tecnico_id', 'data_criacao']),
+    ('ix_stock_movements_destino_data', ['destino_tecnico_id', 'data_criacao']),
+]
+
+
+def upgrade():
+    """Create composite indexes on stock_movements."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print(f"[MIGRATION a012] Creating composite time indexes on stock_movements")
+    print(f"[INFO] Dialect: {dialect}")
+
+    for name, columns in INDEXES:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON stock_movements ({', '.join(columns)})"
+        )
+        print(f"[OK] {name}")
+
+    if dialect == 'postgresql':
+        op.execute("ANALYZE stock_movements")
+
+    print("[OK] Migration a012 completed successfully")
+
+
+def downgrade():
+    """Drop composite indexes."""
+    print(f"[MIGRATION a012] Dropping composite time indexes on stock_movements")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    print("[OK] Downgrade a012 completed")
@@ -0,0 +1,58 @@
+"""Name search indexes for technician / LPU item autocomplete
+
+Revision ID: a013
+Revises: a012
+Create Date: 2026-10-19
+
+Suporte às buscas de AutocompleteService:
+
+    ix_tecnicos_nome_lower / ix_itens_lpu_nome_lower
+        btree em lower(nome) (prefixo por intervalo; todos os dialetos)
+
+    ix_tecnicos_nome_trgm / ix_itens_lpu_nome_trgm   (Postgres)
+        GIN pg_trgm em nome: ILIKE '%termo%' sem full scan
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a013_autocomplete_name_indexes'
+down_revision = 'a012_stock_movements_time_indexes'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['tecnicos', 'itens_lpu']
+
+
+def upgrade():
+    """Create lower(nome) and trigram indexes."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print(f"[MIGRATION a013] Creating autocomplete indexes on {', '.join(TABLES)}")
+    print(f"[INFO] Dialect: {dialect}")
+
+    for table in TABLES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_nome_lower ON {table} (lower(nome))")
+        print(f"[OK] ix_{table}_nome_lower")
+
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table in TABLES:
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_nome_trgm "
+                f"ON {table} USING gin (nome gin_trgm_ops)"
+            )
+            print(f"[OK] ix_{table}_nome_trgm")
+            op.execute(f"ANALYZE {table}")
+
+    print("[OK] Migration a013 completed successfully")
+
+
+def downgrade():
+    """Drop autocomplete indexes (a extensão pg_trgm é mantida)."""
+    print(f"[MIGRATION a013] Dropping autocomplete indexes")
+    for table in TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_nome_trgm")
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_nome_lower")
+    print("[OK] Downgrade a013 completed")
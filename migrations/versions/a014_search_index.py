@@ -0,0 +1,133 @@
+"""Accent-insensitive search index (pg_trgm on Postgres, FTS5 on SQLite)
+
+Revision ID: a014
+Revises: a013
+Create Date: 2026-10-19
+
+Índice de busca usado por SearchService (técnicos, chamados e itens LPU).
+
+Postgres:
+    - extensões unaccent e pg_trgm
+    - search_normalize(text): lower(unaccent(...)) IMMUTABLE (unaccent puro
+      é STABLE e não pode entrar em índice)
+    - tecnico_search_doc / chamado_search_doc: documento pesquisável
+    - GIN gin_trgm_ops sobre os documentos (ix_*_search_trgm)
+
+SQLite:
+    - tabelas FTS5 search_fts_tecnicos / search_fts_chamados / search_fts_itens
+      (rowid = id da entidade, unicode61 remove_diacritics 2)
+    - triggers AFTER INSERT/UPDATE/DELETE mantendo as tabelas em sincronia
+    - carga inicial a partir das tabelas de origem
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a014_search_index'
+down_revision = 'a013_autocomplete_name_indexes'
+branch_labels = None
+depends_on = None
+
+
+# Mesmo conteúdo de models.SEARCH_FTS_SOURCES (congelado nesta revisão)
+FTS_SOURCES = {
+    'search_fts_tecnicos': ('tecnicos', ('nome', 'cidade', 'documento')),
+    'search_fts_chamados': ('chamados', ('codigo_chamado', 'fsa_codes', 'loja', 'observacoes')),
+    'search_fts_itens': ('itens_lpu', ('nome',)),
+}
+
+PG_FUNCTIONS = [
+    """
+    CREATE OR REPLACE FUNCTION search_normalize(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+    $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION tecnico_search_doc(text, text, text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+    $$ SELECT search_normalize(concat_ws(' ', $1, $2, $3)) $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION chamado_search_doc(text, text, text, text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+    $$ SELECT search_normalize(concat_ws(' ', $1, $2, $3, $4)) $$
+    """,
+]
+
+PG_INDEXES = [
+    ('ix_tecnicos_search_trgm', 'tecnicos', 'tecnico_search_doc(nome, cidade, documento)'),
+    ('ix_chamados_search_trgm', 'chamados',
+     'chamado_search_doc(codigo_chamado, fsa_codes, loja, observacoes)'),
+    ('ix_itens_lpu_search_trgm', 'itens_lpu', 'search_normalize(nome)'),
+]
+
+
+def _sqlite_ddl(fts, source, columns):
+    cols = ', '.join(columns)
+    new_vals = ', '.join(f'NEW.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, tokenize = 'unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (NEW.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = OLD.id; "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (NEW.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = OLD.id; END",
+        f"DELETE FROM {fts}",
+        f"INSERT INTO {fts}(rowid, {cols}) SELECT id, {cols} FROM {source}",
+    ]
+
+
+def upgrade():
+    """Create search functions/indexes (Postgres) or FTS5 tables + triggers (SQLite)."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print(f"[MIGRATION a014] Creating search index")
+    print(f"[INFO] Dialect: {dialect}")
+
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for ddl in PG_FUNCTIONS:
+            op.execute(ddl)
+        print("[OK] search_normalize / tecnico_search_doc / chamado_search_doc")
+
+        for name, table, expr in PG_INDEXES:
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (({expr}) gin_trgm_ops)")
+            op.execute(f"ANALYZE {table}")
+            print(f"[OK] {name}")
+
+    elif dialect == 'sqlite':
+        for fts, (source, columns) in FTS_SOURCES.items():
+            for ddl in _sqlite_ddl(fts, source, columns):
+                op.execute(ddl)
+            print(f"[OK] {fts} (+ triggers, carga inicial)")
+
+    else:
+        print(f"[SKIP] Dialeto {dialect} sem índice de busca; SearchService não suportado")
+
+    print("[OK] Migration a014 completed successfully")
+
+
+def downgrade():
+    """Drop search index objects."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print(f"[MIGRATION a014] Dropping search index")
+
+    if dialect == 'postgresql':
+        for name, _, _ in PG_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+        op.execute("DROP FUNCTION IF EXISTS chamado_search_doc(text, text, text, text)")
+        op.execute("DROP FUNCTION IF EXISTS tecnico_search_doc(text, text, text)")
+        op.execute("DROP FUNCTION IF EXISTS search_normalize(text)")
+
+    elif dialect == 'sqlite':
+        for fts in FTS_SOURCES:
+            for suffix in ('ai', 'au', 'ad'):
+                op.execute(f"DROP TRIGGER IF EXISTS trg_{fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+
+    print("[OK] Downgrade a014 completed")
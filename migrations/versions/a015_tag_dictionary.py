@@ -0,0 +1,107 @@
+"""Normalized tag dictionary (tag_definicoes + tecnico_tags)
+
+Revision ID: a015
+Revises: a014
+Create Date: 2026-10-19
+
+A tabela `tags` repetia nome/cor em cada linha (uma por técnico). Esta
+revisão cria:
+
+    tag_definicoes (id, nome UNIQUE, cor, data_criacao)
+    tecnico_tags   (id, tecnico_id, tag_id)
+                   UNIQUE (tecnico_id, tag_id)
+                   ix_tecnico_tags_tag_tecnico (tag_id, tecnico_id)
+                   ix_tecnico_tags_tecnico_id  (tecnico_id)
+
+e migra os dados: uma definição por nome (cor da linha mais antiga) e uma
+associação por (técnico, tag), preservando o menor id original (links de
+remoção /tags/<id>/deletar continuam válidos). Por fim remove `tags`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a015_tag_dictionary'
+down_revision = 'a014_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create tag dictionary + association and migrate existing rows."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print(f"[MIGRATION a015] Normalizing tags into tag_definicoes / tecnico_tags")
+    print(f"[INFO] Dialect: {dialect}")
+
+    op.create_table(
+        'tag_definicoes',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('nome', sa.String(50), nullable=False),
+        sa.Column('cor', sa.String(7), nullable=False),
+        sa.Column('data_criacao', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('nome', name='uq_tag_definicoes_nome'),
+    )
+    op.create_table(
+        'tecnico_tags',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('tecnico_id', sa.Integer(), sa.ForeignKey('tecnicos.id'), nullable=False),
+        sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tag_definicoes.id'), nullable=False),
+        sa.UniqueConstraint('tecnico_id', 'tag_id', name='uq_tecnico_tags_tecnico_tag'),
+    )
+    op.create_index('ix_tecnico_tags_tag_tecnico', 'tecnico_tags', ['tag_id', 'tecnico_id'])
+    op.create_index('ix_tecnico_tags_tecnico_id', 'tecnico_tags', ['tecnico_id'])
+    print("[OK] Tabelas criadas")
+
+    op.execute("""
+        INSERT INTO tag_definicoes (nome, cor, data_criacao)
+        SELECT t.nome, t.cor, CURRENT_TIMESTAMP
+        FROM tags t
+        WHERE t.id IN (SELECT MIN(id) FROM tags GROUP BY nome)
+    """)
+    op.execute("""
+        INSERT INTO tecnico_tags (id, tecnico_id, tag_id)
+        SELECT MIN(t.id), t.tecnico_id, d.id
+        FROM tags t
+        JOIN tag_definicoes d ON d.nome = t.nome
+        GROUP BY t.tecnico_id, d.id
+    """)
+    print("[OK] Dados migrados")
+
+    if dialect == 'postgresql':
+        op.execute("""
+            SELECT setval(pg_get_serial_sequence('tecnico_tags', 'id'),
+                          COALESCE((SELECT MAX(id) FROM tecnico_tags), 0) + 1, false)
+        """)
+        op.execute("ANALYZE tag_definicoes")
+        op.execute("ANALYZE tecnico_tags")
+
+    op.drop_table('tags')
+    print("[OK] Migration a015 completed successfully")
+
+
+def downgrade():
+    """Recreate denormalized tags from the dictionary."""
+    print(f"[MIGRATION a015] Restoring denormalized tags table")
+    op.create_table(
+        'tags',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('nome', sa.String(50), nullable=False),
+        sa.Column('cor', sa.String(7), nullable=False),
+        sa.Column('tecnico_id', sa.Integer(), sa.ForeignKey('tecnicos.id'), nullable=False),
+    )
+    op.execute("""
+        INSERT INTO tags (id, nome, cor, tecnico_id)
+        SELECT tt.id, d.nome, d.cor, tt.tecnico_id
+        FROM tecnico_tags tt
+        JOIN tag_definicoes d ON d.id = tt.tag_id
+    """)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            SELECT setval(pg_get_serial_sequence('tags', 'id'),
+                          COALESCE((SELECT MAX(id) FROM tags), 0) + 1, false)
+        """)
+    op.drop_table('tecnico_tags')
+    op.drop_table('tag_definicoes')
+    print("[OK] Downgrade a015 completed")
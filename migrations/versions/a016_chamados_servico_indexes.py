@@ -0,0 +1,56 @@
+"""Indexes for the service-type filter of the chamados listing
+
+Revision ID: a016
+Revises: a015
+Create Date: 2026-10-19
+
+ChamadoService.get_all filtrava por Chamado.tipo_servico (@property, não
+traduzível para SQL). O filtro agora é um semi-join pelos ids do catálogo:
+
+    ix_catalogo_servicos_nome
+        btree em catalogo_servicos(nome): resolução nome -> ids
+
+    ix_chamados_servico_data
+        btree em chamados(catalogo_servico_id, data_atendimento): filtro por
+        serviço já na ordem da listagem (data_atendimento DESC)
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a016_chamados_servico_indexes'
+down_revision = 'a015_tag_dictionary'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'ix_catalogo_servicos_nome': ('catalogo_servicos', 'nome'),
+    'ix_chamados_servico_data': ('chamados', 'catalogo_servico_id, data_atendimento'),
+}
+
+
+def upgrade():
+    """Create service filter indexes."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print("[MIGRATION a016] Creating service filter indexes")
+    print(f"[INFO] Dialect: {dialect}")
+
+    for name, (table, columns) in INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        print(f"[OK] {name}")
+
+    if dialect == 'postgresql':
+        op.execute("ANALYZE catalogo_servicos")
+        op.execute("ANALYZE chamados")
+
+    print("[OK] Migration a016 completed successfully")
+
+
+def downgrade():
+    """Drop service filter indexes."""
+    print("[MIGRATION a016] Dropping service filter indexes")
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    print("[OK] Downgrade a016 completed")
@@ -0,0 +1,51 @@
+"""Daily operational KPI snapshots (kpi_diario)
+
+Revision ID: a017
+Revises: a016
+Create Date: 2026-10-19
+
+Uma linha por dia com os indicadores do cockpit (fila de validação,
+finalizados, técnicos ativos, peças em campo, itens com estoque baixo),
+gravada por scripts/kpi_snapshot.py. A restrição UNIQUE em `data` serve o
+range scan de /api/dashboard/kpis-diarios.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a017_kpi_diario'
+down_revision = 'a016_chamados_servico_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create kpi_diario."""
+    bind = op.get_bind()
+    print("[MIGRATION a017] Creating kpi_diario")
+    print(f"[INFO] Dialect: {bind.dialect.name}")
+
+    op.create_table(
+        'kpi_diario',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('data', sa.Date(), nullable=False),
+        sa.Column('fila_validacao', sa.Integer(), nullable=True),
+        sa.Column('finalizados', sa.Integer(), nullable=True),
+        sa.Column('tecnicos_ativos', sa.Integer(), nullable=True),
+        sa.Column('pecas_em_campo', sa.Integer(), nullable=True),
+        sa.Column('itens_estoque_baixo', sa.Integer(), nullable=True),
+        sa.Column('origem', sa.String(20), nullable=False, server_default='snapshot'),
+        sa.Column('calculado_em', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('data', name='uq_kpi_diario_data'),
+    )
+    print("[OK] kpi_diario")
+    print("[INFO] Histórico: python scripts/kpi_snapshot.py --backfill INICIO FIM")
+    print("[OK] Migration a017 completed successfully")
+
+
+def downgrade():
+    """Drop kpi_diario."""
+    print("[MIGRATION a017] Dropping kpi_diario")
+    op.drop_table('kpi_diario')
+    print("[OK] Downgrade a017 completed")
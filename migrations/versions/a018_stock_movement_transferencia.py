@@ -0,0 +1,63 @@
+"""Allow TRANSFERENCIA stock movements (technician -> technician)
+
+Revision ID: a018
+Revises: a017
+Create Date: 2026-10-19
+
+StockService.movimentar_lote registra transferências entre técnicos como
+um único movimento (origem_tecnico_id -> destino_tecnico_id) do tipo
+TRANSFERENCIA. Recria o CHECK ck_stock_movements_tipo_movimento (a002)
+incluindo o novo tipo. SQLite não tem o CHECK (ver a002): no-op.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a018_stock_movement_transferencia'
+down_revision = 'a017_kpi_diario'
+branch_labels = None
+depends_on = None
+
+
+TIPOS = ['ENVIO', 'USO', 'DEVOLUCAO', 'AJUSTE', 'CORRECAO']
+TIPOS_NOVOS = TIPOS + ['TRANSFERENCIA']
+
+
+def _recriar_check(tipos):
+    tipos_str = ", ".join(f"'{t}'" for t in tipos)
+    op.execute("ALTER TABLE stock_movements DROP CONSTRAINT IF EXISTS ck_stock_movements_tipo_movimento")
+    op.execute(f"""
+        ALTER TABLE stock_movements
+        ADD CONSTRAINT ck_stock_movements_tipo_movimento
+        CHECK (tipo_movimento IN ({tipos_str}))
+    """)
+
+
+def upgrade():
+    """Recreate tipo_movimento CHECK with TRANSFERENCIA."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print("[MIGRATION a018] Allowing TRANSFERENCIA in stock_movements.tipo_movimento")
+    print(f"[INFO] Dialect: {dialect}")
+
+    if dialect == 'postgresql':
+        _recriar_check(TIPOS_NOVOS)
+        print("[OK] ck_stock_movements_tipo_movimento")
+    else:
+        print("[SKIP] CHECK não existe neste dialeto")
+
+    print("[OK] Migration a018 completed successfully")
+
+
+def downgrade():
+    """Restore the previous CHECK (aborts if TRANSFERENCIA rows exist)."""
+    bind = op.get_bind()
+    print("[MIGRATION a018] Restoring tipo_movimento CHECK")
+    if bind.dialect.name == 'postgresql':
+        existentes = bind.exec_driver_sql(
+            "SELECT COUNT(*) FROM stock_movements WHERE tipo_movimento = 'TRANSFERENCIA'"
+        ).scalar()
+        if existentes:
+            raise RuntimeError(f"{existentes} movimento(s) TRANSFERENCIA impedem o downgrade")
+        _recriar_check(TIPOS)
+    print("[OK] Downgrade a018 completed")
@@ -0,0 +1,64 @@
+"""Deduplication key for automatic notifications
+
+Revision ID: a019
+Revises: a018
+Create Date: 2026-10-19
+
+Alertas de estoque baixo deduplicavam com LIKE em notifications.title por
+admin, dentro da transação de estoque. Agora são criados em lote após o
+commit com INSERT ... ON CONFLICT DO NOTHING sobre:
+
+    notifications.dedup_key (varchar 100, nullable)
+        ex: 'estoque_baixo:<tecnico_id>:<item_id>'
+
+    uq_notifications_dedup_pendente
+        UNIQUE (user_id, dedup_key) WHERE is_read = false AND dedup_key IS NOT NULL
+        no máximo um alerta não lido por usuário/chave; ao ler, libera novo alerta
+
+Notificações existentes ficam com dedup_key NULL (fora do índice).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a019_notification_dedup_key'
+down_revision = 'a018_stock_movement_transferencia'
+branch_labels = None
+depends_on = None
+
+
+INDEX = 'uq_notifications_dedup_pendente'
+PREDICADO = 'is_read = false AND dedup_key IS NOT NULL'
+
+
+def upgrade():
+    """Add notifications.dedup_key and the partial unique index."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print("[MIGRATION a019] Adding notifications.dedup_key")
+    print(f"[INFO] Dialect: {dialect}")
+
+    columns = [c['name'] for c in sa.inspect(bind).get_columns('notifications')]
+    if 'dedup_key' not in columns:
+        op.add_column('notifications', sa.Column('dedup_key', sa.String(length=100), nullable=True))
+    print("[OK] notifications.dedup_key")
+
+    # SQLite guarda booleanos como 0/1
+    predicado = PREDICADO if dialect == 'postgresql' else PREDICADO.replace('false', '0')
+    op.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {INDEX} "
+        f"ON notifications (user_id, dedup_key) WHERE {predicado}"
+    )
+    print(f"[OK] {INDEX}")
+
+    print("[OK] Migration a019 completed successfully")
+
+
+def downgrade():
+    """Drop the dedup index and column."""
+    print("[MIGRATION a019] Dropping notifications.dedup_key")
+    op.execute(f"DROP INDEX IF EXISTS {INDEX}")
+    with op.batch_alter_table('notifications') as batch_op:
+        batch_op.drop_column('dedup_key')
+    print("[OK] Downgrade a019 completed")
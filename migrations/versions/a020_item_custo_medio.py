@@ -0,0 +1,65 @@
+"""Weighted-average cost checkpoints (itens_lpu_custo_medio)
+
+Revision ID: a020
+Revises: a019
+Create Date: 2026-10-19
+
+CustoMedioService dobra os ENVIOs com custo_unitario em um custo médio
+ponderado por item, de forma incremental:
+
+    itens_lpu_custo_medio
+        checkpoint por item: custo_medio, quantidade_acumulada,
+        ultimo_movimento_id
+
+    ix_stock_movements_envio_custo
+        btree parcial em stock_movements(item_lpu_id, id)
+        WHERE tipo_movimento = 'ENVIO' AND custo_unitario IS NOT NULL
+        (varredura só dos movimentos após o checkpoint)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a020_item_custo_medio'
+down_revision = 'a019_notification_dedup_key'
+branch_labels = None
+depends_on = None
+
+
+INDEX = 'ix_stock_movements_envio_custo'
+
+
+def upgrade():
+    """Create itens_lpu_custo_medio and the ENVIO cost index."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print("[MIGRATION a020] Creating itens_lpu_custo_medio")
+    print(f"[INFO] Dialect: {dialect}")
+
+    op.create_table(
+        'itens_lpu_custo_medio',
+        sa.Column('item_lpu_id', sa.Integer(), sa.ForeignKey('itens_lpu.id'), primary_key=True),
+        sa.Column('custo_medio', sa.Numeric(14, 4), nullable=False, server_default='0'),
+        sa.Column('quantidade_acumulada', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('ultimo_movimento_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+    )
+    print("[OK] itens_lpu_custo_medio")
+
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX} ON stock_movements (item_lpu_id, id) "
+        f"WHERE tipo_movimento = 'ENVIO' AND custo_unitario IS NOT NULL"
+    )
+    print(f"[OK] {INDEX}")
+
+    print("[INFO] Primeira execução: python scripts/custo_medio.py")
+    print("[OK] Migration a020 completed successfully")
+
+
+def downgrade():
+    """Drop itens_lpu_custo_medio and the ENVIO cost index."""
+    print("[MIGRATION a020] Dropping itens_lpu_custo_medio")
+    op.execute(f"DROP INDEX IF EXISTS {INDEX}")
+    op.drop_table('itens_lpu_custo_medio')
+    print("[OK] Downgrade a020 completed")
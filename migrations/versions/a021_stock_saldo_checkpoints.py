@@ -0,0 +1,56 @@
+"""Monthly stock balance checkpoints (stock_saldo_checkpoints)
+
+Revision ID: a021
+Revises: a020
+Create Date: 2026-10-19
+
+Saldo por (técnico, item) no 1º dia de cada mês, gravado por
+scripts/stock_checkpoints.py. StockLedgerService responde "saldo em D"
+com o checkpoint mais próximo + movimentos desde ele:
+
+    uq_stock_saldo_checkpoint (data_corte, tecnico_id, item_lpu_id)
+        último corte <= D e leitura das linhas de um corte
+
+    ix_stock_saldo_checkpoints_tecnico (tecnico_id, data_corte)
+        consultas de um técnico
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a021_stock_saldo_checkpoints'
+down_revision = 'a020_item_custo_medio'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create stock_saldo_checkpoints."""
+    bind = op.get_bind()
+    print("[MIGRATION a021] Creating stock_saldo_checkpoints")
+    print(f"[INFO] Dialect: {bind.dialect.name}")
+
+    op.create_table(
+        'stock_saldo_checkpoints',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('data_corte', sa.DateTime(), nullable=False),
+        sa.Column('tecnico_id', sa.Integer(), sa.ForeignKey('tecnicos.id'), nullable=False),
+        sa.Column('item_lpu_id', sa.Integer(), sa.ForeignKey('itens_lpu.id'), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.Column('calculado_em', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('data_corte', 'tecnico_id', 'item_lpu_id', name='uq_stock_saldo_checkpoint'),
+    )
+    op.create_index('ix_stock_saldo_checkpoints_tecnico', 'stock_saldo_checkpoints',
+                    ['tecnico_id', 'data_corte'])
+    print("[OK] stock_saldo_checkpoints")
+    print("[INFO] Histórico: python scripts/stock_checkpoints.py")
+    print("[OK] Migration a021 completed successfully")
+
+
+def downgrade():
+    """Drop stock_saldo_checkpoints."""
+    print("[MIGRATION a021] Dropping stock_saldo_checkpoints")
+    op.drop_index('ix_stock_saldo_checkpoints_tecnico', table_name='stock_saldo_checkpoints')
+    op.drop_table('stock_saldo_checkpoints')
+    print("[OK] Downgrade a021 completed")
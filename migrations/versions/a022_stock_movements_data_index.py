@@ -0,0 +1,48 @@
+"""Index stock_movements by creation time for ledger reconciliation
+
+Revision ID: a022
+Revises: a021
+Create Date: 2026-10-19
+
+StockLedgerService.reconciliar compara TecnicoStock com o saldo do livro
+(último checkpoint mensal + movimentos desde ele). A leitura "movimentos
+desde o corte" filtra apenas por data_criacao; sem este índice a query
+varre toda a tabela stock_movements:
+
+    ix_stock_movements_data
+        btree em stock_movements(data_criacao)
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a022_stock_movements_data_index'
+down_revision = 'a021_stock_saldo_checkpoints'
+branch_labels = None
+depends_on = None
+
+
+INDEX = 'ix_stock_movements_data'
+
+
+def upgrade():
+    """Create ix_stock_movements_data."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print("[MIGRATION a022] Creating stock_movements creation-time index")
+    print(f"[INFO] Dialect: {dialect}")
+
+    op.execute(f"CREATE INDEX IF NOT EXISTS {INDEX} ON stock_movements (data_criacao)")
+    print(f"[OK] {INDEX}")
+
+    if dialect == 'postgresql':
+        op.execute("ANALYZE stock_movements")
+
+    print("[OK] Migration a022 completed successfully")
+
+
+def downgrade():
+    """Drop ix_stock_movements_data."""
+    print("[MIGRATION a022] Dropping stock_movements creation-time index")
+    op.execute(f"DROP INDEX IF EXISTS {INDEX}")
+    print("[OK] Downgrade a022 completed")
@@ -0,0 +1,55 @@
+"""Consumption forecast and reorder suggestions (previsao_consumo)
+
+Revision ID: a023
+Revises: a022
+Create Date: 2026-10-19
+
+Uma linha por (técnico, item) com USO na janela, regravada pelo job
+scripts/previsao_consumo.py (PrevisaoConsumoService):
+
+    uq_previsao_consumo_par (tecnico_id, item_lpu_id)
+    ix_previsao_consumo_cobertura (dias_cobertura)
+        listagem por menor cobertura (dashboard de estoque)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a023_previsao_consumo'
+down_revision = 'a022_stock_movements_data_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create previsao_consumo."""
+    bind = op.get_bind()
+    print("[MIGRATION a023] Creating previsao_consumo")
+    print(f"[INFO] Dialect: {bind.dialect.name}")
+
+    op.create_table(
+        'previsao_consumo',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('tecnico_id', sa.Integer(), sa.ForeignKey('tecnicos.id'), nullable=False),
+        sa.Column('item_lpu_id', sa.Integer(), sa.ForeignKey('itens_lpu.id'), nullable=False),
+        sa.Column('consumo_janela', sa.Integer(), nullable=False),
+        sa.Column('consumo_diario', sa.Numeric(10, 4), nullable=False),
+        sa.Column('saldo_atual', sa.Integer(), nullable=False),
+        sa.Column('dias_cobertura', sa.Numeric(10, 1), nullable=True),
+        sa.Column('quantidade_sugerida', sa.Integer(), nullable=False),
+        sa.Column('calculado_em', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('tecnico_id', 'item_lpu_id', name='uq_previsao_consumo_par'),
+    )
+    op.create_index('ix_previsao_consumo_cobertura', 'previsao_consumo', ['dias_cobertura'])
+    print("[OK] previsao_consumo")
+    print("[INFO] Primeira carga: python scripts/previsao_consumo.py")
+    print("[OK] Migration a023 completed successfully")
+
+
+def downgrade():
+    """Drop previsao_consumo."""
+    print("[MIGRATION a023] Dropping previsao_consumo")
+    op.drop_index('ix_previsao_consumo_cobertura', table_name='previsao_consumo')
+    op.drop_table('previsao_consumo')
+    print("[OK] Downgrade a023 completed")
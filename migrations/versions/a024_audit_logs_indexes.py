@@ -0,0 +1,58 @@
+"""Index audit_logs for the cursor-paginated audit viewer
+
+Revision ID: a024
+Revises: a023
+Create Date: 2026-10-19
+
+O visualizador de auditoria (AuditArchiveService.buscar) pagina por cursor
+em (timestamp, id) e filtra por usuário ou objeto auditado; sem índices
+cada página ordenava a tabela inteira:
+
+    ix_audit_logs_timestamp       (timestamp)
+    ix_audit_logs_model_object    (model_name, object_id)
+    ix_audit_logs_user_timestamp  (user_id, timestamp)
+
+O crescimento da tabela é limitado pelo arquivamento mensal
+(scripts/arquivar_auditoria.py).
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a024_audit_logs_indexes'
+down_revision = 'a023_previsao_consumo'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'ix_audit_logs_timestamp': 'timestamp',
+    'ix_audit_logs_model_object': 'model_name, object_id',
+    'ix_audit_logs_user_timestamp': 'user_id, timestamp',
+}
+
+
+def upgrade():
+    """Create audit_logs indexes."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print("[MIGRATION a024] Creating audit_logs indexes")
+    print(f"[INFO] Dialect: {dialect}")
+
+    for nome, colunas in INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON audit_logs ({colunas})")
+        print(f"[OK] {nome}")
+
+    if dialect == 'postgresql':
+        op.execute("ANALYZE audit_logs")
+
+    print("[INFO] Arquivamento: python scripts/arquivar_auditoria.py")
+    print("[OK] Migration a024 completed successfully")
+
+
+def downgrade():
+    """Drop audit_logs indexes."""
+    print("[MIGRATION a024] Dropping audit_logs indexes")
+    for nome in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {nome}")
+    print("[OK] Downgrade a024 completed")
@@ -0,0 +1,76 @@
+"""Mark ENVIOs folded into the weighted-average cost (custo_processado_em)
+
+Revision ID: a025
+Revises: a024
+Create Date: 2026-10-19
+
+O checkpoint por id (itens_lpu_custo_medio.ultimo_movimento_id) pulava para
+sempre um ENVIO de id menor commitado depois de um de id maior (ids são
+alocados na inserção, não no COMMIT). CustoMedioService passa a marcar cada
+ENVIO dobrado:
+
+    stock_movements.custo_processado_em
+        NULL = ainda não dobrado no custo médio
+
+    ix_stock_movements_envio_custo
+        recriado como btree parcial em stock_movements(item_lpu_id, id)
+        WHERE tipo_movimento = 'ENVIO' AND custo_unitario IS NOT NULL
+          AND custo_processado_em IS NULL
+        (só os pendentes; encolhe a cada execução)
+
+Backfill: ENVIOs com id <= ultimo_movimento_id do item já estão no custo
+médio e são marcados como processados.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a025_stock_movements_custo_processado'
+down_revision = 'a024_audit_logs_indexes'
+branch_labels = None
+depends_on = None
+
+
+INDEX = 'ix_stock_movements_envio_custo'
+ENVIO_CUSTO = "tipo_movimento = 'ENVIO' AND custo_unitario IS NOT NULL"
+
+
+def upgrade():
+    """Add custo_processado_em, backfill it and narrow the ENVIO cost index."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print("[MIGRATION a025] Adding stock_movements.custo_processado_em")
+    print(f"[INFO] Dialect: {dialect}")
+
+    op.add_column('stock_movements', sa.Column('custo_processado_em', sa.DateTime(), nullable=True))
+    print("[OK] stock_movements.custo_processado_em")
+
+    op.execute(
+        f"UPDATE stock_movements SET custo_processado_em = CURRENT_TIMESTAMP "
+        f"WHERE {ENVIO_CUSTO} AND id <= ("
+        f"  SELECT ck.ultimo_movimento_id FROM itens_lpu_custo_medio ck"
+        f"  WHERE ck.item_lpu_id = stock_movements.item_lpu_id)"
+    )
+    print("[OK] Backfill dos ENVIOs já dobrados")
+
+    op.execute(f"DROP INDEX IF EXISTS {INDEX}")
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX} ON stock_movements (item_lpu_id, id) "
+        f"WHERE {ENVIO_CUSTO} AND custo_processado_em IS NULL"
+    )
+    print(f"[OK] {INDEX}")
+
+    if dialect == 'postgresql':
+        op.execute("ANALYZE stock_movements")
+
+    print("[OK] Migration a025 completed successfully")
+
+
+def downgrade():
+    """Restore the a020 ENVIO cost index and drop custo_processado_em."""
+    print("[MIGRATION a025] Dropping stock_movements.custo_processado_em")
+    op.execute(f"DROP INDEX IF EXISTS {INDEX}")
+    op.execute(f"CREATE INDEX IF NOT EXISTS {INDEX} ON stock_movements (item_lpu_id, id) WHERE {ENVIO_CUSTO}")
+    op.drop_column('stock_movements', 'custo_processado_em')
+    print("[OK] Downgrade a025 completed")
@@ -0,0 +1,49 @@
+"""Rebuild the SQLite lower(nome) indexes with the Unicode lower()
+
+Revision ID: a026
+Revises: a025
+Create Date: 2026-10-19
+
+Em SQLite as conexões da aplicação passam a sobrescrever lower() por
+str.lower() (src/models.py), para que 'Élcio' case com o termo 'él' no
+AutocompleteService. Os índices de expressão criados pela a013 foram
+calculados com o lower() nativo (só ASCII) e são recalculados:
+
+    ix_tecnicos_nome_lower / ix_itens_lpu_nome_lower    REINDEX
+
+Postgres: nada a fazer (lower() nativo já é Unicode).
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a026_sqlite_reindex_nome_lower'
+down_revision = 'a025_stock_movements_custo_processado'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = ['ix_tecnicos_nome_lower', 'ix_itens_lpu_nome_lower']
+
+
+def upgrade():
+    """Reindex lower(nome) indexes on SQLite."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    print("[MIGRATION a026] Rebuilding lower(nome) indexes")
+    print(f"[INFO] Dialect: {dialect}")
+
+    if dialect != 'sqlite':
+        print("[SKIP] Apenas SQLite")
+        return
+
+    for nome in INDEXES:
+        op.execute(f"REINDEX {nome}")
+        print(f"[OK] {nome}")
+
+    print("[OK] Migration a026 completed successfully")
+
+
+def downgrade():
+    """Nothing to undo (indexes keep the same definition)."""
+    print("[OK] Downgrade a026 completed")
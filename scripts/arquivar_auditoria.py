@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Arquivamento mensal de audit_logs (ver AuditArchiveService).
+
+Job mensal (cron), no início do mês:
+    20 1 1 * *  cd /app && python scripts/arquivar_auditoria.py
+
+Uso:
+    python scripts/arquivar_auditoria.py              # retém AUDIT_RETENCAO_MESES (default 12)
+    python scripts/arquivar_auditoria.py --meses 6    # retém 6 meses
+
+Os meses anteriores ao corte saem da tabela para arquivos JSONL comprimidos
+em AUDIT_ARCHIVE_DIR (default <instance>/audit_archive); o visualizador de
+auditoria continua pesquisando neles. Registra um JobRun ('audit_archive').
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import create_app
+from src.services.audit_archive_service import AuditArchiveService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--meses', type=int, help='Meses mantidos na tabela (default: AUDIT_RETENCAO_MESES)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            job = AuditArchiveService.executar_job(meses=args.meses)
+            print(f"[OK] JobRun #{job.id}: {job.total_items} registro(s) em {job.success_count} mês(es)")
+            print(f"[INFO] Arquivos em {AuditArchiveService.arquivo_dir()}")
+        except Exception as e:
+            print(f"[ERRO] {e}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
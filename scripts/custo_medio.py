@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Custo médio ponderado dos itens LPU (incremental, ver CustoMedioService).
+
+Job periódico (cron), ex. a cada hora:
+    0 * * * *  cd /app && python scripts/custo_medio.py
+
+Uso:
+    python scripts/custo_medio.py                        # ENVIOs pendentes até agora
+    python scripts/custo_medio.py --ate 2026-10-18T23:59 # corte explícito
+
+Cada execução processa apenas os ENVIOs ainda não dobrados no custo médio
+(StockMovement.custo_processado_em) e registra um JobRun ('custo_medio').
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import create_app
+from src.services.custo_medio_service import CustoMedioService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ate', type=datetime.fromisoformat,
+                        help='Considera movimentos criados antes deste instante (UTC)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            job = CustoMedioService.executar_job(args.ate)
+            print(f"[OK] JobRun #{job.id}: {job.log_text}")
+        except Exception as e:
+            print(f"[ERRO] {e}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Snapshot diário dos indicadores do cockpit (tabela kpi_diario).
+
+Job noturno (cron), perto do fim do dia:
+    55 23 * * *  cd /app && python scripts/kpi_snapshot.py
+
+Uso:
+    python scripts/kpi_snapshot.py                      # snapshot de hoje
+    python scripts/kpi_snapshot.py --data 2026-10-18    # dia passado: backfill desse dia
+    python scripts/kpi_snapshot.py --backfill 2025-10-01 2026-10-18
+    python scripts/kpi_snapshot.py --backfill 2025-10-01 2026-10-18 --sobrescrever
+
+O backfill reconstrói os dias a partir do histórico (ver KpiSnapshotService);
+dias que já têm snapshot são mantidos, a menos que --sobrescrever seja usado.
+O snapshot usa os valores deste momento (fila, estoque), por isso só vale
+para hoje: --data com dia passado vira backfill daquele dia e data futura é
+rejeitada.
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import create_app
+from src.models import db
+from src.services.kpi_snapshot_service import KpiSnapshotService
+
+
+def parse_data(valor):
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', type=parse_data,
+                        help='Data do snapshot (default: hoje; dia passado = backfill do dia)')
+    parser.add_argument('--backfill', nargs=2, type=parse_data, metavar=('INICIO', 'FIM'),
+                        help='Reconstrói o intervalo a partir do histórico')
+    parser.add_argument('--sobrescrever', action='store_true',
+                        help='No backfill, recalcula também dias que já têm snapshot')
+    args = parser.parse_args()
+
+    hoje = date.today()
+    if args.data and args.data > hoje:
+        parser.error(f"--data {args.data} está no futuro")
+    if args.data and args.data < hoje and not args.backfill:
+        args.backfill = [args.data, args.data]
+
+    app = create_app()
+    with app.app_context():
+        try:
+            if args.backfill:
+                inicio, fim = args.backfill
+                gravados = KpiSnapshotService.backfill(inicio, fim, sobrescrever=args.sobrescrever)
+                db.session.commit()
+                print(f"[OK] Backfill {inicio} -> {fim}: {gravados} dia(s) gravado(s)")
+            else:
+                linha = KpiSnapshotService.capturar(hoje)
+                db.session.commit()
+                print(f"[OK] Snapshot {linha.data}: {linha.to_dict()}")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERRO] {e}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Previsão de consumo e reposição sugerida por técnico/item
+(ver PrevisaoConsumoService).
+
+Job diário (cron), ex. de madrugada:
+    30 3 * * *  cd /app && python scripts/previsao_consumo.py
+
+Uso:
+    python scripts/previsao_consumo.py                    # janela terminando hoje
+    python scripts/previsao_consumo.py --hoje 2026-10-01  # data de referência
+
+Regrava a tabela previsao_consumo e registra um JobRun ('previsao_consumo').
+Parâmetros (config): PREVISAO_JANELA_DIAS, PREVISAO_MEIA_VIDA_DIAS,
+PREVISAO_PRAZO_ENTREGA_DIAS, PREVISAO_COBERTURA_DIAS.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import create_app
+from src.services.previsao_consumo_service import PrevisaoConsumoService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hoje', type=date.fromisoformat,
+                        help='Último dia da janela (YYYY-MM-DD, default: hoje)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            job = PrevisaoConsumoService.executar_job(args.hoje)
+            print(f"[OK] JobRun #{job.id}: {job.log_text}")
+        except Exception as e:
+            print(f"[ERRO] {e}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
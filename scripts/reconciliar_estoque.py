@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Reconciliação de estoque: TecnicoStock x livro de movimentações.
+
+Uso:
+    python scripts/reconciliar_estoque.py             # apenas relatório
+    python scripts/reconciliar_estoque.py --reparar   # corrige o livro com AJUSTEs
+
+O saldo esperado vem do último checkpoint mensal + movimentos desde ele
+(ver StockLedgerService); gere os checkpoints antes em bases grandes:
+    python scripts/stock_checkpoints.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import create_app
+from src.models import db
+from src.services.stock_ledger_service import StockLedgerService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reparar', action='store_true',
+                        help='Registra movimentos AJUSTE para alinhar o livro ao saldo atual')
+    parser.add_argument('--limite', type=int, default=50, help='Divergências listadas (default: 50)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            resultado = StockLedgerService.reconciliar(reparar=args.reparar, limite_detalhes=args.limite)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERRO] {e}")
+            sys.exit(1)
+
+        for d in resultado['itens']:
+            print(f"  técnico #{d['tecnico_id']} item #{d['item_id']}: "
+                  f"livro {d['esperado']} / saldo {d['atual']} ({d['diferenca']:+d})")
+        print(f"[OK] {resultado['divergencias']} divergência(s), {resultado['ajustes']} ajuste(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Checkpoints mensais de saldo de estoque (tabela stock_saldo_checkpoints).
+
+Job mensal (cron), no início do mês:
+    10 0 1 * *  cd /app && python scripts/stock_checkpoints.py
+
+Uso:
+    python scripts/stock_checkpoints.py                    # cortes pendentes até o mês atual
+    python scripts/stock_checkpoints.py --ate 2025-12-01   # até um mês específico
+    python scripts/stock_checkpoints.py --recalcular 2026-03-01
+
+Na primeira execução gera todos os meses desde a primeira movimentação
+(cada corte parte do anterior: custo proporcional a um mês de movimentos).
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import create_app
+from src.models import db
+from src.services.stock_ledger_service import StockLedgerService
+
+
+def parse_data(valor):
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ate', type=parse_data, help='Último mês a gerar (default: mês atual)')
+    parser.add_argument('--recalcular', type=parse_data, metavar='CORTE',
+                        help='Regrava um corte existente (1º dia do mês)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            if args.recalcular:
+                corte = datetime(args.recalcular.year, args.recalcular.month, 1)
+                linhas = StockLedgerService.gerar_checkpoint(corte)
+                db.session.commit()
+                print(f"[OK] Corte {corte.date()}: {linhas} saldo(s)")
+            else:
+                gerados = StockLedgerService.gerar_checkpoints(args.ate)
+                db.session.commit()
+                for g in gerados:
+                    print(f"[OK] Corte {g['data_corte'][:10]}: {g['linhas']} saldo(s)")
+                if not gerados:
+                    print("[OK] Nenhum corte pendente")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[ERRO] {e}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
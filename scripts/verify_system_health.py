@@ -7,7 +7,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src import create_app
 from src.models import db, Chamado, Tecnico
-from sqlalchemy import func, case, and_
+from sqlalchemy import func
 
 
 def check_chamados_sem_custo():
@@ -24,21 +24,14 @@ def check_cache_desatualizado():
     """Compara cache de total_a_pagar com valor calculado."""
     problemas = []
     
-    pend_cond = and_(
-        Chamado.status_chamado.in_(['Concluído', 'SPARE']),
-        Chamado.status_validacao == 'Aprovado',
-        Chamado.pago == False,
-        Chamado.pagamento_id == None
-    )
+    pend_cond = Chamado.pendente_pagamento_condition()
     
     tecnicos = Tecnico.query.filter_by(status='Ativo').all()
     
     for t in tecnicos:
         calculado = db.session.query(
-            func.coalesce(func.sum(
-                case((pend_cond, Chamado.custo_atribuido), else_=0)
-            ), 0)
-        ).filter(Chamado.tecnico_id == t.id).scalar()
+            func.coalesce(func.sum(Chamado.custo_atribuido), 0)
+        ).filter(Chamado.tecnico_id == t.id, pend_cond).scalar()
         
         cached = getattr(t, 'total_a_pagar_cache', None)
         
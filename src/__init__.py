@@ -35,6 +35,19 @@ def create_app():
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config['EXECUTOR_TYPE'] = 'thread'
     app.config['EXECUTOR_MAX_WORKERS'] = 2
+    # Pool do bundle do dashboard (DashboardService): cada thread usa uma
+    # conexão do engine, manter abaixo de pool_size (5)
+    app.config['DASHBOARD_MAX_WORKERS'] = int(os.environ.get('DASHBOARD_MAX_WORKERS', 4))
+    # Alertas de estoque baixo processados no executor após o commit
+    # (AlertaEstoqueService); 'false' processa no próprio commit
+    app.config['ESTOQUE_ALERTAS_ASYNC'] = os.environ.get('ESTOQUE_ALERTAS_ASYNC', 'true').lower() != 'false'
+    # AuditLog em buffer da sessão, gravado em lote no commit (AuditService);
+    # 'false' volta ao flush imediato por registro
+    app.config['AUDIT_BUFFER'] = os.environ.get('AUDIT_BUFFER', 'true').lower() != 'false'
+    # Meses de audit_logs mantidos na tabela; os anteriores vão para
+    # AUDIT_ARCHIVE_DIR (AuditArchiveService, scripts/arquivar_auditoria.py)
+    app.config['AUDIT_RETENCAO_MESES'] = int(os.environ.get('AUDIT_RETENCAO_MESES', 12))
+    app.config['AUDIT_ARCHIVE_DIR'] = os.environ.get('AUDIT_ARCHIVE_DIR')
 
 
     # Init Extensions
@@ -42,6 +55,10 @@ def create_app():
     migrate = Migrate(app, db, render_as_batch=True) # Task 1: Flask-Migrate
     executor.init_app(app) # Apenas init_app aqui dentro
 
+    # Invalidação do cache de serviços entre workers (LISTEN/NOTIFY ou arquivo)
+    from .utils.cache_bus import cache_bus
+    cache_bus.init_app(app)
+
     
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -1,4 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, DDL
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.hybrid import hybrid_property
+import sqlite3
 import uuid
 from datetime import datetime, date
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -18,6 +22,9 @@ ESTADOS_BRASIL = [
 
 FORMAS_PAGAMENTO = ['PIX', 'Transferência Bancária', 'Boleto', 'Dinheiro']
 
+# Status que geram obrigação de pagamento ao técnico (ver docs/ESTADOS_CHAMADO.md)
+STATUS_PAGAVEIS = ('Concluído', 'SPARE')
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     
@@ -209,19 +216,9 @@ class Tecnico(db.Model):
         if self.tecnico_principal_id:
             return []
 
-        chamados = list(self.chamados.filter(
-            Chamado.status_chamado.in_(['Concluído', 'SPARE']),
-            Chamado.status_validacao == 'Aprovado',
-            Chamado.pago == False,
-            Chamado.pagamento_id == None
-        ))
+        chamados = list(self.chamados.filter(Chamado.pendente_pagamento_condition()))
         for sub in self.sub_tecnicos:
-            chamados.extend(list(sub.chamados.filter(
-                Chamado.status_chamado.in_(['Concluído', 'SPARE']),
-                Chamado.status_validacao == 'Aprovado',
-                Chamado.pago == False,
-                Chamado.pagamento_id == None
-            )))
+            chamados.extend(list(sub.chamados.filter(Chamado.pendente_pagamento_condition())))
         return chamados
 
     @property
@@ -334,6 +331,11 @@ class Tecnico(db.Model):
         return data
 
 
+# Autocomplete por prefixo (AutocompleteService, SQLite). Em Postgres a
+# migration a013 também cria o GIN pg_trgm (ix_tecnicos_nome_trgm).
+db.Index('ix_tecnicos_nome_lower', db.func.lower(Tecnico.nome))
+
+
 class Chamado(db.Model):
     __tablename__ = 'chamados'
     
@@ -429,6 +431,27 @@ class Chamado(db.Model):
     @property
     def localizacao(self):
         return self.tecnico.localizacao if self.tecnico else None
+
+    @classmethod
+    def pendente_pagamento_condition(cls):
+        """
+        Predicado canônico de "chamado pendente de pagamento".
+
+        É o MESMO predicado do índice parcial ix_chamados_pendente_pagamento;
+        todo filtro de saldo/pendência deve usá-lo (opcionalmente com filtros
+        adicionais) para que o planner consiga usar o índice.
+
+        Os valores são renderizados como literais (literal_execute): o SQLite
+        só casa índices parciais com constantes, não com bind parameters.
+        """
+        return db.and_(
+            cls.status_chamado.in_([
+                db.literal(s, literal_execute=True) for s in STATUS_PAGAVEIS
+            ]),
+            cls.status_validacao == db.literal('Aprovado', literal_execute=True),
+            cls.pago == db.false(),
+            cls.pagamento_id.is_(None),
+        )
     
     def to_dict(self):
         """
@@ -475,6 +498,22 @@ class Chamado(db.Model):
         }
 
 
+# Índice parcial/cobrindo do working set "pendente de pagamento".
+# Mantido em sincronia com a migration a011 (mesmo nome e predicado).
+db.Index(
+    'ix_chamados_pendente_pagamento',
+    Chamado.tecnico_id,
+    Chamado.data_atendimento,
+    postgresql_include=['custo_atribuido'],
+    postgresql_where=Chamado.pendente_pagamento_condition(),
+    sqlite_where=Chamado.pendente_pagamento_condition(),
+)
+
+# Filtro por tipo de serviço na listagem (ChamadoService.get_all), já na
+# ordem de exibição. Mantido em sincronia com a migration a016.
+db.Index('ix_chamados_servico_data', Chamado.catalogo_servico_id, Chamado.data_atendimento)
+
+
 class Pagamento(db.Model):
     __tablename__ = 'pagamentos'
     
@@ -541,17 +580,102 @@ class AuditLog(db.Model):
     
     user = db.relationship('User', backref='audi_logs')
 
+    # Visualizador de auditoria (AuditArchiveService.buscar): keyset por
+    # (timestamp, id), filtros por usuário e por objeto auditado
+    __table_args__ = (
+        db.Index('ix_audit_logs_timestamp', 'timestamp'),
+        db.Index('ix_audit_logs_model_object', 'model_name', 'object_id'),
+        db.Index('ix_audit_logs_user_timestamp', 'user_id', 'timestamp'),
+    )
+
+
 
 
+class TagDefinicao(db.Model):
+    """
+    Dicionário de tags (nome único + cor).
+
+    REFATORADO (2026-10): antes cada linha de `tags` repetia nome/cor por
+    técnico; agora a definição é única e a associação fica em tecnico_tags.
+    """
+    __tablename__ = 'tag_definicoes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(50), nullable=False, unique=True)
+    cor = db.Column(db.String(7), nullable=False, default='#3B82F6')
+    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def obter_ou_criar(cls, nome, cor=None):
+        """
+        Definição existente pelo nome (a cor existente prevalece) ou nova.
+        Considera também definições pendentes na sessão (ainda sem flush).
+        """
+        nome = (nome or '').strip()
+        for obj in db.session.new:
+            if isinstance(obj, cls) and obj.nome == nome:
+                return obj
+        with db.session.no_autoflush:
+            definicao = cls.query.filter_by(nome=nome).first()
+        if definicao is None:
+            definicao = cls(nome=nome, cor=cor or '#3B82F6')
+            db.session.add(definicao)
+        return definicao
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'cor': self.cor
+        }
+
 
 class Tag(db.Model):
-    __tablename__ = 'tags'
-    
+    """
+    Associação técnico <-> tag (tabela tecnico_tags).
+
+    Mantém a interface antiga: Tag(nome=..., cor=..., tecnico_id=...) resolve
+    a definição no dicionário, e tag.nome / tag.cor (também em SQL) vêm dela.
+    """
+    __tablename__ = 'tecnico_tags'
+
     id = db.Column(db.Integer, primary_key=True)
-    nome = db.Column(db.String(50), nullable=False)
-    cor = db.Column(db.String(7), nullable=False)
-    tecnico_id = db.Column(db.Integer, db.ForeignKey('tecnicos.id'), nullable=False)
-    
+    tecnico_id = db.Column(db.Integer, db.ForeignKey('tecnicos.id'), nullable=False, index=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag_definicoes.id'), nullable=False)
+
+    definicao = db.relationship('TagDefinicao', lazy='joined', innerjoin=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('tecnico_id', 'tag_id', name='uq_tecnico_tags_tecnico_tag'),
+        # Semi-join "técnicos com a tag X" (filtro any-of/all-of, facetas)
+        db.Index('ix_tecnico_tags_tag_tecnico', 'tag_id', 'tecnico_id'),
+    )
+
+    def __init__(self, nome=None, cor=None, **kwargs):
+        super().__init__(**kwargs)
+        if nome is not None and self.definicao is None and self.tag_id is None:
+            self.definicao = TagDefinicao.obter_ou_criar(nome, cor)
+
+    @hybrid_property
+    def nome(self):
+        return self.definicao.nome if self.definicao else None
+
+    @nome.expression
+    def nome(cls):
+        return db.select(TagDefinicao.nome).where(
+            TagDefinicao.id == cls.tag_id
+        ).scalar_subquery()
+
+    @hybrid_property
+    def cor(self):
+        return self.definicao.cor if self.definicao else None
+
+    @cor.expression
+    def cor(cls):
+        return db.select(TagDefinicao.cor).where(
+            TagDefinicao.id == cls.tag_id
+        ).scalar_subquery()
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -638,6 +762,42 @@ class JobRun(db.Model):
         }
 
 
+class KpiDiario(db.Model):
+    """
+    Snapshot diário dos indicadores operacionais do cockpit (uma linha por dia).
+
+    Gravado pelo job noturno (scripts/kpi_snapshot.py) e servido por
+    /api/dashboard/kpis-diarios: uma tendência de um ano é um range scan em
+    ~365 linhas, sem reprocessar o histórico de chamados/estoque.
+
+    origem: 'snapshot' (valores do momento da captura) ou 'backfill'
+    (reconstruídos do histórico; métricas de estoque ficam NULL).
+    """
+    __tablename__ = 'kpi_diario'
+
+    METRICAS = (
+        'fila_validacao', 'finalizados', 'tecnicos_ativos',
+        'pecas_em_campo', 'itens_estoque_baixo'
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Date, nullable=False, unique=True)
+
+    fila_validacao = db.Column(db.Integer, nullable=True)       # pendentes de validação (fim do dia)
+    finalizados = db.Column(db.Integer, nullable=True)          # concluídos no dia (data_atendimento)
+    tecnicos_ativos = db.Column(db.Integer, nullable=True)
+    pecas_em_campo = db.Column(db.Integer, nullable=True)       # soma de TecnicoStock.quantidade > 0
+    itens_estoque_baixo = db.Column(db.Integer, nullable=True)  # itens abaixo do limite consolidado
+
+    origem = db.Column(db.String(20), nullable=False, default='snapshot')
+    calculado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        resultado = {'data': self.data.isoformat(), 'origem': self.origem}
+        resultado.update({m: getattr(self, m) for m in self.METRICAS})
+        return resultado
+
+
 
 class CatalogoServico(db.Model):
     """
@@ -670,6 +830,11 @@ class CatalogoServico(db.Model):
     
     # Status
     ativo = db.Column(db.Boolean, default=True)
+
+    __table_args__ = (
+        # Resolução nome -> ids do filtro "tipo" (migration a016)
+        db.Index('ix_catalogo_servicos_nome', 'nome'),
+    )
     
     def to_dict(self):
         return {
@@ -720,6 +885,9 @@ class ItemLPU(db.Model):
         }
 
 
+db.Index('ix_itens_lpu_nome_lower', db.func.lower(ItemLPU.nome))
+
+
 class ItemLPUPrecoHistorico(db.Model):
     """Histórico de alterações de preços de peças (custo e receita)"""
     __tablename__ = 'itens_lpu_preco_historico'
@@ -776,6 +944,27 @@ class ItemLPUPrecoHistorico(db.Model):
         }
 
 
+class ItemCustoMedio(db.Model):
+    """
+    Checkpoint do custo médio ponderado por item (CustoMedioService).
+
+    Cada execução do job dobra apenas os ENVIOs com custo_unitario ainda não
+    processados (StockMovement.custo_processado_em IS NULL) no estado acumulado
+    (custo_medio x quantidade_acumulada) e grava o resultado em
+    ItemLPU.valor_custo + ItemLPUPrecoHistorico. ultimo_movimento_id é apenas
+    informativo (maior id já dobrado).
+    """
+    __tablename__ = 'itens_lpu_custo_medio'
+
+    item_lpu_id = db.Column(db.Integer, db.ForeignKey('itens_lpu.id'), primary_key=True)
+    custo_medio = db.Column(db.Numeric(14, 4), nullable=False, default=0)
+    quantidade_acumulada = db.Column(db.Integer, nullable=False, default=0)
+    ultimo_movimento_id = db.Column(db.Integer, nullable=False, default=0)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    item_lpu = db.relationship('ItemLPU', backref=db.backref('custo_medio_checkpoint', uselist=False))
+
+
 # =============================================================================
 # TABELA DE PRECOS POR CONTRATO
 # =============================================================================
@@ -857,6 +1046,10 @@ class Notification(db.Model):
     notification_type = db.Column(db.String(20), default='info')  # info, warning, danger, success
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Chave de deduplicação de alertas automáticos (ex: 'estoque_baixo:<tecnico>:<item>').
+    # No máximo UMA notificação não lida por (usuário, chave): ver índice abaixo.
+    dedup_key = db.Column(db.String(100), nullable=True)
     
     user = db.relationship('User', backref='notifications')
     
@@ -870,6 +1063,23 @@ class Notification(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+    @classmethod
+    def dedup_pendente_condition(cls):
+        """Predicado do índice parcial uq_notifications_dedup_pendente (a019)."""
+        return db.and_(cls.is_read == db.false(), cls.dedup_key.isnot(None))
+
+
+# Alvo do INSERT ... ON CONFLICT DO NOTHING dos alertas automáticos
+# (AlertaEstoqueService). Mantido em sincronia com a migration a019.
+db.Index(
+    'uq_notifications_dedup_pendente',
+    Notification.user_id,
+    Notification.dedup_key,
+    unique=True,
+    postgresql_where=Notification.dedup_pendente_condition(),
+    sqlite_where=Notification.dedup_pendente_condition(),
+)
+
 
 # =============================================================================
 # GESTÃO DE ESTOQUE DECENTRALIZADO (STOCK EM TRÂNSITO)
@@ -924,15 +1134,39 @@ class StockMovement(db.Model):
     chamado_id = db.Column(db.Integer, db.ForeignKey('chamados.id'), nullable=True, index=True)
 
     quantidade = db.Column(db.Integer, nullable=False)
-    tipo_movimento = db.Column(db.String(20), nullable=False)  # 'ENVIO', 'USO', 'DEVOLUCAO', 'AJUSTE'
+    tipo_movimento = db.Column(db.String(20), nullable=False)  # 'ENVIO', 'USO', 'DEVOLUCAO', 'AJUSTE', 'TRANSFERENCIA'
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Custo unitário no momento da movimentação (para auditoria e cálculo de média ponderada)
     custo_unitario = db.Column(db.Numeric(10, 2), nullable=True)
+    # ENVIO já dobrado no custo médio (CustoMedioService, migration a025)
+    custo_processado_em = db.Column(db.DateTime, nullable=True)
 
     observacao = db.Column(db.String(200), nullable=True)
     created_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
 
+    # Índices compostos para filtros por período (ver migration a012).
+    # Filtros devem usar intervalo de timestamp (StockReportService.periodo_filter),
+    # nunca func.date(data_criacao), para que estes índices sejam aproveitados.
+    __table_args__ = (
+        db.Index('ix_stock_movements_tipo_data', 'tipo_movimento', 'data_criacao'),
+        db.Index('ix_stock_movements_item_data', 'item_lpu_id', 'data_criacao'),
+        db.Index('ix_stock_movements_origem_data', 'origem_tecnico_id', 'data_criacao'),
+        db.Index('ix_stock_movements_destino_data', 'destino_tecnico_id', 'data_criacao'),
+        # Movimentos desde o último checkpoint de saldo (StockLedgerService, a022)
+        db.Index('ix_stock_movements_data', 'data_criacao'),
+        # ENVIOs pendentes do custo médio (CustoMedioService, migrations a020/a025)
+        db.Index(
+            'ix_stock_movements_envio_custo', 'item_lpu_id', 'id',
+            postgresql_where=db.text(
+                "tipo_movimento = 'ENVIO' AND custo_unitario IS NOT NULL AND custo_processado_em IS NULL"
+            ),
+            sqlite_where=db.text(
+                "tipo_movimento = 'ENVIO' AND custo_unitario IS NOT NULL AND custo_processado_em IS NULL"
+            )
+        ),
+    )
+
     # Relationships
     item_lpu = db.relationship('ItemLPU')
     origem_tecnico = db.relationship('Tecnico', foreign_keys=[origem_tecnico_id])
@@ -957,6 +1191,77 @@ class StockMovement(db.Model):
         }
 
 
+class StockSaldoCheckpoint(db.Model):
+    """
+    Saldo por (técnico, item) no instante data_corte (movimentos com
+    data_criacao < data_corte), gravado mensalmente (StockLedgerService).
+
+    Consulta "saldo em D" = checkpoint mais próximo <= D + movimentos desde
+    ele, sem replay do histórico inteiro. Apenas saldos != 0 são gravados;
+    cada corte é gerado em uma transação (corte presente = corte completo).
+    """
+    __tablename__ = 'stock_saldo_checkpoints'
+
+    id = db.Column(db.Integer, primary_key=True)
+    data_corte = db.Column(db.DateTime, nullable=False)
+    tecnico_id = db.Column(db.Integer, db.ForeignKey('tecnicos.id'), nullable=False)
+    item_lpu_id = db.Column(db.Integer, db.ForeignKey('itens_lpu.id'), nullable=False)
+    quantidade = db.Column(db.Integer, nullable=False)
+    calculado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('data_corte', 'tecnico_id', 'item_lpu_id', name='uq_stock_saldo_checkpoint'),
+        db.Index('ix_stock_saldo_checkpoints_tecnico', 'tecnico_id', 'data_corte'),
+    )
+
+
+class PrevisaoConsumo(db.Model):
+    """
+    Previsão de consumo por (técnico, item), recalculada pelo job
+    scripts/previsao_consumo.py (PrevisaoConsumoService).
+
+    consumo_diario: taxa móvel de USO (média exponencial na janela)
+    dias_cobertura: saldo_atual / consumo_diario (NULL sem consumo)
+    quantidade_sugerida: reposição para cobrir prazo de entrega + cobertura
+    alvo, descontadas solicitações pendentes
+    """
+    __tablename__ = 'previsao_consumo'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tecnico_id = db.Column(db.Integer, db.ForeignKey('tecnicos.id'), nullable=False)
+    item_lpu_id = db.Column(db.Integer, db.ForeignKey('itens_lpu.id'), nullable=False)
+
+    consumo_janela = db.Column(db.Integer, nullable=False, default=0)
+    consumo_diario = db.Column(db.Numeric(10, 4), nullable=False, default=0)
+    saldo_atual = db.Column(db.Integer, nullable=False, default=0)
+    dias_cobertura = db.Column(db.Numeric(10, 1), nullable=True)
+    quantidade_sugerida = db.Column(db.Integer, nullable=False, default=0)
+    calculado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    tecnico = db.relationship('Tecnico')
+    item_lpu = db.relationship('ItemLPU')
+
+    __table_args__ = (
+        db.UniqueConstraint('tecnico_id', 'item_lpu_id', name='uq_previsao_consumo_par'),
+        db.Index('ix_previsao_consumo_cobertura', 'dias_cobertura'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tecnico_id': self.tecnico_id,
+            'tecnico': self.tecnico.nome if self.tecnico else None,
+            'item_id': self.item_lpu_id,
+            'item': self.item_lpu.nome if self.item_lpu else None,
+            'consumo_janela': self.consumo_janela,
+            'consumo_diario': float(self.consumo_diario or 0),
+            'saldo_atual': self.saldo_atual,
+            'dias_cobertura': float(self.dias_cobertura) if self.dias_cobertura is not None else None,
+            'quantidade_sugerida': self.quantidade_sugerida,
+            'calculado_em': self.calculado_em.isoformat() if self.calculado_em else None
+        }
+
+
 class SolicitacaoReposicao(db.Model):
     """Solicitações de reposição de estoque."""
     __tablename__ = 'solicitacoes_reposicao'
@@ -996,3 +1301,64 @@ class SolicitacaoReposicao(db.Model):
             'justificativa': self.justificativa,
             'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None
         }
+
+
+# ==============================================================================
+# ÍNDICE DE BUSCA TEXTUAL (SearchService)
+# ==============================================================================
+# SQLite: uma tabela FTS5 "sombra" por entidade (rowid = id da entidade),
+# tokenizer unicode61 sem acentos, mantida em sincronia por triggers (cobre
+# também UPDATE/DELETE em massa e SQL manual). Em Postgres a busca usa GIN
+# pg_trgm sobre funções normalizadoras (unaccent + lower) criadas pela
+# migration a014. Mantido em sincronia com a014 (mesmos nomes/colunas).
+
+SEARCH_FTS_SOURCES = {
+    # tabela FTS          (tabela origem, colunas indexadas)
+    'search_fts_tecnicos': ('tecnicos', ('nome', 'cidade', 'documento')),
+    'search_fts_chamados': ('chamados', ('codigo_chamado', 'fsa_codes', 'loja', 'observacoes')),
+    'search_fts_itens': ('itens_lpu', ('nome',)),
+}
+
+
+def search_fts_ddl(fts, source, columns):
+    """Statements (CREATE VIRTUAL TABLE + triggers) de uma tabela FTS5."""
+    cols = ', '.join(columns)
+    new_vals = ', '.join(f'NEW.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, tokenize = 'unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (NEW.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = OLD.id; "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (NEW.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_ad AFTER DELETE ON {source} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = OLD.id; END",
+    ]
+
+
+for _fts, (_source, _columns) in SEARCH_FTS_SOURCES.items():
+    for _stmt in search_fts_ddl(_fts, _source, _columns):
+        event.listen(db.metadata, 'after_create', DDL(_stmt).execute_if(dialect='sqlite'))
+    event.listen(
+        db.metadata, 'before_drop', DDL(f"DROP TABLE IF EXISTS {_fts}").execute_if(dialect='sqlite')
+    )
+
+
+# ==============================================================================
+# lower() UNICODE NO SQLITE (AutocompleteService)
+# ==============================================================================
+# O lower() nativo do SQLite só converte ASCII ('Élcio' -> 'Élcio'), enquanto
+# o termo de busca é normalizado com str.lower() ('Él' -> 'él'). Cada conexão
+# SQLite sobrescreve lower() pela mesma função Python, determinística para
+# continuar válida nos índices de expressão lower(nome) (a013, recriados pela
+# a026). Em Postgres o lower() nativo já é Unicode.
+
+def _sqlite_lower(valor):
+    return None if valor is None else str(valor).lower()
+
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_unicode_lower(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('lower', 1, _sqlite_lower, deterministic=True)
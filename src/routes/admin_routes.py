@@ -2,7 +2,6 @@ from flask import Blueprint, render_template, request, current_app, flash, redir
 from flask_login import login_required, current_user
 from src.decorators import admin_required
 from src.models import AuditLog, User, Cliente, TipoServico, ItemLPU, ContratoItem, db
-from sqlalchemy import desc
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -10,23 +9,43 @@ admin_bp = Blueprint('admin', __name__)
 @login_required
 @admin_required
 def auditoria():
-    page = request.args.get('page', 1, type=int)
-    user_id = request.args.get('user_id', type=int)
-    model_name = request.args.get('model_name')
-    
-    query = AuditLog.query
+    """
+    Visualizador de auditoria: tabela viva + arquivo mensal (JSONL), por
+    cursor. Ver AuditArchiveService.buscar.
+    """
+    from datetime import datetime
+    from src.services.audit_archive_service import AuditArchiveService
+
+    def _data(nome):
+        try:
+            return datetime.strptime(request.args.get(nome, ''), '%Y-%m-%d').date()
+        except ValueError:
+            return None
+
+    filtros = {
+        'user_id': request.args.get('user_id', type=int),
+        'model_name': (request.args.get('model_name') or '').strip() or None,
+        'object_id': (request.args.get('object_id') or '').strip() or None,
+        'data_inicio': _data('data_inicio'),
+        'data_fim': _data('data_fim'),
+    }
+    try:
+        pagina = AuditArchiveService.buscar(cursor=request.args.get('cursor'), **filtros)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        pagina = AuditArchiveService.buscar(**filtros)
 
-    if user_id:
-        query = query.filter(AuditLog.user_id == user_id)
-    
-    if model_name:
-        query = query.filter(AuditLog.model_name.ilike(f"%{model_name}%"))
-        
-    pagination = query.order_by(desc(AuditLog.timestamp)).paginate(page=page, per_page=20)
-    
-    users = User.query.all()
-    
-    return render_template('audit_logs.html', pagination=pagination, users=users, selected_model=model_name, selected_user=user_id)
+    users = User.query.order_by(User.username).all()
+    modelos = AuditArchiveService.modelos()
+    if filtros['model_name'] and filtros['model_name'] not in modelos:
+        modelos.append(filtros['model_name'])  # só no arquivo
+
+    return render_template('audit_logs.html', logs=pagina['itens'], next_cursor=pagina['next_cursor'],
+                           primeira_pagina=not request.args.get('cursor'), users=users, modelos=modelos,
+                           selected_model=filtros['model_name'], selected_user=filtros['user_id'],
+                           selected_object=filtros['object_id'],
+                           data_inicio=request.args.get('data_inicio', ''),
+                           data_fim=request.args.get('data_fim', ''))
 
 # --- USER MANAGEMENT CRUD ---
 
@@ -545,20 +564,6 @@ def atualizar_contrato_item(contrato_id, item_id):
 @admin_required
 def listar_pecas_disponiveis():
     """Lista todas as peças disponíveis para seleção (API JSON)"""
-    # Buscar todas as peças únicas do sistema
-    pecas = ItemLPU.query.order_by(ItemLPU.nome).all()
-
-    # Remover duplicatas por nome
-    seen = set()
-    pecas_unicas = []
-    for p in pecas:
-        if p.nome not in seen:
-            seen.add(p.nome)
-            pecas_unicas.append({
-                'id': p.id,
-                'nome': p.nome,
-                'valor_receita': float(p.valor_receita or 0),
-                'valor_custo': float(p.valor_custo or 0)
-            })
-
-    return jsonify(pecas_unicas)
+    # Peças únicas por nome, do snapshot de referência (ETag/304)
+    from ..services.reference_data_service import ReferenceDataService
+    return ReferenceDataService.response('pecas')
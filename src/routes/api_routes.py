@@ -1,9 +1,10 @@
+import os
 from flask import Blueprint, jsonify, request, url_for
 from flask_login import login_required
 from ..decorators import admin_required  # P1: Access control
 from ..services.chamado_service import ChamadoService
 from ..services.report_service import ReportService
-from ..models import Cliente, Chamado, Tecnico, db, TecnicoStock, ItemLPU, Pagamento
+from ..models import Chamado, Tecnico, db, TecnicoStock, ItemLPU, Pagamento
 from sqlalchemy import func
 from datetime import datetime, date
 
@@ -29,12 +30,12 @@ def dados_contrato():
     """
     Retorna JSON estruturado com todos os Clientes, Tipos de Serviço e LPUs.
     Usado pelo formulário de chamados para popular selects dinamicamente.
+
+    Servido do snapshot de ReferenceDataService (ETag/304).
     """
+    from ..services.reference_data_service import ReferenceDataService
     try:
-        clientes = Cliente.query.filter_by(ativo=True).order_by(Cliente.nome).all()
-        return jsonify({
-            'clientes': [c.to_dict() for c in clientes]
-        })
+        return ReferenceDataService.response('contratos')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -119,10 +120,7 @@ def tecnicos_pendencias(id):
         # Filtra chamados pendentes seguindo a regra rigorosa do Financeiro
         base_query = Chamado.query.filter(
             Chamado.tecnico_id == id,
-            Chamado.status_chamado.in_(['Concluído', 'SPARE']),
-            Chamado.status_validacao == 'Aprovado',
-            Chamado.pago == False,
-            Chamado.pagamento_id == None
+            Chamado.pendente_pagamento_condition()
         )
         
         # 1. Calcular total via Agregação (Fonte da Verdade)
@@ -367,3 +365,151 @@ def dashboard_kpis_roi():
         return jsonify(data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@api_bp.route('/dashboard/kpis-diarios')
+@login_required
+def dashboard_kpis_diarios():
+    """
+    Série diária dos indicadores do cockpit a partir dos snapshots (kpi_diario).
+    Params: inicio, fim (YYYY-MM-DD; default últimos 30 dias), metricas (csv).
+    """
+    from datetime import timedelta
+    from ..services.kpi_snapshot_service import KpiSnapshotService
+    try:
+        fim_str = request.args.get('fim')
+        inicio_str = request.args.get('inicio')
+        fim = datetime.strptime(fim_str, '%Y-%m-%d').date() if fim_str else date.today()
+        inicio = datetime.strptime(inicio_str, '%Y-%m-%d').date() if inicio_str else fim - timedelta(days=29)
+        metricas = [m for m in request.args.get('metricas', '').split(',') if m] or None
+
+        data = KpiSnapshotService.serie(inicio, fim, metricas)
+        data['periodo'] = {'inicio': inicio.isoformat(), 'fim': fim.isoformat()}
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# ==============================================================================
+# EXPORTAÇÕES EM BACKGROUND
+# ==============================================================================
+
+@api_bp.route('/exports', methods=['POST'])
+@login_required
+def criar_export():
+    """
+    Enfileira uma exportação em background.
+
+    Body JSON: {"tipo": "movimentacoes", "formato": "csv|xlsx", "params": {...}}
+    Retorna o job_id e a URL de status para polling.
+    """
+    from flask_login import current_user
+    from ..services.export_job_service import ExportJobService
+
+    data = request.get_json(silent=True) or {}
+    try:
+        job = ExportJobService.enfileirar(
+            data.get('tipo'), data.get('params') or {}, data.get('formato', 'csv'), current_user
+        )
+    except (ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({
+        'job_id': job.id,
+        'status_url': url_for('api.status_export', job_id=job.id)
+    }), 202
+
+
+@api_bp.route('/exports/<int:job_id>')
+@login_required
+def status_export(job_id):
+    """Progresso da exportação (status, linhas processadas, download_url)."""
+    from flask_login import current_user
+    from ..services.export_job_service import ExportJobService
+
+    try:
+        job = ExportJobService.get_job(job_id, current_user)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+
+    return jsonify(ExportJobService.status(job))
+
+
+@api_bp.route('/exports/<int:job_id>/download')
+@login_required
+def download_export(job_id):
+    """Download do artefato gerado (410 se expirado/removido na limpeza)."""
+    from flask import send_file
+    from flask_login import current_user
+    from ..services.export_job_service import ExportJobService
+
+    try:
+        job = ExportJobService.get_job(job_id, current_user)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+
+    path = ExportJobService.caminho_artefato(job)
+    if not path:
+        if job.status == 'COMPLETED':
+            return jsonify({'error': 'Arquivo expirado. Gere a exportação novamente.'}), 410
+        return jsonify({'error': 'Exportação ainda não concluída.', 'status': job.status}), 409
+
+    return send_file(path, as_attachment=True, download_name=os.path.basename(path).split('_', 1)[1])
+
+
+# ==============================================================================
+# CACHE DE LEITURA (src/utils/cache.py)
+# ==============================================================================
+
+@api_bp.route('/cache/stats')
+@login_required
+@admin_required
+def cache_stats():
+    """Hits/misses/evictions por região do cache de serviços."""
+    from ..utils.cache import cache_stats as _cache_stats
+    return jsonify({'regioes': _cache_stats()})
+
+
+# ==============================================================================
+# AUTOCOMPLETE (TomSelect remoto)
+# ==============================================================================
+
+@api_bp.route('/autocomplete/tecnicos')
+@login_required
+def autocomplete_tecnicos():
+    """Técnicos ativos por nome: [{'id', 'label'}] (q, limit <= 50)."""
+    from ..services.autocomplete_service import AutocompleteService
+    status = request.args.get('status', 'Ativo') or None
+    return jsonify(AutocompleteService.tecnicos(
+        request.args.get('q', ''), request.args.get('limit'), status=status
+    ))
+
+
+@api_bp.route('/autocomplete/itens')
+@login_required
+def autocomplete_itens():
+    """Itens LPU por nome: [{'id', 'label'}]. todos=1 inclui itens de contrato."""
+    from ..services.autocomplete_service import AutocompleteService
+    return jsonify(AutocompleteService.itens(
+        request.args.get('q', ''), request.args.get('limit'),
+        somente_estoque=request.args.get('todos') != '1'
+    ))
+
+
+@api_bp.route('/search')
+@login_required
+def busca_unificada():
+    """
+    Busca unificada (técnicos, chamados, itens LPU) ranqueada por relevância.
+    Params: q, tipos (csv: tecnico,chamado,item), limit (<= 50).
+    """
+    from ..services.search_service import SearchService
+    tipos = [t.strip() for t in request.args.get('tipos', '').split(',') if t.strip()] or None
+    return jsonify({
+        'q': request.args.get('q', ''),
+        'results': SearchService.search(
+            request.args.get('q', ''), tipos=tipos, limit=request.args.get('limit', 10, type=int)
+        )
+    })
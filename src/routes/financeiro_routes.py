@@ -3,6 +3,7 @@ from flask_login import login_required
 from datetime import datetime
 from ..services.financeiro_service import FinanceiroService
 from ..services.tecnico_service import TecnicoService, TecnicoMetricas
+from ..services.cliente_service import ClienteService
 from ..models import ESTADOS_BRASIL, Chamado, Tecnico
 from werkzeug.utils import secure_filename
 import os
@@ -265,22 +266,43 @@ def fechamento_lote():
 def fechamento_cliente():
     from ..models import Cliente, Chamado, CatalogoServico, db
     from sqlalchemy.orm import joinedload
-    import io
-    import csv
-    from flask import Response
+    from ..services.export_service import ExportService
     
     cliente_id = request.args.get('cliente_id', type=int)
     mes = request.args.get('mes', type=int, default=datetime.now().month)
     ano = request.args.get('ano', type=int, default=datetime.now().year)
     export_csv = request.args.get('export') == 'true'
     
-    clientes = Cliente.query.filter_by(ativo=True).all()
+    clientes = ClienteService.get_ativos()
     chamados = []
     total_receita = 0.0
     cliente_selecionado = None
     
     if cliente_id:
         cliente_selecionado = Cliente.query.get(cliente_id)
+        
+        if export_csv and request.args.get('background') == '1':
+            from flask_login import current_user
+            from ..services.export_job_service import ExportJobService
+            try:
+                job = ExportJobService.enfileirar('fechamento_cliente', {
+                    'cliente_id': cliente_id, 'mes': mes, 'ano': ano
+                }, request.args.get('formato', 'csv'), current_user)
+                flash(ExportJobService.MENSAGEM_ENFILEIRADO.format(job_id=job.id), 'info')
+            except ValueError as e:
+                flash(str(e), 'warning')
+            return redirect(url_for('financeiro.fechamento_cliente', cliente_id=cliente_id, mes=mes, ano=ano))
+
+        if export_csv:
+            # REFATORADO (2026-01): Streaming com memória constante (ExportService)
+            return ExportService.send(
+                ExportService.dataset_fechamento_cliente(cliente_id, mes, ano),
+                f"fechamento_{cliente_selecionado.nome}_{mes}_{ano}",
+                formato=request.args.get('formato', 'csv'),
+                bom=True,
+                sheet_title='Fechamento'
+            )
+        
         query = Chamado.query.join(CatalogoServico).filter(
             CatalogoServico.cliente_id == cliente_id,
             db.extract('month', Chamado.data_atendimento) == mes,
@@ -291,26 +313,6 @@ def fechamento_cliente():
         
         chamados = query.order_by(Chamado.data_atendimento).all()
         total_receita = sum(float(c.valor_receita_total or 0) for c in chamados)
-        
-        if export_csv:
-            output = io.StringIO()
-            writer = csv.writer(output, delimiter=';')
-            writer.writerow(['Data', 'Loja/Cidade', 'Técnico', 'FSA / Código', 'Serviço', 'Peça', 'Receita (R$)'])
-            for c in chamados:
-                writer.writerow([
-                    c.data_atendimento.strftime('%d/%m/%Y'),
-                    f"{c.loja or ''} {c.cidade}",
-                    c.tecnico.nome if c.tecnico else 'N/A',
-                    c.codigo_chamado or '-',
-                    c.tipo_servico,
-                    c.peca_usada or '-',
-                    f"{float(c.valor_receita_total or 0):.2f}".replace('.', ',')
-                ])
-            return Response(
-                output.getvalue().encode('utf-8-sig'),
-                mimetype="text/csv",
-                headers={"Content-disposition": f"attachment; filename=fechamento_{cliente_selecionado.nome}_{mes}_{ano}.csv"}
-            )
             
     return render_template('fechamento_cliente.html',
         clientes=clientes,
@@ -328,14 +330,13 @@ def fechamento_cliente():
 @login_required
 def dashboard_geo():
     from ..services.report_service import ReportService
-    from ..models import Cliente
     inicio_str = request.args.get('inicio', datetime.now().replace(day=1).strftime('%Y-%m-%d'))
     fim_str = request.args.get('fim', datetime.now().strftime('%Y-%m-%d'))
     cliente_id = request.args.get('cliente_id')
     inicio = datetime.strptime(inicio_str, '%Y-%m-%d').date()
     fim = datetime.strptime(fim_str, '%Y-%m-%d').date()
     dados = ReportService.rentabilidade_geografica(inicio, fim, cliente_id=int(cliente_id) if cliente_id else None)
-    clientes = Cliente.query.filter_by(ativo=True).all()
+    clientes = ClienteService.get_ativos()
     return render_template('dashboard_geo.html', 
         dados=dados, 
         inicio=inicio_str, 
@@ -1,18 +1,19 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-import csv
-import io
 from sqlalchemy import func
 # CORREÇÃO AQUI: Importamos Chamado, Pagamento e Tecnico explicitamente
-from ..models import ESTADOS_BRASIL, FORMAS_PAGAMENTO, Chamado, Pagamento, Tecnico, Tag, Cliente, db, TecnicoStock, ItemLPU
+from ..models import ESTADOS_BRASIL, FORMAS_PAGAMENTO, Chamado, Pagamento, Tag, db, TecnicoStock, ItemLPU
 from ..services.tecnico_service import TecnicoService
 from ..services.chamado_service import ChamadoService
 from ..services.financeiro_service import FinanceiroService
 from ..services.tag_service import TagService
 from ..services.saved_view_service import SavedViewService
 from ..services.import_service import ImportService
-from ..services.report_service import ReportService
-from ..services.stock_service import StockService
+from ..services.export_service import ExportService
+from ..services.cliente_service import ClienteService
+from ..services.facet_service import FacetService
+from ..services.dashboard_service import DashboardService
+from ..utils.cache import cached
 from ..decorators import admin_required
 
 operacional_bp = Blueprint('operacional', __name__)
@@ -49,8 +50,10 @@ def importar_tecnicos():
 STATUS_TECNICO = ['Ativo', 'Inativo']
 # TIPOS_SERVICO removed: Fetch dynamically from CatalogoServico
 STATUS_CHAMADO = ['Pendente', 'Em Andamento', 'Concluído', 'SPARE', 'Cancelado']
+STATUS_VALIDACAO = ['Pendente', 'Aprovado', 'Rejeitado', 'Excluído']
 
 # Helper to get Types
+@cached(tables=['catalogo_servicos'])
 def get_tipos_servico():
     from ..models import CatalogoServico
     # Get distinct names or all active
@@ -61,30 +64,26 @@ def get_tipos_servico():
 @operacional_bp.route('/')
 @login_required
 def dashboard():
-    from datetime import date
-    hoje = date.today()
-    
+    # Widgets independentes calculados em paralelo (DashboardService)
+    bundle = DashboardService.bundle([
+        'kpis', 'fila_validacao', 'finalizados_hoje', 'tecnicos_ativos',
+        'chamados', 'alertas_estoque'
+    ])['widgets']
+
+    def widget(nome, default=None):
+        return bundle[nome].get('data', default)
+
     # 1. KPIs Estratégicos (do ReportService existente)
-    kpis = ReportService.get_dashboard_kpis()
+    kpis = widget('kpis', {})
     
     # 2. Stats Operacionais para o Cockpit (CORRIGIDOS)
     stats = {
         # Fila de Validação: Usa MESMA query da página de Atendimentos
-        # Chamados com status_validacao='Pendente' e batch_id
-        'fila_validacao': Chamado.query.filter(
-            Chamado.status_validacao == 'Pendente',
-            Chamado.batch_id.isnot(None)
-        ).count(),
-        
+        'fila_validacao': widget('fila_validacao', 0),
         # Produtividade: Concluídos HOJE
-        'finalizados_hoje': Chamado.query.filter(
-            Chamado.status_chamado == 'Concluído',
-            func.date(Chamado.data_atendimento) == hoje
-        ).count(),
-        
+        'finalizados_hoje': widget('finalizados_hoje', 0),
         # Força de trabalho
-        'tecnicos_ativos': Tecnico.query.filter_by(status='Ativo').count(),
-        
+        'tecnicos_ativos': widget('tecnicos_ativos', 0),
         # Faturamento: Usar financeiro.receita_total dos KPIs (mais preciso)
         'faturamento_estimado': kpis.get('financeiro', {}).get('receita_total', 0) if kpis else 0
     }
@@ -93,11 +92,10 @@ def dashboard():
     top_tecnicos = kpis.get('top_tecnicos', [])[:5] if kpis else []
     
     # 4. Últimos Chamados (expandido para tabela do Cockpit)
-    dashboard_stats = ChamadoService.get_dashboard_stats()
-    ultimos_chamados = dashboard_stats.get('ultimos', [])
+    ultimos_chamados = (widget('chamados') or {}).get('ultimos', [])
     
     # 5. Alertas de Estoque
-    alertas_estoque = StockService.get_alertas_dashboard(limite_minimo=10)
+    alertas_estoque = widget('alertas_estoque', [])
 
     return render_template('dashboard.html',
         kpis=kpis,
@@ -107,18 +105,64 @@ def dashboard():
         alertas_estoque=alertas_estoque
     )
 
-@operacional_bp.route('/tecnicos')
+
+@operacional_bp.route('/api/dashboard/bundle')
 @login_required
-def tecnicos():
-    page = request.args.get('page', 1, type=int)
-    filters = {
+def dashboard_bundle():
+    """
+    Todos os widgets do dashboard em um único JSON, calculados em paralelo.
+    ?widgets=a,b restringe os widgets; widgets financeiros só para admins.
+    """
+    nomes = [n for n in request.args.get('widgets', '').split(',') if n] or None
+    if not current_user.is_admin:
+        from ..services.dashboard_service import WIDGETS, ADMIN_WIDGETS
+        nomes = [n for n in (nomes or WIDGETS) if n not in ADMIN_WIDGETS]
+    return jsonify(DashboardService.bundle(nomes))
+
+def _tecnicos_filters():
+    """Filtros da listagem de técnicos a partir da query string."""
+    return {
         'estado': request.args.get('estado', ''),
         'cidade': request.args.get('cidade', ''),
         'status': request.args.get('status', ''),
         'pagamento': request.args.get('pagamento', ''),
         'search': request.args.get('search', ''),
-        'tag': request.args.get('tag', '')
+        'tag': [t for t in request.args.getlist('tag') if t],
+        'tag_modo': request.args.get('tag_modo', 'qualquer')
     }
+
+
+def _chamados_filters():
+    """Filtros da listagem de chamados a partir da query string."""
+    filters = {
+        'tecnico_id': request.args.get('tecnico', ''),
+        'status': request.args.get('status', ''),
+        'status_validacao': request.args.get('status_validacao', ''), # Default handled below
+        'tipo': request.args.get('tipo', ''),
+        'pago': request.args.get('pago', ''),
+        'search': request.args.get('search', '')
+    }
+    
+    # Default to "Inbox mode" if not searching specifically
+    # User Request: "na aba chamados deveria ser apenas ... pendente de ser validado"
+    # Show Pendente/Rejeitado by default. Hide Aprovado/Excluído.
+    view_mode = request.args.get('view', 'inbox')
+    
+    if filters['status_validacao'] == 'todos':
+        filters['status_validacao'] = []
+    elif not filters['status_validacao']:
+        if view_mode == 'all':
+            filters['status_validacao'] = [] # No filter
+        else:
+             filters['status_validacao'] = ['Pendente', 'Rejeitado']
+    return filters
+
+
+@operacional_bp.route('/tecnicos')
+@login_required
+def tecnicos():
+    page = request.args.get('page', 1, type=int)
+    filters = _tecnicos_filters()
     
     # REFATORADO: Usar get_tecnicos_com_metricas() em vez de get_all()
     # Isso retorna TecnicoMetricas DTOs com total_a_pagar_agregado já calculado
@@ -141,7 +185,7 @@ def tecnicos():
     estados_usados = sorted(list(set(all_states)))
     
     saved_views = SavedViewService.get_for_user(current_user.id, 'tecnicos')
-    available_tags = TagService.get_all_unique()
+    available_tags = TagService.get_facets()
     tecnicos_por_estado = TecnicoService.get_distribuicao_geografica()
 
     # Criar objeto de paginação compatível com template
@@ -183,6 +227,7 @@ def tecnicos():
         pagamento_filter=filters['pagamento'],
         search_filter=filters['search'],
         tag_filter=filters['tag'],
+        tag_modo=filters['tag_modo'],
         saved_views=saved_views,
         available_tags=available_tags,
         tecnicos_por_estado=tecnicos_por_estado
@@ -192,38 +237,11 @@ def tecnicos():
 @operacional_bp.route('/tecnicos/exportar')
 @login_required
 def exportar_tecnicos():
-    # CORRIGIDO: Usar get_tecnicos_com_metricas() para ter total_a_pagar correto
-    from ..services.tecnico_service import TecnicoMetricas
-    result = TecnicoService.get_tecnicos_com_metricas(page=None)
-    metricas_list = result['items']  # Lista de TecnicoMetricas
-
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=';')
-
-    # Header
-    writer.writerow(['ID', 'Nome', 'Cidade', 'Estado', 'Status', 'Valor/Atendimento', 'Banco', 'Chave', 'Total a Pagar', 'Tags'])
-
-    # Rows - usar TecnicoMetricas para acesso otimizado
-    for m in metricas_list:
-        t = m.tecnico
-        tags_str = ", ".join([tag.nome for tag in t.tags])
-        writer.writerow([
-            t.id_tecnico,
-            t.nome,
-            t.cidade,
-            t.estado,
-            t.status,
-            f"R$ {float(t.valor_por_atendimento or 0):.2f}".replace('.', ','),
-            t.forma_pagamento or '-',
-            t.chave_pagamento or '-',
-            f"R$ {m.total_a_pagar_agregado:.2f}".replace('.', ','),
-            tags_str
-        ])
-    
-    return Response(
-        output.getvalue().encode('utf-8-sig'), # utf-8-sig for Excel compatibility
-        mimetype="text/csv",
-        headers={"Content-disposition": "attachment; filename=tecnicos_export.csv"}
+    # REFATORADO (2026-01): Streaming com memória constante (ExportService)
+    return ExportService.csv_response(
+        ExportService.dataset_tecnicos(),
+        filename='tecnicos_export.csv',
+        bom=True  # utf-8-sig for Excel compatibility
     )
 
 @operacional_bp.route('/tecnicos/novo', methods=['GET', 'POST'])
@@ -259,15 +277,13 @@ def tecnico_detalhes(id):
     # 1. Stats Calculation
     # REFATORADO: Removido fallback para Chamado.valor (campo DEPRECATED)
     val_term = func.coalesce(Chamado.custo_atribuido, 0)
+    pend_cond = Chamado.pendente_pagamento_condition()
     
     stats = db.session.query(
         func.count(Chamado.id).label('total'),
         func.sum(case(
             (
-                (Chamado.status_chamado.in_(['Concluído', 'SPARE'])) & 
-                (Chamado.status_validacao == 'Aprovado') &  # P0: Gate unificado
-                (Chamado.pago == False) & 
-                (Chamado.pagamento_id == None) &
+                pend_cond &  # P0: Gate unificado (predicado canônico)
                 (val_term > 0), # Apenas chamados com valor > 0 contam como 'Pendente Financeiro'
                 1
             ), 
@@ -275,10 +291,7 @@ def tecnico_detalhes(id):
         )).label('pendentes_qtd'),
         func.sum(case(
             (
-                (Chamado.status_chamado.in_(['Concluído', 'SPARE'])) & 
-                (Chamado.status_validacao == 'Aprovado') &  # P0: Gate unificado
-                (Chamado.pago == False) & 
-                (Chamado.pagamento_id == None) &
+                pend_cond &
                 (val_term > 0),
                 val_term
             ), 
@@ -344,25 +357,7 @@ def editar_tecnico(id):
 @login_required
 def chamados():
     page = request.args.get('page', 1, type=int)
-    filters = {
-        'tecnico_id': request.args.get('tecnico', ''),
-        'status': request.args.get('status', ''),
-        'status_validacao': request.args.get('status_validacao', ''), # Default handled below
-        'tipo': request.args.get('tipo', ''),
-        'pago': request.args.get('pago', ''),
-        'search': request.args.get('search', '')
-    }
-    
-    # Default to "Inbox mode" if not searching specifically
-    # User Request: "na aba chamados deveria ser apenas ... pendente de ser validado"
-    # Show Pendente/Rejeitado by default. Hide Aprovado/Excluído.
-    view_mode = request.args.get('view', 'inbox')
-    
-    if not filters['status_validacao']:
-        if view_mode == 'all':
-            filters['status_validacao'] = [] # No filter
-        else:
-             filters['status_validacao'] = ['Pendente', 'Rejeitado']
+    filters = _chamados_filters()
     
     pagination = ChamadoService.get_all(filters, page=page, per_page=50) # 50 por página
     chamados_list = pagination.items
@@ -379,6 +374,8 @@ def chamados():
         tecnicos=tecnicos_list,
         tipos_servico=get_tipos_servico(),
         status_options=STATUS_CHAMADO,
+        status_validacao_options=STATUS_VALIDACAO,
+        status_validacao_filter=request.args.get('status_validacao', ''),
         tecnico_filter=filters['tecnico_id'],
         status_filter=filters['status'],
         tipo_filter=filters['tipo'],
@@ -387,6 +384,18 @@ def chamados():
         saved_views=saved_views
     )
 
+@operacional_bp.route('/api/facets/chamados')
+@login_required
+def facetas_chamados():
+    """Contagem por valor de filtro (mesma query string de /chamados)."""
+    return jsonify({'facets': FacetService.chamados(_chamados_filters())})
+
+@operacional_bp.route('/api/facets/tecnicos')
+@login_required
+def facetas_tecnicos():
+    """Contagem por valor de filtro (mesma query string de /tecnicos)."""
+    return jsonify({'facets': FacetService.tecnicos(_tecnicos_filters())})
+
 @operacional_bp.route('/api/views/save', methods=['POST'])
 @login_required
 def salvar_view():
@@ -437,8 +446,8 @@ def criar_chamado_multiplo_api():
 @login_required
 def criar_chamado():
     """Renders the new Master-Detail form for creating chamados"""
-    tecnicos = TecnicoService.get_all({'status': 'Ativo'}, page=None)
-    return render_template('chamado_form.html', tecnicos=tecnicos)
+    # Técnico via autocomplete remoto (/api/autocomplete/tecnicos)
+    return render_template('chamado_form.html')
 
 @operacional_bp.route('/chamados/novo', methods=['GET', 'POST'])
 @login_required
@@ -454,18 +463,14 @@ def novo_chamado():
             flash(f'Erro: {str(e)}', 'warning')
 
             # Repopulate form data for template
-            tecnicos = TecnicoService.get_all({'status': 'Ativo'}, page=None)
             return render_template('chamado_form.html',
                 chamado=request.form,  # Pass dictionary/ImmutableMultiDict directly
-                tecnicos=tecnicos,
                 tipos_servico=get_tipos_servico(),
                 status_options=STATUS_CHAMADO
             )
 
-    tecnicos = TecnicoService.get_all({'status': 'Ativo'}, page=None)
     return render_template('chamado_form.html',
         chamado=None,
-        tecnicos=tecnicos,
         tipos_servico=get_tipos_servico(),
         status_options=STATUS_CHAMADO
     )
@@ -485,10 +490,8 @@ def editar_chamado(id):
             db.session.rollback()
             flash(f'Erro ao atualizar chamado: {str(e)}', 'danger')
 
-    tecnicos = TecnicoService.get_all({'status': 'Ativo'}, page=None)
     return render_template('chamado_form.html',
         chamado=chamado,
-        tecnicos=tecnicos,
         tipos_servico=get_tipos_servico(),
         status_options=STATUS_CHAMADO
     )
@@ -562,9 +565,7 @@ def editar_chamado_rapido(id):
             changes['observacoes'] = {'from': chamado.observacoes[:50] if chamado.observacoes else None, 'to': data['observacoes'][:50] if data['observacoes'] else None}
             chamado.observacoes = data['observacoes']
         
-        db.session.commit()
-        
-        # Audit log
+        # Audit log (mesma transação da edição)
         if changes:
             AuditService.log_change(
                 model_name='Chamado',
@@ -573,6 +574,8 @@ def editar_chamado_rapido(id):
                 changes=str(changes)
             )
         
+        db.session.commit()
+        
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -840,7 +843,7 @@ def relatorio_fechamento():
         data_fim = datetime.strptime(data_fim_str, '%Y-%m-%d').date()
         
     # Dados para dropdowns
-    clientes = Cliente.query.filter_by(ativo=True).all()
+    clientes = ClienteService.get_ativos()
     
     report_data = None
     if cliente_id:
@@ -863,7 +866,10 @@ def relatorio_fechamento():
 @operacional_bp.route('/relatorios/fechamento/exportar')
 @login_required
 def exportar_fechamento():
-    """Exporta CSV do fechamento"""
+    """
+    Exporta fechamento em CSV ou XLSX (?formato=xlsx).
+    Com ?background=1 a exportação é enfileirada (ExportJobService).
+    """
     from datetime import datetime
     
     cliente_id = request.args.get('cliente')
@@ -878,37 +884,26 @@ def exportar_fechamento():
     data_inicio = datetime.strptime(data_inicio_str, '%Y-%m-%d').date()
     data_fim = datetime.strptime(data_fim_str, '%Y-%m-%d').date()
     
-    report_data = ChamadoService.get_relatorio_faturamento(
-        cliente_id, data_inicio, data_fim, estado
-    )
-    
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=';')
-    
-    # Header
-    writer.writerow(['Data', 'Código FSA', 'Cidade', 'Estado', 'Serviço', 'Valor Ticket'])
-    
-    # Rows
-    for item in report_data['itens']:
-        writer.writerow([
-            item['data'],
-            item['codigo'],
-            item['cidade'],
-            item['estado'],
-            item['servico'],
-            str(item['valor']).replace('.', ',')
-        ])
-        
-    # Footer
-    writer.writerow([])
-    writer.writerow(['', '', '', '', 'TOTAL GERAL', str(report_data['total_geral']).replace('.', ',')])
-    
-    filename = f"fechamento_contrato_{data_inicio_str}_{data_fim_str}.csv"
-    
-    return Response(
-        output.getvalue().encode('utf-8-sig'),
-        mimetype="text/csv",
-        headers={"Content-disposition": f"attachment; filename={filename}"}
+    if request.args.get('background') == '1':
+        from ..services.export_job_service import ExportJobService
+        try:
+            job = ExportJobService.enfileirar('fechamento_contrato', {
+                'cliente_id': cliente_id,
+                'inicio': data_inicio_str,
+                'fim': data_fim_str,
+                'estado': estado or ''
+            }, request.args.get('formato', 'csv'), current_user)
+            flash(ExportJobService.MENSAGEM_ENFILEIRADO.format(job_id=job.id), 'info')
+        except ValueError as e:
+            flash(str(e), 'warning')
+        return redirect(request.referrer or url_for('operacional.relatorio_fechamento'))
+
+    return ExportService.send(
+        ExportService.dataset_fechamento_contrato(cliente_id, data_inicio, data_fim, estado),
+        f"fechamento_contrato_{data_inicio_str}_{data_fim_str}",
+        formato=request.args.get('formato', 'csv'),
+        bom=True,
+        sheet_title='Fechamento'
     )
 
 
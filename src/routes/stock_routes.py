@@ -1,16 +1,24 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, Response
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
 from flask_login import login_required, current_user
-from ..models import db, ItemLPU, Tecnico, TecnicoStock, StockMovement, Chamado, SolicitacaoReposicao, Notification, ItemLPUPrecoHistorico
+from ..models import db, ItemLPU, TecnicoStock, SolicitacaoReposicao, Notification, ItemLPUPrecoHistorico
 from ..services.stock_service import StockService
-from ..services.tecnico_service import TecnicoService
+from ..services.stock_report_service import StockReportService
+from ..services.stock_matrix_service import StockMatrixService
+from ..services.stock_ledger_service import StockLedgerService
+from ..services.previsao_consumo_service import PrevisaoConsumoService
+from ..services.export_service import ExportService
+from ..services.reference_data_service import ReferenceDataService
+from ..services.autocomplete_service import AutocompleteService
+from ..services.search_service import SearchService
 from ..decorators import admin_required
 from sqlalchemy import func
 from datetime import datetime, timedelta
-import csv
-from io import StringIO
 
 stock_bp = Blueprint('stock', __name__)
 
+# Técnicos por página na matriz do controle de estoque
+MATRIZ_PAGE_SIZE = 50
+
 @stock_bp.route('/controle')
 @login_required
 @admin_required
@@ -26,75 +34,53 @@ def controle_estoque():
     filter_tecnico_id = request.args.get('tecnico_id', type=int)
     filter_item_id = request.args.get('item_id', type=int)
 
-    # 1. Query base para Itens (SEMPRE para dropdowns)
-    all_itens = ItemLPU.query.filter_by(cliente_id=None).order_by(ItemLPU.nome).all()
-    
-    # 2. Query base para Técnicos (SEMPRE para dropdowns)
-    all_tecnicos = TecnicoService.get_all({'status': 'Ativo'}, page=None)
+    # 1/2. Dropdowns de filtro: autocomplete remoto (/api/autocomplete/*);
+    # aqui só o rótulo da opção já selecionada
+    tecnico_filtro = AutocompleteService.tecnico_label(filter_tecnico_id)
+    item_filtro = AutocompleteService.item_label(filter_item_id)
 
-    # 3. Queries FILTRADAS para a tabela (usando SQLAlchemy ILIKE)
+    # 3. Colunas: itens globais filtrados (também alimentam catálogo/modais)
     itens_query = ItemLPU.query.filter_by(cliente_id=None)
-    tecnicos_query = Tecnico.query.filter_by(status='Ativo')
-    
-    # Aplicar busca via SQL (ILIKE) - PERFORMANCE FIX
-    if search:
-        search_pattern = f'%{search}%'
-        itens_query = itens_query.filter(ItemLPU.nome.ilike(search_pattern))
-        tecnicos_query = tecnicos_query.filter(
-            db.or_(
-                Tecnico.nome.ilike(search_pattern),
-                Tecnico.cidade.ilike(search_pattern)
-            )
-        )
+    item_match = SearchService.match_ids('item', search)
+    if item_match is not None:
+        itens_query = itens_query.filter(ItemLPU.id.in_(item_match))
 
     # Filtros específicos (dropdowns) - Sobreescrevem busca
     if filter_item_id:
         itens_query = ItemLPU.query.filter_by(id=filter_item_id, cliente_id=None)
-    
-    if filter_tecnico_id:
-        tecnicos_query = Tecnico.query.filter_by(id=filter_tecnico_id)
 
-    # Executar queries filtradas
     filtered_itens = itens_query.order_by(ItemLPU.nome).all()
-    filtered_tecnicos = tecnicos_query.order_by(Tecnico.nome).all()
+    item_ids = [i.id for i in filtered_itens]
+
+    # 4. Linhas: página de técnicos por cursor + células não-zero da página
+    # (StockMatrixService); totais do rodapé agregados no banco
+    try:
+        pagina = StockMatrixService.pagina(
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int) or MATRIZ_PAGE_SIZE,
+            item_ids=item_ids,
+            search=search,
+            tecnico_id=filter_tecnico_id
+        )
+    except ValueError:
+        return redirect(url_for('stock.controle_estoque', search=search or None,
+                                tecnico_id=filter_tecnico_id, item_id=filter_item_id))
 
-    # 4. Matriz de Estoque - Filtrar apenas técnicos/itens relevantes
-    # Se temos filtros ativos, limitar a query da matriz
-    matrix_query = TecnicoStock.query
-    
-    if filter_tecnico_id:
-        matrix_query = matrix_query.filter_by(tecnico_id=filter_tecnico_id)
-    
-    if filter_item_id:
-        matrix_query = matrix_query.filter_by(item_lpu_id=filter_item_id)
-    
-    # Se busca por texto, filtrar matriz pelos IDs encontrados
-    if search and not filter_tecnico_id and not filter_item_id:
-        tecnico_ids = [t.id for t in filtered_tecnicos]
-        item_ids = [i.id for i in filtered_itens]
-        if tecnico_ids or item_ids:
-            matrix_query = matrix_query.filter(
-                db.or_(
-                    TecnicoStock.tecnico_id.in_(tecnico_ids) if tecnico_ids else False,
-                    TecnicoStock.item_lpu_id.in_(item_ids) if item_ids else False
-                )
-            )
-    
-    stock_data = matrix_query.all()
     matrix = {}
-    for s in stock_data:
-        if s.tecnico_id not in matrix:
-            matrix[s.tecnico_id] = {}
-        matrix[s.tecnico_id][s.item_lpu_id] = s.quantidade
+    for row, col, qtd in pagina['cells']:
+        matrix.setdefault(pagina['rows'][row]['id'], {})[pagina['columns'][col]['id']] = qtd
+    totais = StockMatrixService.totais_por_item(item_ids, search, filter_tecnico_id) if item_ids else {}
 
     # 5. Contagem de solicitações pendentes
     pendentes_reposicao = SolicitacaoReposicao.query.filter_by(status='Pendente').count()
 
     return render_template('stock_control.html',
         itens=filtered_itens,           # Colunas da Tabela (Filtradas via SQL)
-        tecnicos=filtered_tecnicos,     # Linhas da Tabela (Filtradas via SQL)
-        all_itens=all_itens,            # Para o Dropdown
-        all_tecnicos=all_tecnicos,      # Para o Dropdown
+        tecnicos=pagina['rows'],        # Linhas da Tabela (página atual)
+        next_cursor=pagina['next_cursor'],
+        totais=totais,
+        tecnico_filtro=tecnico_filtro,  # Opção selecionada (autocomplete)
+        item_filtro=item_filtro,        # Opção selecionada (autocomplete)
         matrix=matrix,
         pendentes_reposicao=pendentes_reposicao
     )
@@ -146,6 +132,124 @@ def movimentar_estoque():
 
     return redirect(url_for('stock.controle_estoque'))
 
+@stock_bp.route('/api/movimentar-lote', methods=['POST'])
+@login_required
+@admin_required
+def movimentar_estoque_lote():
+    """
+    API: várias movimentações (ENVIO, DEVOLUCAO, TRANSFERENCIA) em uma
+    transação. Body: {'linhas': [...], 'observacao': str}.
+    Ver StockService.movimentar_lote.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        resultado = StockService.movimentar_lote(
+            data.get('linhas') or [], current_user.id, data.get('observacao')
+        )
+        db.session.commit()
+        return jsonify({'status': 'success', **resultado})
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@stock_bp.route('/api/matriz')
+@login_required
+@admin_required
+def api_matriz_estoque():
+    """
+    API: página da matriz técnico x item em codificação esparsa.
+
+    Query: cursor, limit, item_ids (ex: 3,7,12), search, tecnico_id.
+    Ver StockMatrixService.pagina.
+    """
+    try:
+        return jsonify(StockMatrixService.pagina(
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int),
+            item_ids=StockMatrixService.parse_item_ids(request.args.get('item_ids')),
+            search=request.args.get('search', '').strip(),
+            tecnico_id=request.args.get('tecnico_id', type=int)
+        ))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@stock_bp.route('/api/saldo-em')
+@login_required
+@admin_required
+def api_saldo_em():
+    """
+    API: saldos por técnico/item ao final de uma data passada.
+
+    Query: data (YYYY-MM-DD, obrigatório), tecnico_id, item_id.
+    Ver StockLedgerService.saldo_em (checkpoint mensal + movimentos).
+    """
+    try:
+        data = datetime.strptime(request.args.get('data', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Parâmetro data obrigatório (YYYY-MM-DD)'}), 400
+    return jsonify(StockLedgerService.saldo_em(
+        data,
+        tecnico_id=request.args.get('tecnico_id', type=int),
+        item_id=request.args.get('item_id', type=int)
+    ))
+
+@stock_bp.route('/api/reconciliacao', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def api_reconciliacao():
+    """
+    API: divergências entre TecnicoStock e o livro de movimentações.
+
+    GET apenas reporta; POST corrige o livro com movimentos AJUSTE.
+    Ver StockLedgerService.reconciliar.
+    """
+    reparar = request.method == 'POST'
+    try:
+        resultado = StockLedgerService.reconciliar(reparar=reparar, user_id=current_user.id)
+        if reparar:
+            db.session.commit()
+        return jsonify(resultado)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@stock_bp.route('/api/previsao-consumo')
+@login_required
+@admin_required
+def api_previsao_consumo():
+    """
+    API: taxa de consumo, dias de cobertura e reposição sugerida por
+    técnico/item (menor cobertura primeiro).
+
+    Query: limite (default 50), todos=1 inclui pares sem sugestão.
+    """
+    limite = max(1, min(request.args.get('limite', 50, type=int), 500))
+    return jsonify(PrevisaoConsumoService.sugestoes(
+        limite=limite,
+        apenas_com_sugestao=request.args.get('todos') != '1'
+    ))
+
+@stock_bp.route('/previsao-consumo/solicitar', methods=['POST'])
+@login_required
+@admin_required
+def solicitar_reposicao_sugerida():
+    """Cria solicitações de reposição pré-preenchidas com as sugestões marcadas."""
+    try:
+        criadas = PrevisaoConsumoService.criar_solicitacoes(
+            request.form.getlist('previsao_ids', type=int), current_user.id
+        )
+        db.session.commit()
+        flash(f'{len(criadas)} solicitação(ões) de reposição criada(s).', 'success')
+    except ValueError as e:
+        flash(str(e), 'warning')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Erro ao criar solicitações: {str(e)}', 'danger')
+    return redirect(request.referrer or url_for('stock.relatorio_materiais'))
+
 # --- NOVAS ROTAS DE GESTÃO DE CATÁLOGO ---
 
 @stock_bp.route('/item/adicionar', methods=['POST'])
@@ -255,9 +359,8 @@ def get_item(item_id):
 @stock_bp.route('/api/itens')
 @login_required
 def get_itens():
-    """API: Lista todos os itens com custos."""
-    itens = ItemLPU.query.filter_by(cliente_id=None).order_by(ItemLPU.nome).all()
-    return jsonify([item.to_dict() for item in itens])
+    """API: Lista todos os itens com custos (snapshot com ETag)."""
+    return ReferenceDataService.response('itens_estoque')
 
 
 @stock_bp.route('/api/item/<int:item_id>/historico-precos')
@@ -377,7 +480,8 @@ def relatorio_materiais():
         estoque_rua=report['estoque_rua'],
         valor_estoque_rua=report['valor_estoque_rua'],
         movimentacoes_recentes=report['movimentacoes_recentes'],
-        alertas_estoque=report['alertas_estoque']
+        alertas_estoque=report['alertas_estoque'],
+        reposicao_sugerida=PrevisaoConsumoService.sugestoes(limite=20)
     )
 
 
@@ -389,42 +493,83 @@ def relatorio_materiais():
 @login_required
 @admin_required
 def exportar_estoque():
-    """Exporta posição atual do estoque em CSV."""
-    output = StringIO()
-    writer = csv.writer(output, delimiter=';')
-
-    # Header
-    writer.writerow([
-        'Técnico', 'Cidade', 'Estado', 'Peça', 'Quantidade',
-        'Custo Unitário', 'Valor Total', 'Última Atualização'
-    ])
-
-    # Data
-    estoques = TecnicoStock.query.filter(
-        TecnicoStock.quantidade > 0
-    ).order_by(TecnicoStock.tecnico_id).all()
-
-    for est in estoques:
-        custo = float(est.item_lpu.valor_custo or 0) if est.item_lpu else 0
-        writer.writerow([
-            est.tecnico.nome if est.tecnico else 'N/A',
-            est.tecnico.cidade if est.tecnico else '',
-            est.tecnico.estado if est.tecnico else '',
-            est.item_lpu.nome if est.item_lpu else 'N/A',
-            est.quantidade,
-            f'{custo:.2f}',
-            f'{custo * est.quantidade:.2f}',
-            est.data_atualizacao.strftime('%d/%m/%Y %H:%M') if est.data_atualizacao else ''
-        ])
-
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={
-            'Content-Disposition': f'attachment; filename=estoque_{datetime.now().strftime("%Y%m%d")}.csv',
-            'Content-Type': 'text/csv; charset=utf-8'
-        }
+    """Exporta posição atual do estoque em CSV ou XLSX (?formato=xlsx)."""
+    return ExportService.send(
+        ExportService.dataset_estoque(),
+        f'estoque_{datetime.now().strftime("%Y%m%d")}',
+        formato=request.args.get('formato', 'csv'),
+        sheet_title='Estoque'
+    )
+
+
+@stock_bp.route('/exportar/matriz')
+@login_required
+@admin_required
+def exportar_matriz_estoque():
+    """
+    Exporta a matriz técnico x item completa (pivot) em CSV ou XLSX.
+    Mesmos filtros da API (item_ids, search, tecnico_id); ?background=1
+    enfileira a exportação (ExportJobService).
+    """
+    try:
+        item_ids = StockMatrixService.parse_item_ids(request.args.get('item_ids'))
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(request.referrer or url_for('stock.controle_estoque'))
+    search = request.args.get('search', '').strip()
+    tecnico_id = request.args.get('tecnico_id', type=int)
+
+    if request.args.get('background') == '1':
+        from ..services.export_job_service import ExportJobService
+        try:
+            job = ExportJobService.enfileirar('matriz_estoque', {
+                'item_ids': item_ids, 'search': search, 'tecnico_id': tecnico_id
+            }, request.args.get('formato', 'csv'), current_user)
+            flash(ExportJobService.MENSAGEM_ENFILEIRADO.format(job_id=job.id), 'info')
+        except ValueError as e:
+            flash(str(e), 'warning')
+        return redirect(request.referrer or url_for('stock.controle_estoque'))
+
+    return ExportService.send(
+        ExportService.dataset_matriz_estoque(item_ids, search, tecnico_id),
+        f'matriz_estoque_{datetime.now().strftime("%Y%m%d")}',
+        formato=request.args.get('formato', 'csv'),
+        sheet_title='Matriz de Estoque'
+    )
+
+
+@stock_bp.route('/exportar/saldo-em')
+@login_required
+@admin_required
+def exportar_saldo_em():
+    """
+    Exporta os saldos ao final de uma data (?data=YYYY-MM-DD) em CSV ou XLSX.
+    Filtros opcionais: tecnico_id, item_id. ?background=1 enfileira.
+    """
+    try:
+        data = datetime.strptime(request.args.get('data', ''), '%Y-%m-%d').date()
+    except ValueError:
+        flash('Informe a data do saldo (AAAA-MM-DD).', 'danger')
+        return redirect(request.referrer or url_for('stock.relatorio_materiais'))
+    tecnico_id = request.args.get('tecnico_id', type=int)
+    item_id = request.args.get('item_id', type=int)
+
+    if request.args.get('background') == '1':
+        from ..services.export_job_service import ExportJobService
+        try:
+            job = ExportJobService.enfileirar('saldo_em', {
+                'data': data.strftime('%Y-%m-%d'), 'tecnico_id': tecnico_id, 'item_id': item_id
+            }, request.args.get('formato', 'csv'), current_user)
+            flash(ExportJobService.MENSAGEM_ENFILEIRADO.format(job_id=job.id), 'info')
+        except ValueError as e:
+            flash(str(e), 'warning')
+        return redirect(request.referrer or url_for('stock.relatorio_materiais'))
+
+    return ExportService.send(
+        ExportService.dataset_saldo_em(data, tecnico_id, item_id),
+        f'saldo_estoque_{data.strftime("%Y%m%d")}',
+        formato=request.args.get('formato', 'csv'),
+        sheet_title='Saldo em Data'
     )
 
 
@@ -432,7 +577,10 @@ def exportar_estoque():
 @login_required
 @admin_required
 def exportar_movimentacoes():
-    """Exporta histórico de movimentações em CSV."""
+    """
+    Exporta histórico de movimentações em CSV ou XLSX (?formato=xlsx).
+    Com ?background=1 a exportação é enfileirada (ExportJobService).
+    """
     # Período
     data_fim = datetime.now().date()
     data_inicio = data_fim - timedelta(days=30)
@@ -442,43 +590,23 @@ def exportar_movimentacoes():
     if request.args.get('data_fim'):
         data_fim = datetime.strptime(request.args.get('data_fim'), '%Y-%m-%d').date()
 
-    output = StringIO()
-    writer = csv.writer(output, delimiter=';')
-
-    # Header
-    writer.writerow([
-        'Data', 'Tipo', 'Peça', 'Quantidade', 'Custo Unitário',
-        'Técnico Origem', 'Técnico Destino', 'Chamado', 'Observação'
-    ])
-
-    # Data
-    movs = StockMovement.query.filter(
-        func.date(StockMovement.data_criacao) >= data_inicio,
-        func.date(StockMovement.data_criacao) <= data_fim
-    ).order_by(StockMovement.data_criacao.desc()).all()
-
-    for mov in movs:
-        custo = float(mov.item_lpu.valor_custo or 0) if mov.item_lpu else 0
-        writer.writerow([
-            mov.data_criacao.strftime('%d/%m/%Y %H:%M') if mov.data_criacao else '',
-            mov.tipo_movimento,
-            mov.item_lpu.nome if mov.item_lpu else 'N/A',
-            mov.quantidade,
-            f'{custo:.2f}',
-            mov.origem_tecnico.nome if mov.origem_tecnico else 'Almoxarifado',
-            mov.destino_tecnico.nome if mov.destino_tecnico else 'Almoxarifado',
-            mov.chamado_id or '',
-            mov.observacao or ''
-        ])
-
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={
-            'Content-Disposition': f'attachment; filename=movimentacoes_{data_inicio.strftime("%Y%m%d")}_{data_fim.strftime("%Y%m%d")}.csv',
-            'Content-Type': 'text/csv; charset=utf-8'
-        }
+    if request.args.get('background') == '1':
+        from ..services.export_job_service import ExportJobService
+        try:
+            job = ExportJobService.enfileirar('movimentacoes', {
+                'data_inicio': data_inicio.strftime('%Y-%m-%d'),
+                'data_fim': data_fim.strftime('%Y-%m-%d')
+            }, request.args.get('formato', 'csv'), current_user)
+            flash(ExportJobService.MENSAGEM_ENFILEIRADO.format(job_id=job.id), 'info')
+        except ValueError as e:
+            flash(str(e), 'warning')
+        return redirect(request.referrer or url_for('stock.relatorio_materiais'))
+
+    return ExportService.send(
+        ExportService.dataset_movimentacoes(data_inicio, data_fim),
+        f'movimentacoes_{data_inicio.strftime("%Y%m%d")}_{data_fim.strftime("%Y%m%d")}',
+        formato=request.args.get('formato', 'csv'),
+        sheet_title='Movimentações'
     )
 
 
@@ -486,7 +614,7 @@ def exportar_movimentacoes():
 @login_required
 @admin_required
 def exportar_custos_chamados():
-    """Exporta custos de peças por chamado em CSV."""
+    """Exporta custos de peças por chamado em CSV ou XLSX (?formato=xlsx)."""
     # Período
     data_fim = datetime.now().date()
     data_inicio = data_fim - timedelta(days=30)
@@ -496,47 +624,11 @@ def exportar_custos_chamados():
     if request.args.get('data_fim'):
         data_fim = datetime.strptime(request.args.get('data_fim'), '%Y-%m-%d').date()
 
-    output = StringIO()
-    writer = csv.writer(output, delimiter=';')
-
-    # Header
-    writer.writerow([
-        'Data', 'Código Chamado', 'Técnico', 'Cidade',
-        'Peça Usada', 'Fornecedor', 'Custo Peça',
-        'Custo Serviço', 'Custo Total'
-    ])
-
-    # Data - chamados com peça
-    chamados = Chamado.query.filter(
-        Chamado.data_atendimento >= data_inicio,
-        Chamado.data_atendimento <= data_fim,
-        Chamado.peca_usada.isnot(None),
-        Chamado.peca_usada != ''
-    ).order_by(Chamado.data_atendimento.desc()).all()
-
-    for c in chamados:
-        custo_peca = float(c.custo_peca or 0)
-        custo_servico = float(c.custo_atribuido or 0)
-        writer.writerow([
-            c.data_atendimento.strftime('%d/%m/%Y') if c.data_atendimento else '',
-            c.codigo_chamado or f'ID-{c.id}',
-            c.tecnico.nome if c.tecnico else 'N/A',
-            c.cidade or '',
-            c.peca_usada,
-            c.fornecedor_peca or 'Empresa',
-            f'{custo_peca:.2f}',
-            f'{custo_servico:.2f}',
-            f'{custo_peca + custo_servico:.2f}'
-        ])
-
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={
-            'Content-Disposition': f'attachment; filename=custos_pecas_{data_inicio.strftime("%Y%m%d")}_{data_fim.strftime("%Y%m%d")}.csv',
-            'Content-Type': 'text/csv; charset=utf-8'
-        }
+    return ExportService.send(
+        ExportService.dataset_custos_chamados(data_inicio, data_fim),
+        f'custos_pecas_{data_inicio.strftime("%Y%m%d")}_{data_fim.strftime("%Y%m%d")}',
+        formato=request.args.get('formato', 'csv'),
+        sheet_title='Custos por Chamado'
     )
 
 
@@ -652,6 +744,32 @@ def aprovar_solicitacao(id):
     return redirect(url_for('stock.listar_solicitacoes'))
 
 
+@stock_bp.route('/solicitacoes/aprovar-lote', methods=['POST'])
+@login_required
+@admin_required
+def aprovar_solicitacoes_lote():
+    """Aprova e envia as solicitações marcadas (ENVIOs agrupados por técnico/item)."""
+    try:
+        resultado = StockService.aprovar_solicitacoes_lote(
+            request.form.getlist('solicitacao_ids', type=int),
+            current_user.id,
+            resposta=request.form.get('resposta') or None
+        )
+        db.session.commit()
+        flash(f"{len(resultado['aprovadas'])} solicitação(ões) aprovada(s) em "
+              f"{resultado['movimentos']} envio(s).", 'success')
+        if resultado['ignoradas']:
+            flash(f"{len(resultado['ignoradas'])} solicitação(ões) já processada(s) ignorada(s).", 'warning')
+    except ValueError as e:
+        db.session.rollback()
+        flash(str(e), 'warning')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Erro: {str(e)}', 'danger')
+
+    return redirect(url_for('stock.listar_solicitacoes'))
+
+
 @stock_bp.route('/solicitacao/<int:id>/recusar', methods=['POST'])
 @login_required
 @admin_required
@@ -725,41 +843,4 @@ def api_dashboard_kpis():
     API: KPIs simplificados para cards do dashboard.
     Retorna apenas os 4 indicadores principais.
     """
-    from datetime import timedelta
-
-    hoje = datetime.now().date()
-    inicio_mes = hoje.replace(day=1)
-
-    # KPI 1: Peças em campo
-    pecas_campo = db.session.query(
-        func.sum(TecnicoStock.quantidade)
-    ).filter(TecnicoStock.quantidade > 0).scalar() or 0
-
-    # KPI 2: Valor imobilizado
-    valor_imobilizado = db.session.query(
-        func.sum(TecnicoStock.quantidade * ItemLPU.valor_custo)
-    ).join(ItemLPU, TecnicoStock.item_lpu_id == ItemLPU.id).filter(
-        TecnicoStock.quantidade > 0
-    ).scalar() or 0
-
-    # KPI 3: Custo do mês
-    custo_mes = db.session.query(
-        func.sum(Chamado.custo_peca)
-    ).filter(
-        Chamado.data_atendimento >= inicio_mes,
-        Chamado.custo_peca > 0
-    ).scalar() or 0
-
-    # KPI 4: Alertas pendentes
-    alertas = SolicitacaoReposicao.query.filter_by(status='Pendente').count()
-    alertas += TecnicoStock.query.filter(
-        TecnicoStock.quantidade <= 1,
-        TecnicoStock.quantidade > 0
-    ).count()
-
-    return jsonify({
-        'pecas_em_campo': pecas_campo,
-        'valor_imobilizado': float(valor_imobilizado),
-        'custo_mes': float(custo_mes),
-        'alertas_pendentes': alertas
-    })
+    return jsonify(StockReportService.get_dashboard_kpis())
@@ -0,0 +1,178 @@
+"""
+AlertaEstoqueService - Alertas de estoque baixo fora do caminho de escrita.
+
+Antes, cada baixa de estoque (dentro da transação com row-lock) relia o
+saldo, carregava item/técnico, buscava os admins e fazia um LIKE em
+notifications.title por admin para deduplicar. Agora:
+
+    1. StockService.verificar_estoque_baixo apenas ENFILEIRA a chave
+       (tecnico_id, item_id, limite) em session.info - sem SQL.
+    2. after_commit: as chaves vão para a fila do processo (descartadas no
+       rollback, inclusive de SAVEPOINT: alerta só para baixa efetivada).
+    3. Um worker (executor global) drena a fila em lote: um SELECT com
+       tuple IN dos saldos <= limite, admins buscados uma vez e um INSERT
+       multi-linha com ON CONFLICT DO NOTHING no índice único parcial
+       uq_notifications_dedup_pendente (user_id, dedup_key WHERE não lida).
+
+Rajadas de commits coalescem: enquanto há um processamento agendado, novas
+chaves entram no mesmo conjunto. ESTOQUE_ALERTAS_ASYNC=False processa no
+próprio after_commit (testes/scripts).
+
+Como o processamento roda após o commit (e em outra thread), usa conexão
+própria do engine (Core), nunca a sessão do request.
+"""
+import logging
+import threading
+from collections import defaultdict
+from typing import Iterable, Set, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..models import db, Tecnico, ItemLPU, TecnicoStock, User, Notification
+from ..utils.session_buffer import SessionBuffer
+
+
+logger = logging.getLogger(__name__)
+
+# Alertas da transação corrente (session.info['estoque_alertas'])
+_alertas = SessionBuffer('estoque_alertas')
+LIMITE_PADRAO = 2
+BATCH_SIZE = 500
+
+Chave = Tuple[int, int, int]  # (tecnico_id, item_id, limite)
+
+_pendentes: Set[Chave] = set()
+_agendado = False
+_lock = threading.Lock()
+
+
+def dedup_key(tecnico_id: int, item_id: int) -> str:
+    return f"estoque_baixo:{tecnico_id}:{item_id}"
+
+
+class AlertaEstoqueService:
+
+    @staticmethod
+    def enfileirar(tecnico_id: int, item_id: int, limite: int = LIMITE_PADRAO):
+        """Registra a verificação para após o commit da sessão corrente."""
+        _alertas.add(db.session(), (int(tecnico_id), int(item_id), int(limite)))
+
+    @staticmethod
+    def _despachar(chaves: Iterable[Chave]):
+        global _agendado
+        with _lock:
+            _pendentes.update(chaves)
+            if _agendado:
+                return
+            _agendado = True
+
+        try:
+            if current_app.config.get('ESTOQUE_ALERTAS_ASYNC', True):
+                from src import executor
+                executor.submit(AlertaEstoqueService.processar_pendentes)
+            else:
+                AlertaEstoqueService.processar_pendentes()
+        except Exception:
+            with _lock:
+                _agendado = False
+            logger.exception("[ALERTA ESTOQUE] Falha ao agendar processamento")
+
+    @staticmethod
+    def processar_pendentes() -> int:
+        """Drena a fila do processo. Retorna notificações criadas."""
+        global _agendado
+        criadas = 0
+        while True:
+            with _lock:
+                if not _pendentes:
+                    _agendado = False
+                    return criadas
+                lote = set(_pendentes)
+                _pendentes.clear()
+            try:
+                criadas += AlertaEstoqueService.processar(lote)
+            except Exception:
+                logger.exception("[ALERTA ESTOQUE] Falha ao processar %d chave(s)", len(lote))
+
+    @staticmethod
+    def processar(chaves: Iterable[Chave]) -> int:
+        """
+        Cria as notificações de estoque baixo das chaves informadas.
+
+        Idempotente: admins que já têm alerta não lido para o par
+        (técnico, item) não recebem outro (ON CONFLICT DO NOTHING).
+
+        Returns:
+            int: notificações inseridas
+        """
+        por_limite = defaultdict(list)
+        for tecnico_id, item_id, limite in set(chaves):
+            por_limite[limite].append((tecnico_id, item_id))
+        if not por_limite:
+            return 0
+
+        insert = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+        criadas = 0
+        with db.engine.begin() as conn:
+            baixos = []
+            for limite, pares in por_limite.items():
+                for i in range(0, len(pares), BATCH_SIZE):
+                    baixos.extend(conn.execute(
+                        select(
+                            TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id,
+                            TecnicoStock.quantidade, Tecnico.nome, ItemLPU.nome.label('item_nome')
+                        )
+                        .join(Tecnico, Tecnico.id == TecnicoStock.tecnico_id)
+                        .join(ItemLPU, ItemLPU.id == TecnicoStock.item_lpu_id)
+                        .where(
+                            tuple_(TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id).in_(pares[i:i + BATCH_SIZE]),
+                            TecnicoStock.quantidade <= limite
+                        )
+                    ).all())
+            if not baixos:
+                return 0
+
+            admin_ids = conn.execute(select(User.id).where(User.role == 'Admin')).scalars().all()
+            valores = [
+                {
+                    'user_id': admin_id,
+                    'title': f"Estoque Baixo: {r.item_nome}",
+                    'message': f"O técnico {r.nome} possui apenas {r.quantidade} "
+                               f"unidade(s) de '{r.item_nome}' em estoque.\n\n"
+                               f"Considere enviar reposição.",
+                    'notification_type': 'warning',
+                    'dedup_key': dedup_key(r.tecnico_id, r.item_lpu_id),
+                }
+                for r in baixos for admin_id in admin_ids
+            ]
+            for i in range(0, len(valores), BATCH_SIZE):
+                result = conn.execute(
+                    insert(Notification.__table__).values(valores[i:i + BATCH_SIZE]).on_conflict_do_nothing(
+                        index_elements=['user_id', 'dedup_key'],
+                        index_where=Notification.dedup_pendente_condition()
+                    )
+                )
+                criadas += max(result.rowcount or 0, 0)
+
+        if criadas:
+            logger.info("[ALERTA ESTOQUE] %d notificação(ões) criada(s)", criadas)
+        return criadas
+
+
+# =============================================================================
+# EVENTOS DA SESSION (fila por transação -> fila do processo no commit)
+# =============================================================================
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    chaves = set(_alertas.pop(session))
+    if not chaves:
+        return
+    if not has_app_context():
+        logger.warning("[ALERTA ESTOQUE] Commit fora de app context: %d alerta(s) descartado(s)", len(chaves))
+        return
+    AlertaEstoqueService._despachar(chaves)
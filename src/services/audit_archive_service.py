@@ -0,0 +1,353 @@
+"""
+AuditArchiveService - Arquivamento mensal de audit_logs e busca unificada
+(tabela + arquivo) para o visualizador de auditoria.
+
+Arquivamento (scripts/arquivar_auditoria.py, mensal):
+    meses anteriores a AUDIT_RETENCAO_MESES saem da tabela para arquivos
+    JSONL comprimidos em AUDIT_ARCHIVE_DIR (default <instance>/audit_archive):
+
+        audit_<AAAA-MM>_<menor id>-<maior id>.jsonl.gz
+
+    As linhas são gravadas em (timestamp, id) decrescente, a ordem da busca.
+    O arquivo é gravado (tmp + rename) antes do DELETE das mesmas linhas;
+    se o job cair entre os dois passos, a reexecução regrava o mesmo nome
+    (mesma faixa de ids) sem duplicar.
+
+Busca (admin_routes.auditoria):
+    paginação por cursor em (timestamp, id) decrescente, sem OFFSET. A
+    tabela viva é lida primeiro (índices ix_audit_logs_*); quando ela se
+    esgota a página continua nos arquivos, mês a mês, com os mesmos filtros.
+    Os meses fora de data_inicio/data_fim não são abertos e a leitura
+    (merge dos arquivos do mês, já ordenados) para ao completar a página.
+    Registros sem timestamp nunca são arquivados e vêm por último, por id.
+"""
+import base64
+import binascii
+import gzip
+import heapq
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, delete, func, or_, select
+
+from ..models import db, AuditLog, JobRun, User
+
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'audit_archive'
+DEFAULT_RETENCAO_MESES = 12
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+YIELD_PER = 1000
+
+_ARQUIVO_RE = re.compile(r'^audit_(\d{4})-(\d{2})_(\d+)-(\d+)\.jsonl\.gz$')
+
+
+def _mes_seguinte(inicio: datetime) -> datetime:
+    return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class AuditArchiveService:
+
+    # =========================================================================
+    # ARQUIVOS
+    # =========================================================================
+
+    @staticmethod
+    def arquivo_dir() -> str:
+        return (current_app.config.get('AUDIT_ARCHIVE_DIR')
+                or os.path.join(current_app.instance_path, 'audit_archive'))
+
+    @staticmethod
+    def arquivos_por_mes() -> Dict[str, List[str]]:
+        """{'AAAA-MM': [caminhos]} dos arquivos existentes."""
+        pasta = AuditArchiveService.arquivo_dir()
+        if not os.path.isdir(pasta):
+            return {}
+        meses: Dict[str, List[str]] = {}
+        for nome in sorted(os.listdir(pasta)):
+            m = _ARQUIVO_RE.match(nome)
+            if m:
+                meses.setdefault(f"{m.group(1)}-{m.group(2)}", []).append(os.path.join(pasta, nome))
+        return meses
+
+    @staticmethod
+    def _linha(log) -> Dict:
+        return {
+            'id': log.id,
+            'user_id': log.user_id,
+            'model_name': log.model_name,
+            'object_id': log.object_id,
+            'action': log.action,
+            'changes': log.changes,
+            'timestamp': log.timestamp.isoformat() if log.timestamp else None,
+        }
+
+    # =========================================================================
+    # ARQUIVAMENTO
+    # =========================================================================
+
+    @staticmethod
+    def corte(hoje: Optional[date] = None, meses: Optional[int] = None) -> datetime:
+        """1º dia do mês mais antigo mantido na tabela."""
+        hoje = hoje or date.today()
+        if meses is None:
+            meses = int(current_app.config.get('AUDIT_RETENCAO_MESES', DEFAULT_RETENCAO_MESES))
+        total = hoje.year * 12 + (hoje.month - 1) - meses
+        return datetime(total // 12, total % 12 + 1, 1)
+
+    @staticmethod
+    def arquivar_mes(inicio: datetime, fim: datetime) -> Dict:
+        """
+        Move os registros com timestamp em [inicio, fim) para um arquivo.
+
+        Returns:
+            {'mes', 'arquivo', 'registros'}
+        """
+        pasta = AuditArchiveService.arquivo_dir()
+        os.makedirs(pasta, exist_ok=True)
+        tmp = os.path.join(pasta, f".audit_{inicio:%Y-%m}.tmp")
+
+        periodo = and_(AuditLog.timestamp >= inicio, AuditLog.timestamp < fim)
+        primeiro = ultimo = None
+        registros = 0
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            # Mesma ordem da busca: _arquivados lê o arquivo sem reordenar
+            for log in db.session.execute(
+                select(AuditLog).where(periodo)
+                .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc())
+                .execution_options(yield_per=YIELD_PER)
+            ).scalars():
+                f.write(json.dumps(AuditArchiveService._linha(log), ensure_ascii=False) + '\n')
+                primeiro = log.id if primeiro is None else min(primeiro, log.id)
+                ultimo = log.id if ultimo is None else max(ultimo, log.id)
+                registros += 1
+
+        if not registros:
+            os.remove(tmp)
+            return {'mes': f"{inicio:%Y-%m}", 'arquivo': None, 'registros': 0}
+
+        destino = os.path.join(pasta, f"audit_{inicio:%Y-%m}_{primeiro:012d}-{ultimo:012d}.jsonl.gz")
+        os.replace(tmp, destino)
+
+        db.session.execute(
+            delete(AuditLog).where(periodo, AuditLog.id.between(primeiro, ultimo))
+            .execution_options(synchronize_session=False)
+        )
+        # db.session.commit() # Caller deve commitar
+        return {'mes': f"{inicio:%Y-%m}", 'arquivo': os.path.basename(destino), 'registros': registros}
+
+    @staticmethod
+    def arquivar(hoje: Optional[date] = None, meses: Optional[int] = None) -> List[Dict]:
+        """
+        Arquiva todos os meses anteriores ao corte, um commit por mês.
+
+        WARNING: commita a cada mês arquivado (arquivo já gravado em disco).
+        """
+        corte = AuditArchiveService.corte(hoje, meses)
+        resultado = []
+        while True:
+            mais_antigo = db.session.query(func.min(AuditLog.timestamp)).filter(
+                AuditLog.timestamp < corte
+            ).scalar()
+            if mais_antigo is None:
+                break
+            inicio = datetime(mais_antigo.year, mais_antigo.month, 1)
+            mes = AuditArchiveService.arquivar_mes(inicio, min(_mes_seguinte(inicio), corte))
+            db.session.commit()
+            resultado.append(mes)
+            logger.info("[AUDIT ARCHIVE] %s: %s registro(s) -> %s", mes['mes'], mes['registros'], mes['arquivo'])
+        return resultado
+
+    @staticmethod
+    def executar_job(hoje: Optional[date] = None, meses: Optional[int] = None) -> JobRun:
+        """
+        Executa arquivar() registrando um JobRun ('audit_archive').
+
+        WARNING: JOB BOUNDARY - commita o resultado e o JobRun.
+        """
+        job = JobRun(job_name=JOB_NAME, status='RUNNING')
+        db.session.add(job)
+        db.session.commit()
+
+        try:
+            arquivados = AuditArchiveService.arquivar(hoje, meses)
+            job.status = 'COMPLETED'
+            job.total_items = sum(m['registros'] for m in arquivados)
+            job.success_count = len(arquivados)
+            job.log_text = json.dumps(arquivados)
+            job.end_time = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("[AUDIT ARCHIVE] Falha no job #%s", job.id)
+            job.status = 'FAILED'
+            job.log_text = str(e)
+            job.end_time = datetime.utcnow()
+            db.session.commit()
+            raise
+
+        return job
+
+    # =========================================================================
+    # BUSCA (tabela + arquivo)
+    # =========================================================================
+
+    @staticmethod
+    def encode_cursor(timestamp: Optional[datetime], log_id: int) -> str:
+        raw = json.dumps([timestamp.isoformat() if timestamp else None, log_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Raises ValueError se o cursor for inválido."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            timestamp, log_id = json.loads(raw.decode('utf-8'))
+            return (datetime.fromisoformat(timestamp) if timestamp is not None else None), int(log_id)
+        except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+            raise ValueError("Cursor inválido")
+
+    @staticmethod
+    def _ler_arquivo(caminho: str) -> Iterator[Dict]:
+        """Linhas de um arquivo, na ordem gravada ((timestamp, id) decrescente)."""
+        with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+            for texto in f:
+                linha = json.loads(texto)
+                linha['timestamp'] = datetime.fromisoformat(linha['timestamp'])
+                linha['arquivado'] = True
+                yield linha
+
+    @staticmethod
+    def _arquivados(filtros: Dict, antes: Optional[tuple]) -> Iterator[Dict]:
+        """Registros arquivados filtrados, em (timestamp, id) decrescente (lazy)."""
+        if antes and antes[0] is None:
+            return  # cursor já nos registros sem timestamp
+        inicio, fim = filtros.get('data_inicio'), filtros.get('data_fim')
+        for mes, caminhos in sorted(AuditArchiveService.arquivos_por_mes().items(), reverse=True):
+            primeiro_dia = datetime.strptime(mes, '%Y-%m').date()
+            if inicio and _mes_seguinte(datetime.combine(primeiro_dia, datetime.min.time())).date() <= inicio:
+                break
+            if (fim and primeiro_dia > fim) or (antes and primeiro_dia > antes[0].date()):
+                continue
+
+            linhas = heapq.merge(
+                *(AuditArchiveService._ler_arquivo(c) for c in caminhos),
+                key=lambda l: (l['timestamp'], l['id']), reverse=True
+            )
+            for linha in linhas:
+                if AuditArchiveService._aceita(linha, filtros, antes):
+                    yield linha
+
+    @staticmethod
+    def _aceita(linha: Dict, filtros: Dict, antes: Optional[tuple]) -> bool:
+        if filtros.get('user_id') and linha['user_id'] != filtros['user_id']:
+            return False
+        if filtros.get('model_name') and linha['model_name'] != filtros['model_name']:
+            return False
+        if filtros.get('object_id') and linha['object_id'] != filtros['object_id']:
+            return False
+        dia = linha['timestamp'].date()
+        if filtros.get('data_inicio') and dia < filtros['data_inicio']:
+            return False
+        if filtros.get('data_fim') and dia > filtros['data_fim']:
+            return False
+        return antes is None or (linha['timestamp'], linha['id']) < antes
+
+    @staticmethod
+    def buscar(user_id: Optional[int] = None, model_name: Optional[str] = None,
+               object_id: Optional[str] = None, data_inicio: Optional[date] = None,
+               data_fim: Optional[date] = None, cursor: Optional[str] = None,
+               limit: int = DEFAULT_LIMIT) -> Dict:
+        """
+        Uma página do visualizador de auditoria.
+
+        model_name e object_id são comparados por igualdade (usam o índice
+        ix_audit_logs_model_object). Registros sem timestamp (só na tabela)
+        vêm depois dos arquivados, em id decrescente, e somem com filtro de
+        data.
+
+        Returns:
+            {'itens': [{'id', 'timestamp', 'user_id', 'username', 'model_name',
+                        'object_id', 'action', 'changes', 'arquivado'}],
+             'next_cursor': str | None}
+
+        Raises:
+            ValueError: cursor inválido
+        """
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+        antes = AuditArchiveService.decode_cursor(cursor) if cursor else None
+        filtros = {
+            'user_id': user_id, 'model_name': model_name or None,
+            'object_id': str(object_id) if object_id else None,
+            'data_inicio': data_inicio, 'data_fim': data_fim,
+        }
+
+        conds = []
+        if user_id:
+            conds.append(AuditLog.user_id == user_id)
+        if filtros['model_name']:
+            conds.append(AuditLog.model_name == filtros['model_name'])
+        if filtros['object_id']:
+            conds.append(AuditLog.object_id == filtros['object_id'])
+        if data_inicio:
+            conds.append(AuditLog.timestamp >= datetime.combine(data_inicio, datetime.min.time()))
+        if data_fim:
+            conds.append(AuditLog.timestamp < datetime.combine(data_fim + timedelta(days=1), datetime.min.time()))
+
+        def _vivos(stmt):
+            return [dict(AuditArchiveService._linha(l), timestamp=l.timestamp, arquivado=False)
+                    for l in db.session.execute(stmt).scalars()]
+
+        itens = []
+        if not antes or antes[0] is not None:
+            cursor_conds = [or_(
+                AuditLog.timestamp < antes[0],
+                and_(AuditLog.timestamp == antes[0], AuditLog.id < antes[1])
+            )] if antes else []
+            itens = _vivos(
+                select(AuditLog).where(AuditLog.timestamp.isnot(None), *conds, *cursor_conds)
+                .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(limit + 1)
+            )
+
+            if len(itens) <= limit:
+                for linha in AuditArchiveService._arquivados(filtros, antes):
+                    itens.append(linha)
+                    if len(itens) > limit:
+                        break
+
+        if len(itens) <= limit and not (data_inicio or data_fim):
+            sem_data = [AuditLog.timestamp.is_(None), *conds]
+            if antes and antes[0] is None:
+                sem_data.append(AuditLog.id < antes[1])
+            itens += _vivos(
+                select(AuditLog).where(*sem_data)
+                .order_by(AuditLog.id.desc()).limit(limit + 1 - len(itens))
+            )
+
+        next_cursor = None
+        if len(itens) > limit:
+            itens = itens[:limit]
+            next_cursor = AuditArchiveService.encode_cursor(itens[-1]['timestamp'], itens[-1]['id'])
+
+        user_ids = {i['user_id'] for i in itens if i['user_id']}
+        nomes = dict(db.session.execute(
+            select(User.id, User.username).where(User.id.in_(user_ids))
+        ).all()) if user_ids else {}
+        for item in itens:
+            item['username'] = nomes.get(item['user_id'])
+
+        return {'itens': itens, 'next_cursor': next_cursor}
+
+    @staticmethod
+    def modelos() -> List[str]:
+        """model_name distintos da tabela viva (filtro do visualizador)."""
+        return list(db.session.execute(
+            select(AuditLog.model_name).distinct().order_by(AuditLog.model_name)
+        ).scalars())
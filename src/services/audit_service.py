@@ -1,19 +1,56 @@
+"""
+AuditService - Registro de alterações (AuditLog).
+
+Por padrão os registros ficam em um buffer da sessão (session.info) e são
+gravados no before_commit com INSERT multi-linha (AUDIT_INSERT_LOTE linhas
+por comando). Operações em lote (aprovar_batch, rejeitar_batch,
+TecnicoService.delete, ...) deixam de pagar um flush por ação auditada.
+
+Atomicidade igual à do flush imediato: o INSERT roda dentro da transação
+de negócio, antes do COMMIT. Rollback descarta o buffer; rollback de um
+SAVEPOINT descarta apenas o que foi registrado dentro dele
+(utils/session_buffer.py).
+
+Opt-out (flush imediato, comportamento anterior):
+    - AUDIT_BUFFER=false (env/config) para toda a aplicação
+    - log_change(..., imediato=True) para uma chamada
+    - AuditService.gravar_pendentes() grava o buffer antes do commit (ex:
+      para consultar AuditLog na mesma transação)
+"""
 import json
+import logging
 from datetime import datetime
+from flask import current_app, has_app_context
 from flask_login import current_user
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
 from ..models import db, AuditLog
+from ..utils.session_buffer import SessionBuffer
+
+
+logger = logging.getLogger(__name__)
+
+# Linhas pendentes da transação corrente (session.info['audit_buffer'])
+_buffer = SessionBuffer('audit_buffer')
+AUDIT_INSERT_LOTE = 1000
+
+
+def _buffer_ativo() -> bool:
+    return not has_app_context() or current_app.config.get('AUDIT_BUFFER', True)
+
 
 class AuditService:
     @staticmethod
-    def log_change(model_name, object_id, action, changes=None, user_id=None):
+    def log_change(model_name, object_id, action, changes=None, user_id=None, imediato=False):
         """
         Logs a change in the system.
-        
+
         :param model_name: Name of the model being changed (e.g., 'Chamado')
         :param object_id: ID of the object being changed
         :param action: Action performed ('CREATE', 'UPDATE', 'DELETE')
         :param changes: Dictionary containing changes (e.g., {'field': {'old': v1, 'new': v2}})
         :param user_id: ID of the user performing the action (defaults to current_user.id if available)
+        :param imediato: grava com flush imediato em vez do buffer da sessão
         """
         try:
             if user_id is None:
@@ -24,24 +61,56 @@ class AuditService:
                 except:
                     pass
 
-            changes_json = json.dumps(changes) if changes else None
-            
-            log_entry = AuditLog(
-                user_id=user_id,
-                model_name=model_name,
-                object_id=str(object_id),
-                action=action,
-                changes=changes_json,
-                timestamp=datetime.utcnow()
-            )
-            
-            db.session.add(log_entry)
-            # We use a separate commit or rely on the caller's commit? 
-            # Ideally audit logs should happen even if main transaction fails? 
-            # But usually we want them to be atomic with the transaction.
-            # We'll rely on the caller to commit or flush, but we can flush here to get ID.
-            db.session.flush()
-            
+            linha = {
+                'user_id': user_id,
+                'model_name': model_name,
+                'object_id': str(object_id),
+                'action': action,
+                'changes': json.dumps(changes) if changes else None,
+                'timestamp': datetime.utcnow()
+            }
+
+            if imediato or not _buffer_ativo():
+                db.session.add(AuditLog(**linha))
+                db.session.flush()
+                return
+
+            # Atômico com a transação do caller: gravado no before_commit
+            _buffer.add(db.session(), linha)
+
         except Exception as e:
             # Fallback logging to file/console so we don't break the app flow if audit fails
             print(f"Failed to create audit log: {e}")
+
+    @staticmethod
+    def pendentes(session=None) -> int:
+        """Quantidade de registros no buffer da sessão."""
+        session = session or db.session()
+        return _buffer.count(session)
+
+    @staticmethod
+    def gravar_pendentes(session=None) -> int:
+        """
+        Grava o buffer da sessão (INSERT multi-linha) sem commitar.
+
+        Returns:
+            registros gravados
+        """
+        session = session or db.session()
+        linhas = _buffer.pop(session)
+        if not linhas:
+            return 0
+        for inicio in range(0, len(linhas), AUDIT_INSERT_LOTE):
+            session.execute(insert(AuditLog.__table__).values(linhas[inicio:inicio + AUDIT_INSERT_LOTE]))
+        # db.session.commit() # Caller deve commitar
+        return len(linhas)
+
+
+@event.listens_for(Session, 'before_commit')
+def _before_commit(session):
+    if _buffer.count(session):
+        try:
+            AuditService.gravar_pendentes(session)
+        except Exception:
+            logger.exception("[AUDIT] Falha ao gravar o buffer de auditoria")
+            raise
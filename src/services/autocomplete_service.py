@@ -0,0 +1,117 @@
+"""
+AutocompleteService - Busca incremental (id, label) para técnicos e itens LPU.
+
+Substitui os <select> que carregavam o cadastro inteiro (no caso dos técnicos,
+via TecnicoService.get_all, que roda a agregação de métricas completa) por
+consultas limitadas, feitas sob demanda pelo TomSelect.
+
+Estratégia por dialeto (índices da migration a013):
+    Postgres : ILIKE '%termo%' servido por índice GIN pg_trgm em nome;
+               prefixos ordenados antes das demais ocorrências.
+    SQLite   : prefixo via intervalo lower(nome) >= termo AND < termo+U+10FFFF,
+               servido pelo índice de expressão lower(nome). lower() é
+               sobrescrito por str.lower() em cada conexão (src/models.py),
+               a mesma normalização aplicada ao termo: 'él' encontra 'Élcio'.
+"""
+from typing import List, Dict, Optional
+
+from sqlalchemy import func, case
+
+from ..models import db, Tecnico, ItemLPU
+
+
+MAX_LIMIT = 50
+DEFAULT_LIMIT = 20
+
+# Maior code point: limite superior do intervalo de prefixo
+_PREFIX_END = '\U0010ffff'
+
+
+class AutocompleteService:
+
+    @staticmethod
+    def _limit(limit) -> int:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return DEFAULT_LIMIT
+        return max(1, min(limit, MAX_LIMIT))
+
+    @staticmethod
+    def _escape_like(termo: str) -> str:
+        return termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    @staticmethod
+    def _match(query, column, termo: str):
+        """Aplica filtro + ordenação de busca em `column` conforme o dialeto."""
+        lower_col = func.lower(column)
+        if not termo:
+            return query.order_by(lower_col)
+
+        if db.session.get_bind().dialect.name == 'postgresql':
+            escaped = AutocompleteService._escape_like(termo)
+            return query.filter(
+                column.ilike(f'%{escaped}%', escape='\\')
+            ).order_by(
+                case((lower_col.like(f'{escaped}%', escape='\\'), 0), else_=1),
+                lower_col
+            )
+
+        return query.filter(
+            lower_col >= termo,
+            lower_col < termo + _PREFIX_END
+        ).order_by(lower_col)
+
+    @staticmethod
+    def tecnicos(q: str = '', limit=DEFAULT_LIMIT, status: Optional[str] = 'Ativo') -> List[Dict]:
+        """
+        Técnicos por nome. Label no formato do formulário de chamados:
+        "Nome | UF - Cidade".
+        """
+        termo = (q or '').strip().lower()
+        query = db.session.query(Tecnico.id, Tecnico.nome, Tecnico.estado, Tecnico.cidade)
+        if status:
+            query = query.filter(Tecnico.status == status)
+
+        rows = AutocompleteService._match(query, Tecnico.nome, termo).limit(
+            AutocompleteService._limit(limit)
+        ).all()
+        return [
+            {'id': r.id, 'label': AutocompleteService._tecnico_label(r)}
+            for r in rows
+        ]
+
+    @staticmethod
+    def itens(q: str = '', limit=DEFAULT_LIMIT, somente_estoque: bool = True) -> List[Dict]:
+        """Itens LPU por nome (por padrão apenas itens de estoque, cliente_id NULL)."""
+        termo = (q or '').strip().lower()
+        query = db.session.query(ItemLPU.id, ItemLPU.nome)
+        if somente_estoque:
+            query = query.filter(ItemLPU.cliente_id.is_(None))
+
+        rows = AutocompleteService._match(query, ItemLPU.nome, termo).limit(
+            AutocompleteService._limit(limit)
+        ).all()
+        return [{'id': r.id, 'label': r.nome} for r in rows]
+
+    @staticmethod
+    def tecnico_label(tecnico_id: Optional[int]) -> Optional[Dict]:
+        """(id, label) de um técnico já selecionado (pré-preenchimento do select)."""
+        if not tecnico_id:
+            return None
+        r = db.session.query(
+            Tecnico.id, Tecnico.nome, Tecnico.estado, Tecnico.cidade
+        ).filter(Tecnico.id == tecnico_id).first()
+        return {'id': r.id, 'label': AutocompleteService._tecnico_label(r)} if r else None
+
+    @staticmethod
+    def item_label(item_id: Optional[int]) -> Optional[Dict]:
+        """(id, label) de um item já selecionado."""
+        if not item_id:
+            return None
+        r = db.session.query(ItemLPU.id, ItemLPU.nome).filter(ItemLPU.id == item_id).first()
+        return {'id': r.id, 'label': r.nome} if r else None
+
+    @staticmethod
+    def _tecnico_label(r) -> str:
+        return f"{r.nome} | {r.estado} - {r.cidade}"
@@ -5,10 +5,11 @@ from flask_login import current_user
 from .audit_service import AuditService
 from .pricing_service import PricingService
 from .stock_service import StockService
+from .search_service import SearchService
 import uuid
 import re
-from sqlalchemy.orm import joinedload
-from sqlalchemy import or_, func
+from sqlalchemy.orm import joinedload, contains_eager
+from sqlalchemy import or_, func, select, true
 
 # Constantes de Negocio (Importadas do PricingService para compatibilidade)
 # Constantes de Negocio (Importadas do PricingService para compatibilidade)
@@ -20,6 +21,18 @@ from .pricing_service import ChamadoInput
 
 class ChamadoService:
 
+    @staticmethod
+    def filtro_pago(valor):
+        """
+        Condição do filtro 'pago' ('sim'/'nao') da listagem e das facetas
+        (FacetService.chamados). NULL conta como não pago; outro valor não filtra.
+        """
+        if valor == 'sim':
+            return Chamado.pago.is_(True)
+        if valor == 'nao':
+            return or_(Chamado.pago.is_(False), Chamado.pago.is_(None))
+        return true()
+
     @staticmethod
     def extract_fsa_code(input_str):
         """
@@ -58,11 +71,12 @@ class ChamadoService:
 
     @staticmethod
     def get_all(filters=None, page=1, per_page=20):
-        # Eager load Tecnico to avoid N+1
-        query = Chamado.query.options(joinedload(Chamado.tecnico))
-        
-        # Join explicitly for filtering if needed
-        query = query.join(Tecnico)
+        # Técnico e serviço vêm no mesmo SELECT (joins reaproveitados para
+        # filtro e renderização): custo constante de queries por página
+        query = Chamado.query.join(Chamado.tecnico).outerjoin(Chamado.catalogo_servico).options(
+            contains_eager(Chamado.tecnico),
+            contains_eager(Chamado.catalogo_servico)
+        )
         
         if filters:
             if filters.get('tecnico_id'):
@@ -77,21 +91,24 @@ class ChamadoService:
                 else:
                     query = query.filter(Chamado.status_validacao == val)
             if filters.get('tipo'):
-                query = query.filter(Chamado.tipo_servico == filters['tipo'])
+                # tipo_servico é @property (não vai para o SQL): filtra pelos ids
+                # do catálogo com esse nome (ix_catalogo_servicos_nome) via
+                # ix_chamados_servico_data
+                query = query.filter(Chamado.catalogo_servico_id.in_(
+                    select(CatalogoServico.id).where(CatalogoServico.nome == filters['tipo'])
+                ))
             if filters.get('pago'):
-                if filters['pago'] == 'sim':
-                    query = query.filter(Chamado.pago == True)
-                elif filters['pago'] == 'nao':
-                    query = query.filter(Chamado.pago == False)
+                query = query.filter(ChamadoService.filtro_pago(filters['pago']))
             if filters.get('search'):
-                s = filters['search']
-                query = query.filter(
-                    or_(
-                        Chamado.codigo_chamado.ilike(f"%{s}%"),
-                        Tecnico.nome.ilike(f"%{s}%"),
-                        Chamado.loja.ilike(f"%{s}%")
+                # Índice de busca: código, FSAs, loja, observações ou nome do técnico
+                chamado_ids = SearchService.match_ids('chamado', filters['search'])
+                if chamado_ids is not None:
+                    query = query.filter(
+                        or_(
+                            Chamado.id.in_(chamado_ids),
+                            Chamado.tecnico_id.in_(SearchService.match_ids('tecnico', filters['search']))
+                        )
                     )
-                )
         
         # Retorna o objeto Pagination, não a lista (.all)
         return query.order_by(Chamado.data_atendimento.desc()).paginate(
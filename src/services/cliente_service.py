@@ -0,0 +1,23 @@
+"""
+ClienteService - Leituras de clientes/contratos usadas em filtros e dropdowns.
+"""
+from typing import List
+
+from ..models import db, Cliente
+from ..utils.cache import cached
+
+
+class ClienteService:
+
+    @staticmethod
+    @cached(tables=['clientes'])
+    def get_ativos() -> List:
+        """
+        Clientes ativos como linhas (id, nome), ordenadas por nome.
+
+        Usado nos selects de relatórios/fechamento. Retorna Rows (não
+        instâncias ORM) para poder ser mantido em cache entre requests.
+        """
+        return db.session.query(Cliente.id, Cliente.nome).filter(
+            Cliente.ativo.is_(True)
+        ).order_by(Cliente.nome).all()
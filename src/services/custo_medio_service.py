@@ -0,0 +1,188 @@
+"""
+CustoMedioService - Custo médio ponderado incremental dos itens LPU.
+
+transferir_sede_para_tecnico grava o custo de aquisição apenas em
+StockMovement.custo_unitario (sem travar itens_lpu no caminho de escrita).
+Este job dobra esses ENVIOs em um custo médio ponderado por item:
+
+    custo_medio' = (custo_medio * qtd_acumulada + custo_unitario * qtd)
+                   / (qtd_acumulada + qtd)
+
+O estado (custo_medio, quantidade_acumulada) fica no checkpoint
+ItemCustoMedio e cada ENVIO dobrado é marcado em
+StockMovement.custo_processado_em, então cada execução lê somente os
+pendentes (índice parcial ix_stock_movements_envio_custo). O resultado,
+quando muda o valor em centavos, vai para ItemLPU.valor_custo (usado em
+relatórios, ex: ReportService.ofensor_custos) com registro em
+ItemLPUPrecoHistorico.
+
+A marcação é por linha, não por id: um ENVIO commitado depois de outro de
+id maior (transação longa) continua pendente e entra na execução seguinte,
+dobrado depois dos que já estavam na média.
+
+Execução: scripts/custo_medio.py (cron) -> executar_job() (JobRun 'custo_medio').
+"""
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Optional
+
+from sqlalchemy import select, text, update
+
+from ..models import db, ItemLPU, ItemLPUPrecoHistorico, ItemCustoMedio, JobRun, StockMovement
+
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'custo_medio'
+YIELD_PER = 1000
+# Chave do pg_try_advisory_xact_lock: uma execução por vez
+LOCK_KEY = 7204401
+
+QUATRO_CASAS = Decimal('0.0001')
+CENTAVOS = Decimal('0.01')
+
+
+class CustoMedioService:
+
+    @staticmethod
+    def _lock() -> bool:
+        if db.engine.dialect.name != 'postgresql':
+            return True
+        return bool(db.session.execute(
+            text("SELECT pg_try_advisory_xact_lock(:k)"), {'k': LOCK_KEY}
+        ).scalar())
+
+    @staticmethod
+    def processar(ate: Optional[datetime] = None, motivo: str = 'Custo médio ponderado') -> Dict:
+        """
+        Dobra os ENVIOs pendentes nos checkpoints, marca-os como processados
+        e atualiza ItemLPU.valor_custo.
+
+        Args:
+            ate: considera movimentos criados antes deste instante (default: agora)
+
+        Returns:
+            {'itens': int, 'movimentos': int, 'alterados': int}
+            ({'ignorado': True} se outra execução estiver em andamento)
+        """
+        if not CustoMedioService._lock():
+            return {'ignorado': True}
+
+        if ate is None:
+            ate = datetime.utcnow()
+
+        stmt = select(
+            StockMovement.item_lpu_id, StockMovement.id,
+            StockMovement.quantidade, StockMovement.custo_unitario
+        ).where(
+            StockMovement.tipo_movimento == 'ENVIO',
+            StockMovement.custo_unitario.isnot(None),
+            StockMovement.custo_processado_em.is_(None),
+            StockMovement.data_criacao < ate
+        ).order_by(StockMovement.item_lpu_id, StockMovement.id)
+
+        # ENVIOs pendentes por item, em ordem de id: [(quantidade, custo), ...]
+        envios: Dict[int, list] = {}
+        ultimo_id: Dict[int, int] = {}
+        # Todos os pendentes lidos são marcados (custo/quantidade <= 0 não entram
+        # na média, mas também não voltam a ser lidos)
+        lidos = []
+        for item_id, mov_id, qtd, custo in db.session.execute(stmt.execution_options(yield_per=YIELD_PER)):
+            lidos.append(mov_id)
+            if custo > 0 and qtd > 0:
+                envios.setdefault(item_id, []).append((qtd, Decimal(str(custo))))
+                ultimo_id[item_id] = mov_id
+
+        agora = datetime.utcnow()
+        for inicio in range(0, len(lidos), YIELD_PER):
+            db.session.execute(
+                update(StockMovement)
+                .where(StockMovement.id.in_(lidos[inicio:inicio + YIELD_PER]))
+                .values(custo_processado_em=agora)
+                .execution_options(synchronize_session=False)
+            )
+
+        if not envios:
+            return {'itens': 0, 'movimentos': 0, 'alterados': 0}
+
+        checkpoints = {
+            ck.item_lpu_id: ck
+            for ck in ItemCustoMedio.query.filter(ItemCustoMedio.item_lpu_id.in_(list(envios)))
+        }
+        itens = {i.id: i for i in ItemLPU.query.filter(ItemLPU.id.in_(list(envios)))}
+
+        alterados = 0
+        for item_id, novos in envios.items():
+            ck = checkpoints.get(item_id)
+            if ck is None:
+                ck = ItemCustoMedio(item_lpu_id=item_id, custo_medio=Decimal('0'),
+                                    quantidade_acumulada=0, ultimo_movimento_id=0)
+                db.session.add(ck)
+
+            media = Decimal(str(ck.custo_medio or 0))
+            quantidade = ck.quantidade_acumulada or 0
+            for qtd, custo in novos:
+                media = ((media * quantidade + custo * qtd) / (quantidade + qtd)).quantize(
+                    QUATRO_CASAS, rounding=ROUND_HALF_UP
+                )
+                quantidade += qtd
+
+            ck.custo_medio = media
+            ck.quantidade_acumulada = quantidade
+            ck.ultimo_movimento_id = max(ck.ultimo_movimento_id or 0, ultimo_id[item_id])
+            ck.atualizado_em = agora
+
+            item = itens.get(item_id)
+            novo = media.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+            anterior = Decimal(str(item.valor_custo)) if item and item.valor_custo is not None else None
+            if item is not None and anterior != novo:
+                db.session.add(ItemLPUPrecoHistorico(
+                    item_lpu_id=item_id,
+                    valor_custo_anterior=anterior,
+                    valor_custo_novo=novo,
+                    motivo=f"{motivo} ({len(novos)} envio(s))",
+                    alterado_por_id=None
+                ))
+                item.valor_custo = novo
+                alterados += 1
+
+        db.session.flush()
+        # db.session.commit() # Caller deve commitar
+        return {
+            'itens': len(envios),
+            'movimentos': sum(len(n) for n in envios.values()),
+            'alterados': alterados
+        }
+
+    @staticmethod
+    def executar_job(ate: Optional[datetime] = None) -> JobRun:
+        """
+        Executa processar() registrando um JobRun ('custo_medio').
+
+        WARNING: JOB BOUNDARY - commita o resultado e o JobRun.
+        """
+        job = JobRun(job_name=JOB_NAME, status='RUNNING')
+        db.session.add(job)
+        db.session.commit()
+
+        try:
+            resultado = CustoMedioService.processar(ate)
+            job.status = 'COMPLETED'
+            job.total_items = resultado.get('itens', 0)
+            job.success_count = resultado.get('alterados', 0)
+            job.log_text = json.dumps(resultado)
+            job.end_time = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("[CUSTO MEDIO] Falha no job #%s", job.id)
+            job.status = 'FAILED'
+            job.log_text = str(e)
+            job.end_time = datetime.utcnow()
+            db.session.commit()
+            raise
+
+        logger.info("[CUSTO MEDIO] Job #%s: %s", job.id, job.log_text)
+        return job
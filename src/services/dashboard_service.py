@@ -0,0 +1,175 @@
+"""
+DashboardService - Widgets do dashboard calculados em paralelo.
+
+O cockpit executava ~10 consultas agregadas independentes em sequência
+(KPIs, contagens, estatísticas de chamados, alertas de estoque): a latência
+da página era a SOMA de todas. Aqui cada widget é uma função somente-leitura
+executada em um pool de threads limitado (DASHBOARD_MAX_WORKERS); cada
+thread empurra seu próprio app context e, portanto, usa sua própria sessão
+e conexão do pool do engine. A latência passa a ser a da consulta mais lenta.
+
+Cada widget retorna dados serializáveis em JSON; bundle() devolve também o
+tempo de cada um (ms) para diagnóstico.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import date
+from typing import Callable, Dict, Iterable, Optional
+
+from flask import current_app
+
+from ..models import db, Chamado, Tecnico
+from .report_service import ReportService
+from .chamado_service import ChamadoService
+from .stock_service import StockService
+from .stock_report_service import StockReportService
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT = 30  # segundos por bundle
+
+# Widgets com dados financeiros (no endpoint JSON, apenas para admins)
+ADMIN_WIDGETS = frozenset({'kpis'})
+
+
+# =============================================================================
+# WIDGETS (somente leitura, sem ORM na saída)
+# =============================================================================
+
+def _kpis():
+    return ReportService.get_dashboard_kpis()
+
+
+def _fila_validacao():
+    # MESMA query da página de Atendimentos: pendentes em lote
+    return Chamado.query.filter(
+        Chamado.status_validacao == 'Pendente',
+        Chamado.batch_id.isnot(None)
+    ).count()
+
+
+def _finalizados_hoje():
+    # data_atendimento é Date: comparação direta (indexável) em vez de date()
+    return Chamado.query.filter(
+        Chamado.status_chamado == 'Concluído',
+        Chamado.data_atendimento == date.today()
+    ).count()
+
+
+def _tecnicos_ativos():
+    return Tecnico.query.filter_by(status='Ativo').count()
+
+
+def _chamados():
+    stats = ChamadoService.get_dashboard_stats()
+    return {
+        'chamados_mes': stats['chamados_mes'],
+        'chamados_por_status': stats['chamados_por_status'],
+        'ultimos': [
+            {
+                'id': c.id,
+                'codigo_chamado': c.codigo_chamado,
+                'fsa_codes': c.fsa_codes,
+                'status_chamado': c.status_chamado,
+                'data_atendimento': c.data_atendimento.isoformat() if c.data_atendimento else None,
+                'data_atendimento_fmt': c.data_atendimento.strftime('%d/%m') if c.data_atendimento else None,
+                'tecnico': {'id': c.tecnico.id, 'nome': c.tecnico.nome} if c.tecnico else None
+            }
+            for c in stats['ultimos']
+        ]
+    }
+
+
+def _alertas_estoque():
+    return [
+        {'nome': r.nome, 'total': int(r.total or 0)}
+        for r in StockService.get_alertas_dashboard(limite_minimo=10)
+    ]
+
+
+WIDGETS: Dict[str, Callable] = {
+    'kpis': _kpis,
+    'fila_validacao': _fila_validacao,
+    'finalizados_hoje': _finalizados_hoje,
+    'tecnicos_ativos': _tecnicos_ativos,
+    'chamados': _chamados,
+    'alertas_estoque': _alertas_estoque,
+    'estoque_resumo': StockReportService.get_dashboard_resumo,
+    'estoque_kpis': StockReportService.get_dashboard_kpis,
+}
+
+
+class DashboardService:
+
+    _pool: Optional[ThreadPoolExecutor] = None
+    _pool_pid: Optional[int] = None
+    _pool_lock = threading.Lock()
+
+    @staticmethod
+    def _executor() -> ThreadPoolExecutor:
+        """Pool do processo (recriado após fork, ex.: workers do gunicorn)."""
+        with DashboardService._pool_lock:
+            if DashboardService._pool is None or DashboardService._pool_pid != os.getpid():
+                DashboardService._pool = ThreadPoolExecutor(
+                    max_workers=current_app.config.get('DASHBOARD_MAX_WORKERS', DEFAULT_MAX_WORKERS),
+                    thread_name_prefix='dashboard'
+                )
+                DashboardService._pool_pid = os.getpid()
+            return DashboardService._pool
+
+    @staticmethod
+    def _run(app, nome: str) -> Dict:
+        """Executa um widget em app context próprio (sessão/conexão próprias)."""
+        inicio = time.perf_counter()
+        with app.app_context():
+            try:
+                resultado = {'data': WIDGETS[nome]()}
+            except Exception as e:
+                logger.exception("Widget %s falhou", nome)
+                resultado = {'error': str(e)}
+            finally:
+                db.session.remove()
+        resultado['ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+        return resultado
+
+    @staticmethod
+    def bundle(nomes: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Executa os widgets em paralelo.
+
+        Args:
+            nomes: widgets desejados (default: todos). Nomes desconhecidos
+                   são ignorados.
+
+        Returns:
+            {'widgets': {nome: {'data': ..., 'ms': float} | {'error': str, 'ms': float}},
+             'total_ms': float}
+        """
+        nomes = [n for n in (nomes or WIDGETS) if n in WIDGETS]
+        app = current_app._get_current_object()
+        timeout = app.config.get('DASHBOARD_TIMEOUT', DEFAULT_TIMEOUT)
+
+        inicio = time.perf_counter()
+        pool = DashboardService._executor()
+        futures = {nome: pool.submit(DashboardService._run, app, nome) for nome in nomes}
+
+        widgets = {}
+        for nome, future in futures.items():
+            restante = max(0.0, timeout - (time.perf_counter() - inicio))
+            try:
+                widgets[nome] = future.result(timeout=restante)
+            except FutureTimeout:
+                widgets[nome] = {
+                    'error': 'timeout',
+                    'ms': round((time.perf_counter() - inicio) * 1000, 1)
+                }
+
+        return {
+            'widgets': widgets,
+            'total_ms': round((time.perf_counter() - inicio) * 1000, 1)
+        }
@@ -0,0 +1,378 @@
+"""
+ExportJobService - Exportações grandes em background (JobRun + artefato em disco).
+
+Exportações longas (ex: movimentações de um ano inteiro) prendem o worker do
+gunicorn e estouram o timeout do proxy. Neste modo a exportação vira um
+JobRun ('export_<tipo>'), roda no executor global e grava o arquivo em um
+diretório de artefatos local. O solicitante acompanha o progresso pela API e
+recebe uma Notification com o link de download ao final.
+
+Configuração (app.config):
+    EXPORT_ARTIFACTS_DIR       diretório dos arquivos (default: <instance>/exports)
+    EXPORT_ARTIFACT_TTL_HOURS  validade de cada arquivo (default: 24)
+    EXPORT_ARTIFACTS_MAX_MB    teto de espaço em disco (default: 500)
+"""
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, date
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from flask import current_app
+from sqlalchemy import update
+
+from src import executor, db
+from src.models import JobRun, Notification
+from src.services.export_service import ExportService, ExportDataset
+
+logger = logging.getLogger(__name__)
+
+
+# Atualiza o progresso do JobRun a cada N linhas gravadas
+PROGRESS_EVERY = 5000
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+class ExportTipo(NamedTuple):
+    """Tipo de exportação disponível em background."""
+    dataset: Callable[[Dict[str, Any]], ExportDataset]
+    nome_base: Callable[[Dict[str, Any]], str]
+    sheet_title: str
+    bom: bool = False
+    admin_only: bool = True
+
+
+EXPORT_TIPOS: Dict[str, ExportTipo] = {
+    'movimentacoes': ExportTipo(
+        dataset=lambda p: ExportService.dataset_movimentacoes(
+            _parse_date(p['data_inicio']), _parse_date(p['data_fim'])
+        ),
+        nome_base=lambda p: f"movimentacoes_{p['data_inicio'].replace('-', '')}_{p['data_fim'].replace('-', '')}",
+        sheet_title='Movimentações'
+    ),
+    'custos_chamados': ExportTipo(
+        dataset=lambda p: ExportService.dataset_custos_chamados(
+            _parse_date(p['data_inicio']), _parse_date(p['data_fim'])
+        ),
+        nome_base=lambda p: f"custos_pecas_{p['data_inicio'].replace('-', '')}_{p['data_fim'].replace('-', '')}",
+        sheet_title='Custos por Chamado'
+    ),
+    'estoque': ExportTipo(
+        dataset=lambda p: ExportService.dataset_estoque(),
+        nome_base=lambda p: f"estoque_{datetime.now().strftime('%Y%m%d')}",
+        sheet_title='Estoque'
+    ),
+    'matriz_estoque': ExportTipo(
+        dataset=lambda p: ExportService.dataset_matriz_estoque(
+            p.get('item_ids') or None, p.get('search') or None, p.get('tecnico_id') or None
+        ),
+        nome_base=lambda p: f"matriz_estoque_{datetime.now().strftime('%Y%m%d')}",
+        sheet_title='Matriz de Estoque'
+    ),
+    'saldo_em': ExportTipo(
+        dataset=lambda p: ExportService.dataset_saldo_em(
+            _parse_date(p['data']), p.get('tecnico_id') or None, p.get('item_id') or None
+        ),
+        nome_base=lambda p: f"saldo_estoque_{p['data'].replace('-', '')}",
+        sheet_title='Saldo em Data'
+    ),
+    'fechamento_contrato': ExportTipo(
+        dataset=lambda p: ExportService.dataset_fechamento_contrato(
+            int(p['cliente_id']), _parse_date(p['inicio']), _parse_date(p['fim']), p.get('estado') or None
+        ),
+        nome_base=lambda p: f"fechamento_contrato_{p['inicio']}_{p['fim']}",
+        sheet_title='Fechamento',
+        bom=True,
+        admin_only=False
+    ),
+    'fechamento_cliente': ExportTipo(
+        dataset=lambda p: ExportService.dataset_fechamento_cliente(
+            int(p['cliente_id']), int(p['mes']), int(p['ano'])
+        ),
+        nome_base=lambda p: f"fechamento_{p['cliente_id']}_{p['mes']}_{p['ano']}",
+        sheet_title='Fechamento',
+        bom=True
+    ),
+}
+
+
+# Função isolada (fora da classe) para rodar em background
+def task_exportar(job_id: int):
+    """
+    Gera o artefato de uma exportação enfileirada.
+
+    WARNING: JOB BOUNDARY - DO NOT CALL FROM WITHIN A TRANSACTION.
+    Esta função gerencia seu próprio ciclo de vida (commit/rollback).
+    """
+    try:
+        app = current_app._get_current_object()
+        has_context = True
+    except RuntimeError:
+        has_context = False
+        from src import create_app
+        app = create_app()
+
+    def _run_task():
+        job = JobRun.query.get(job_id)
+        if not job:
+            logger.error(f"[EXPORT] JobRun #{job_id} não encontrado.")
+            return
+
+        meta = json.loads(job.metadata_json or '{}')
+        tipo = EXPORT_TIPOS[meta['tipo']]
+        formato = meta.get('formato', 'csv')
+
+        job.status = 'RUNNING'
+        job.start_time = datetime.utcnow()
+        db.session.commit()
+
+        arquivo = f"{job_id}_{tipo.nome_base(meta['params'])}.{formato}"
+        destino = os.path.join(ExportJobService.artifacts_dir(), arquivo)
+        parcial = destino + '.part'
+
+        try:
+            dataset = tipo.dataset(meta['params'])
+            dataset = dataset._replace(rows=ExportJobService._com_progresso(job_id, dataset.rows))
+
+            with open(parcial, 'wb') as fh:
+                if formato == 'xlsx':
+                    ExportService.write_xlsx(dataset, fh, tipo.sheet_title)
+                else:
+                    for chunk in ExportService.iter_csv(dataset, bom=tipo.bom):
+                        fh.write(chunk)
+            os.replace(parcial, destino)
+
+            ttl = current_app.config.get('EXPORT_ARTIFACT_TTL_HOURS', 24)
+            expira_em = datetime.utcnow() + timedelta(hours=ttl)
+            meta.update({
+                'arquivo': arquivo,
+                'tamanho_bytes': os.path.getsize(destino),
+                'expira_em': expira_em.isoformat()
+            })
+
+            job = JobRun.query.get(job_id)
+            job.status = 'COMPLETED'
+            job.end_time = datetime.utcnow()
+            job.metadata_json = json.dumps(meta)
+            db.session.add(Notification(
+                user_id=meta['user_id'],
+                title='Exportação pronta',
+                message=(
+                    f"O arquivo {arquivo} está disponível para download até "
+                    f"{expira_em.strftime('%d/%m/%Y %H:%M')} (UTC): "
+                    f"{ExportJobService.download_path(job_id)}"
+                ),
+                notification_type='success'
+            ))
+            db.session.commit()
+            logger.info(f"[EXPORT] Job #{job_id} concluído: {arquivo} ({meta['tamanho_bytes']} bytes)")
+
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(f"[EXPORT] FATAL Job #{job_id}: {str(e)}")
+            if os.path.exists(parcial):
+                os.remove(parcial)
+            try:
+                job = JobRun.query.get(job_id)
+                job.status = 'FAILED'
+                job.end_time = datetime.utcnow()
+                job.error_count = 1
+                job.log_text = f"FATAL: {str(e)}"
+                db.session.add(Notification(
+                    user_id=meta['user_id'],
+                    title='Falha na exportação',
+                    message=f"A exportação #{job_id} falhou: {str(e)}",
+                    notification_type='danger'
+                ))
+                db.session.commit()
+            except Exception:
+                logger.error("Could not update JobRun status after crash.")
+
+        ExportJobService.limpar_artefatos()
+
+    # Executar com contexto apropriado
+    if has_context:
+        _run_task()
+    else:
+        with app.app_context():
+            _run_task()
+
+
+class ExportJobService:
+    """Enfileiramento, status, download e limpeza de exportações em background."""
+
+    MENSAGEM_ENFILEIRADO = (
+        "Exportação #{job_id} enviada para processamento. "
+        "Você será notificado quando o arquivo estiver pronto."
+    )
+
+    @staticmethod
+    def artifacts_dir() -> str:
+        path = current_app.config.get('EXPORT_ARTIFACTS_DIR') or os.path.join(current_app.instance_path, 'exports')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def download_path(job_id: int) -> str:
+        """URL de download (montada sem url_for: a task roda fora de request)."""
+        return f"/api/exports/{job_id}/download"
+
+    @staticmethod
+    def enfileirar(tipo: str, params: Dict[str, Any], formato: str, user) -> JobRun:
+        """
+        Cria o JobRun e dispara a geração no executor.
+
+        WARNING: JOB BOUNDARY - commita o JobRun para que a task o enxergue.
+
+        Raises:
+            ValueError: tipo/formato inválido ou sem permissão
+        """
+        if tipo not in EXPORT_TIPOS:
+            raise ValueError(f"Tipo de exportação inválido: {tipo}")
+        if formato not in ('csv', 'xlsx'):
+            raise ValueError(f"Formato inválido: {formato}")
+        if EXPORT_TIPOS[tipo].admin_only and not user.is_admin:
+            raise ValueError("Sem permissão para esta exportação.")
+
+        # Valida parâmetros antes de enfileirar (datas, ids)
+        EXPORT_TIPOS[tipo].nome_base(params)
+        EXPORT_TIPOS[tipo].dataset(params)
+
+        job = JobRun(
+            job_name=f'export_{tipo}',
+            status='PENDING',
+            metadata_json=json.dumps({
+                'tipo': tipo,
+                'formato': formato,
+                'params': params,
+                'user_id': user.id
+            })
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        executor.submit(task_exportar, job.id)
+        logger.info(f"[EXPORT] Job #{job.id} enfileirado ({tipo}/{formato}) por user {user.id}")
+        return job
+
+    @staticmethod
+    def get_job(job_id: int, user) -> JobRun:
+        """Retorna o JobRun de exportação visível para o usuário (dono ou admin)."""
+        job = JobRun.query.get(job_id)
+        if not job or not job.job_name.startswith('export_'):
+            raise LookupError("Exportação não encontrada.")
+        meta = json.loads(job.metadata_json or '{}')
+        if meta.get('user_id') != user.id and not user.is_admin:
+            raise LookupError("Exportação não encontrada.")
+        return job
+
+    @staticmethod
+    def caminho_artefato(job: JobRun) -> Optional[str]:
+        """Caminho do arquivo gerado, ou None se ainda não existe/expirou."""
+        meta = json.loads(job.metadata_json or '{}')
+        if job.status != 'COMPLETED' or not meta.get('arquivo'):
+            return None
+        path = os.path.join(ExportJobService.artifacts_dir(), meta['arquivo'])
+        return path if os.path.exists(path) else None
+
+    @staticmethod
+    def status(job: JobRun) -> Dict[str, Any]:
+        """Progresso e link de download do job."""
+        meta = json.loads(job.metadata_json or '{}')
+        status = job.status
+        download_url = None
+
+        if status == 'COMPLETED':
+            if ExportJobService.caminho_artefato(job):
+                download_url = ExportJobService.download_path(job.id)
+            else:
+                status = 'EXPIRED'
+
+        return {
+            'id': job.id,
+            'tipo': meta.get('tipo'),
+            'formato': meta.get('formato'),
+            'status': status,
+            'linhas_processadas': job.success_count or 0,
+            'start_time': job.start_time.isoformat() if job.start_time else None,
+            'end_time': job.end_time.isoformat() if job.end_time else None,
+            'arquivo': meta.get('arquivo'),
+            'tamanho_bytes': meta.get('tamanho_bytes'),
+            'expira_em': meta.get('expira_em'),
+            'download_url': download_url,
+            'erro': job.log_text if status == 'FAILED' else None
+        }
+
+    @staticmethod
+    def limpar_artefatos() -> int:
+        """
+        Remove artefatos expirados (TTL) e, se o diretório passar do teto de
+        tamanho, os mais antigos até voltar ao limite.
+
+        Returns:
+            Quantidade de arquivos removidos
+        """
+        path = ExportJobService.artifacts_dir()
+        ttl_segundos = current_app.config.get('EXPORT_ARTIFACT_TTL_HOURS', 24) * 3600
+        max_bytes = current_app.config.get('EXPORT_ARTIFACTS_MAX_MB', 500) * 1024 * 1024
+        agora = time.time()
+
+        arquivos = []
+        for nome in os.listdir(path):
+            full = os.path.join(path, nome)
+            if not os.path.isfile(full) or nome.endswith('.part'):
+                continue
+            st = os.stat(full)
+            arquivos.append((st.st_mtime, st.st_size, full))
+
+        removidos = 0
+        restantes = []
+        for mtime, size, full in sorted(arquivos):
+            if agora - mtime > ttl_segundos:
+                os.remove(full)
+                removidos += 1
+            else:
+                restantes.append((mtime, size, full))
+
+        total = sum(size for _, size, _ in restantes)
+        for mtime, size, full in restantes:
+            if total <= max_bytes:
+                break
+            os.remove(full)
+            total -= size
+            removidos += 1
+
+        if removidos:
+            logger.info(f"[EXPORT] {removidos} artefato(s) removido(s) na limpeza.")
+        return removidos
+
+    @staticmethod
+    def _com_progresso(job_id: int, rows):
+        """
+        Repassa as linhas atualizando JobRun.success_count a cada PROGRESS_EVERY.
+
+        O UPDATE usa conexão própria (a sessão está presa ao cursor de leitura).
+        Best-effort: no SQLite sem WAL o leitor pode bloquear a escrita.
+        """
+        count = 0
+        for row in rows:
+            yield row
+            count += 1
+            if count % PROGRESS_EVERY == 0:
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(update(JobRun).where(JobRun.id == job_id).values(success_count=count))
+                except Exception as e:
+                    logger.debug(f"[EXPORT] Progresso do job #{job_id} não atualizado: {e}")
+
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(update(JobRun).where(JobRun.id == job_id).values(
+                    success_count=count, total_items=count
+                ))
+        except Exception as e:
+            logger.debug(f"[EXPORT] Progresso final do job #{job_id} não atualizado: {e}")
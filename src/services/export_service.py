@@ -0,0 +1,596 @@
+"""
+ExportService - Exportações em streaming (CSV/XLSX) com memória constante.
+
+REFATORADO (2026-01): Substitui o padrão ".all() + StringIO" das rotas de
+exportação. Cada exportação é descrita por um ExportDataset:
+
+    - header: cabeçalho da planilha
+    - rows:   gerador de tuplas TIPADAS (date, datetime, Decimal, int, str)
+              lido do banco com yield_per (cursor server-side no PostgreSQL)
+              e projeção de colunas/joins explícitos (sem lazy-load por linha)
+    - csv_row: formatação legada de cada linha para o CSV
+
+csv_response() transforma o dataset em uma resposta Flask em streaming
+(stream_with_context), de modo que o pico de memória independe do período.
+xlsx_response() grava o mesmo dataset com o workbook write-only do openpyxl
+(células tipadas: datas e números, não strings).
+"""
+import csv
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+from flask import Response, stream_with_context
+from sqlalchemy import and_, false, func, select
+from sqlalchemy.orm import aliased
+
+from ..models import (
+    db, Chamado, CatalogoServico, Cliente, ItemLPU, StockMovement, Tag, TagDefinicao,
+    Tecnico, TecnicoStock
+)
+
+
+# Linhas buscadas por round-trip no cursor server-side
+YIELD_PER = 1000
+
+# Linhas acumuladas no buffer antes de cada chunk HTTP
+FLUSH_EVERY = 500
+
+# Tamanho dos chunks ao devolver o arquivo XLSX gerado
+XLSX_CHUNK_BYTES = 64 * 1024
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Formatos de célula por tipo Python (padrão BR no Excel)
+XLSX_FORMATS = {
+    datetime: 'DD/MM/YYYY HH:MM',
+    date: 'DD/MM/YYYY',
+    Decimal: '#,##0.00',
+}
+
+
+class ExportDataset(NamedTuple):
+    """Dataset exportável: cabeçalho + linhas tipadas em streaming."""
+    header: List[str]
+    rows: Iterable[tuple]
+    csv_row: Callable[[tuple], List[Any]]
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal('0.00')
+
+
+def _dot(value) -> str:
+    """12.5 -> '12.50' (formato dos CSVs de estoque)."""
+    return f'{float(value or 0):.2f}'
+
+
+def _comma(value) -> str:
+    """12.5 -> '12,50' (formato dos CSVs financeiros/Excel BR)."""
+    return f'{float(value or 0):.2f}'.replace('.', ',')
+
+
+def _fmt_date(value, fmt='%d/%m/%Y') -> str:
+    return value.strftime(fmt) if value else ''
+
+
+class ExportService:
+    """Datasets de exportação e respostas CSV/XLSX em streaming."""
+
+    # ==========================================================================
+    # INFRAESTRUTURA
+    # ==========================================================================
+
+    @staticmethod
+    def stream(stmt, yield_per: int = YIELD_PER):
+        """
+        Executa um SELECT com yield_per (implica stream_results/cursor server-side).
+
+        Retorna o Result; iterar linha a linha ou por .partitions().
+        """
+        return db.session.execute(stmt.execution_options(yield_per=yield_per))
+
+    @staticmethod
+    def iter_csv(dataset: ExportDataset, bom: bool = False, delimiter: str = ';') -> Iterator[bytes]:
+        """Gera o CSV do dataset em chunks de bytes (UTF-8)."""
+        buffer = StringIO()
+        writer = csv.writer(buffer, delimiter=delimiter)
+
+        def flush() -> bytes:
+            chunk = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            return chunk
+
+        writer.writerow(dataset.header)
+        yield (b'\xef\xbb\xbf' if bom else b'') + flush()
+
+        pendentes = 0
+        for row in dataset.rows:
+            writer.writerow(dataset.csv_row(row) if row else [])
+            pendentes += 1
+            if pendentes >= FLUSH_EVERY:
+                yield flush()
+                pendentes = 0
+
+        if pendentes:
+            yield flush()
+
+    @staticmethod
+    def csv_response(dataset: ExportDataset, filename: str, bom: bool = False,
+                     delimiter: str = ';') -> Response:
+        """
+        Resposta CSV em streaming.
+
+        Args:
+            dataset: ExportDataset a exportar
+            filename: nome do arquivo para Content-Disposition
+            bom: prefixa BOM UTF-8 (compatibilidade com Excel)
+            delimiter: separador de colunas
+        """
+        return Response(
+            stream_with_context(ExportService.iter_csv(dataset, bom, delimiter)),
+            mimetype='text/csv',
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}',
+                'Content-Type': 'text/csv; charset=utf-8',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+
+    @staticmethod
+    def write_xlsx(dataset: ExportDataset, fileobj, sheet_title: str = 'Dados') -> int:
+        """
+        Grava o dataset em XLSX (workbook write-only) no arquivo informado.
+
+        O modo write-only descarrega as linhas em disco à medida que são
+        adicionadas, então a memória não cresce com o número de linhas.
+
+        Returns:
+            Quantidade de linhas de dados gravadas
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+        from openpyxl.utils import get_column_letter
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=sheet_title[:31])
+
+        for idx, titulo in enumerate(dataset.header, start=1):
+            ws.column_dimensions[get_column_letter(idx)].width = max(len(titulo) + 4, 14)
+        ws.freeze_panes = 'A2'
+
+        bold = Font(bold=True)
+        header = []
+        for titulo in dataset.header:
+            cell = WriteOnlyCell(ws, value=titulo)
+            cell.font = bold
+            header.append(cell)
+        ws.append(header)
+
+        def typed(value):
+            fmt = XLSX_FORMATS.get(type(value))
+            if fmt is None:
+                return value
+            cell = WriteOnlyCell(ws, value=value)
+            cell.number_format = fmt
+            return cell
+
+        total = 0
+        for row in dataset.rows:
+            ws.append([typed(v) for v in row])
+            total += 1
+
+        wb.save(fileobj)
+        return total
+
+    @staticmethod
+    def xlsx_response(dataset: ExportDataset, filename: str, sheet_title: str = 'Dados') -> Response:
+        """
+        Resposta XLSX: gera o workbook em arquivo temporário e devolve em chunks.
+
+        O ZIP do XLSX só fica completo no save(), então o arquivo é montado
+        em disco (não em memória) e removido no fechamento da resposta
+        (call_on_close), mesmo que o corpo nunca seja iterado (HEAD, cliente
+        desconectado antes do primeiro chunk).
+        """
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                ExportService.write_xlsx(dataset, fh, sheet_title)
+        except Exception:
+            os.remove(path)
+            raise
+
+        def remover():
+            if os.path.exists(path):
+                os.remove(path)
+
+        def generate() -> Iterator[bytes]:
+            try:
+                with open(path, 'rb') as fh:
+                    while True:
+                        chunk = fh.read(XLSX_CHUNK_BYTES)
+                        if not chunk:
+                            break
+                        yield chunk
+            finally:
+                remover()
+
+        response = Response(
+            generate(),
+            mimetype=XLSX_MIMETYPE,
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}',
+                'Content-Length': str(os.path.getsize(path))
+            }
+        )
+        response.call_on_close(remover)
+        return response
+
+    @staticmethod
+    def send(dataset: ExportDataset, nome_base: str, formato: str = 'csv',
+             bom: bool = False, sheet_title: str = 'Dados') -> Response:
+        """
+        Despacha o dataset no formato pedido (?formato=csv|xlsx).
+
+        Args:
+            nome_base: nome do arquivo sem extensão
+        """
+        if formato == 'xlsx':
+            return ExportService.xlsx_response(dataset, f'{nome_base}.xlsx', sheet_title)
+        return ExportService.csv_response(dataset, f'{nome_base}.csv', bom=bom)
+
+    # ==========================================================================
+    # ESTOQUE
+    # ==========================================================================
+
+    @staticmethod
+    def dataset_estoque() -> ExportDataset:
+        """Posição atual do estoque em campo (quantidade > 0)."""
+        stmt = select(
+            Tecnico.nome, Tecnico.cidade, Tecnico.estado,
+            ItemLPU.nome, TecnicoStock.quantidade, ItemLPU.valor_custo,
+            TecnicoStock.data_atualizacao
+        ).select_from(TecnicoStock).outerjoin(
+            Tecnico, TecnicoStock.tecnico_id == Tecnico.id
+        ).outerjoin(
+            ItemLPU, TecnicoStock.item_lpu_id == ItemLPU.id
+        ).where(
+            TecnicoStock.quantidade > 0
+        ).order_by(TecnicoStock.tecnico_id, TecnicoStock.id)
+
+        def rows():
+            for tec_nome, cidade, estado, item_nome, qtd, custo, atualizado in ExportService.stream(stmt):
+                custo = _money(custo)
+                yield (
+                    tec_nome or 'N/A', cidade or '', estado or '',
+                    item_nome or 'N/A', qtd, custo, custo * qtd, atualizado
+                )
+
+        return ExportDataset(
+            header=[
+                'Técnico', 'Cidade', 'Estado', 'Peça', 'Quantidade',
+                'Custo Unitário', 'Valor Total', 'Última Atualização'
+            ],
+            rows=rows(),
+            csv_row=lambda r: [
+                r[0], r[1], r[2], r[3], r[4], _dot(r[5]), _dot(r[6]),
+                _fmt_date(r[7], '%d/%m/%Y %H:%M')
+            ]
+        )
+
+    @staticmethod
+    def dataset_matriz_estoque(item_ids: Optional[List[int]] = None, search: Optional[str] = None,
+                               tecnico_id: Optional[int] = None) -> ExportDataset:
+        """
+        Matriz técnico x item completa (pivot): uma linha por técnico, uma
+        coluna por item. Colunas: item_ids informados ou todos os itens com
+        saldo nos técnicos do filtro. Técnicos sem saldo saem com zeros.
+        """
+        from .stock_matrix_service import StockMatrixService
+
+        tec_cond = StockMatrixService.tecnicos_condition(search, tecnico_id)
+        if item_ids:
+            nomes = dict(db.session.execute(
+                select(ItemLPU.id, ItemLPU.nome).where(ItemLPU.id.in_(item_ids))
+            ).all())
+            colunas = [(i, nomes[i]) for i in item_ids if i in nomes]
+        else:
+            colunas = db.session.execute(
+                select(ItemLPU.id, ItemLPU.nome).where(
+                    ItemLPU.id.in_(
+                        select(TecnicoStock.item_lpu_id).join(
+                            Tecnico, Tecnico.id == TecnicoStock.tecnico_id
+                        ).where(tec_cond, TecnicoStock.quantidade != 0)
+                    )
+                ).order_by(ItemLPU.nome, ItemLPU.id)
+            ).all()
+        posicao = {item_id: n for n, (item_id, _) in enumerate(colunas)}
+
+        # Técnicos em ordem, com as células não-zero em LEFT JOIN: o pivot é
+        # montado agrupando linhas consecutivas do mesmo técnico
+        stmt = select(
+            Tecnico.id, Tecnico.nome, Tecnico.cidade, Tecnico.estado,
+            TecnicoStock.item_lpu_id, TecnicoStock.quantidade
+        ).outerjoin(
+            TecnicoStock, and_(
+                TecnicoStock.tecnico_id == Tecnico.id,
+                TecnicoStock.quantidade != 0,
+                TecnicoStock.item_lpu_id.in_(list(posicao)) if posicao else false()
+            )
+        ).where(tec_cond).order_by(Tecnico.nome, Tecnico.id)
+
+        def rows():
+            atual, valores = None, None
+            for tid, nome, cidade, estado, item_id, qtd in ExportService.stream(stmt):
+                if atual is None or atual[0] != tid:
+                    if atual is not None:
+                        yield atual[1:] + tuple(valores) + (sum(valores),)
+                    atual, valores = (tid, nome, cidade or '', estado or ''), [0] * len(colunas)
+                if item_id is not None:
+                    valores[posicao[item_id]] = qtd
+            if atual is not None:
+                yield atual[1:] + tuple(valores) + (sum(valores),)
+
+        return ExportDataset(
+            header=['Técnico', 'Cidade', 'Estado'] + [nome for _, nome in colunas] + ['Total'],
+            rows=rows(),
+            csv_row=list
+        )
+
+    @staticmethod
+    def dataset_saldo_em(data: date, tecnico_id: Optional[int] = None,
+                         item_id: Optional[int] = None) -> ExportDataset:
+        """Saldos por técnico/item ao final de `data` (StockLedgerService)."""
+        from .stock_ledger_service import StockLedgerService
+
+        momento = datetime.combine(data + timedelta(days=1), datetime.min.time())
+        stmt, _ = StockLedgerService.saldo_em_stmt(momento, tecnico_id, item_id)
+
+        def rows():
+            for tid, tecnico, _item_id, item, qtd in ExportService.stream(stmt):
+                yield (data, tecnico, item, int(qtd))
+
+        return ExportDataset(
+            header=['Data', 'Técnico', 'Peça', 'Saldo'],
+            rows=rows(),
+            csv_row=lambda r: [_fmt_date(r[0]), r[1], r[2], r[3]]
+        )
+
+    @staticmethod
+    def dataset_movimentacoes(data_inicio: date, data_fim: date) -> ExportDataset:
+        """Histórico de movimentações no período (mais recentes primeiro)."""
+        from .stock_report_service import StockReportService
+
+        origem = aliased(Tecnico)
+        destino = aliased(Tecnico)
+        stmt = select(
+            StockMovement.data_criacao, StockMovement.tipo_movimento,
+            ItemLPU.nome, StockMovement.quantidade, ItemLPU.valor_custo,
+            origem.nome, destino.nome, StockMovement.chamado_id,
+            StockMovement.observacao
+        ).select_from(StockMovement).outerjoin(
+            ItemLPU, StockMovement.item_lpu_id == ItemLPU.id
+        ).outerjoin(
+            origem, StockMovement.origem_tecnico_id == origem.id
+        ).outerjoin(
+            destino, StockMovement.destino_tecnico_id == destino.id
+        ).where(
+            StockReportService.periodo_filter(StockMovement.data_criacao, data_inicio, data_fim)
+        ).order_by(StockMovement.data_criacao.desc(), StockMovement.id.desc())
+
+        def rows():
+            for data, tipo, item_nome, qtd, custo, orig, dest, chamado_id, obs in ExportService.stream(stmt):
+                yield (
+                    data, tipo, item_nome or 'N/A', qtd, _money(custo),
+                    orig or 'Almoxarifado', dest or 'Almoxarifado',
+                    chamado_id, obs or ''
+                )
+
+        return ExportDataset(
+            header=[
+                'Data', 'Tipo', 'Peça', 'Quantidade', 'Custo Unitário',
+                'Técnico Origem', 'Técnico Destino', 'Chamado', 'Observação'
+            ],
+            rows=rows(),
+            csv_row=lambda r: [
+                _fmt_date(r[0], '%d/%m/%Y %H:%M'), r[1], r[2], r[3], _dot(r[4]),
+                r[5], r[6], r[7] or '', r[8]
+            ]
+        )
+
+    @staticmethod
+    def dataset_custos_chamados(data_inicio: date, data_fim: date) -> ExportDataset:
+        """Custos de peças por chamado no período."""
+        stmt = select(
+            Chamado.data_atendimento, Chamado.codigo_chamado, Chamado.id,
+            Tecnico.nome, Chamado.cidade, Chamado.peca_usada,
+            Chamado.fornecedor_peca, Chamado.custo_peca, Chamado.custo_atribuido
+        ).select_from(Chamado).outerjoin(
+            Tecnico, Chamado.tecnico_id == Tecnico.id
+        ).where(
+            Chamado.data_atendimento >= data_inicio,
+            Chamado.data_atendimento <= data_fim,
+            Chamado.peca_usada.isnot(None),
+            Chamado.peca_usada != ''
+        ).order_by(Chamado.data_atendimento.desc(), Chamado.id.desc())
+
+        def rows():
+            for data, codigo, cid, tec_nome, cidade, peca, fornecedor, custo_peca, custo_srv in ExportService.stream(stmt):
+                custo_peca = _money(custo_peca)
+                custo_srv = _money(custo_srv)
+                yield (
+                    data, codigo or f'ID-{cid}', tec_nome or 'N/A', cidade or '',
+                    peca, fornecedor or 'Empresa', custo_peca, custo_srv,
+                    custo_peca + custo_srv
+                )
+
+        return ExportDataset(
+            header=[
+                'Data', 'Código Chamado', 'Técnico', 'Cidade',
+                'Peça Usada', 'Fornecedor', 'Custo Peça',
+                'Custo Serviço', 'Custo Total'
+            ],
+            rows=rows(),
+            csv_row=lambda r: [
+                _fmt_date(r[0]), r[1], r[2], r[3], r[4], r[5],
+                _dot(r[6]), _dot(r[7]), _dot(r[8])
+            ]
+        )
+
+    # ==========================================================================
+    # TECNICOS
+    # ==========================================================================
+
+    @staticmethod
+    def dataset_tecnicos() -> ExportDataset:
+        """
+        Técnicos com total a pagar agregado (próprio + sub-técnicos) e tags.
+
+        Pendências agregadas em subqueries sobre o predicado canônico; tags
+        carregadas por lote (uma query por partição do cursor).
+        """
+        val_expr = func.coalesce(Chamado.custo_atribuido, 0)
+        pend_cond = Chamado.pendente_pagamento_condition()
+
+        proprio_sq = select(
+            Chamado.tecnico_id.label('tecnico_id'),
+            func.sum(val_expr).label('total')
+        ).where(pend_cond).group_by(Chamado.tecnico_id).subquery()
+
+        sub = aliased(Tecnico)
+        subs_sq = select(
+            sub.tecnico_principal_id.label('tecnico_id'),
+            func.sum(val_expr).label('total')
+        ).select_from(sub).join(
+            Chamado, Chamado.tecnico_id == sub.id
+        ).where(
+            sub.tecnico_principal_id.isnot(None), pend_cond
+        ).group_by(sub.tecnico_principal_id).subquery()
+
+        stmt = select(
+            Tecnico.id, Tecnico.nome, Tecnico.cidade, Tecnico.estado,
+            Tecnico.status, Tecnico.valor_por_atendimento,
+            Tecnico.forma_pagamento, Tecnico.chave_pagamento,
+            func.coalesce(proprio_sq.c.total, 0) + func.coalesce(subs_sq.c.total, 0)
+        ).outerjoin(
+            proprio_sq, proprio_sq.c.tecnico_id == Tecnico.id
+        ).outerjoin(
+            subs_sq, subs_sq.c.tecnico_id == Tecnico.id
+        ).order_by(Tecnico.nome, Tecnico.id)
+
+        def rows():
+            for partition in ExportService.stream(stmt, yield_per=500).partitions():
+                ids = [r[0] for r in partition]
+                tags = {}
+                for tecnico_id, nome in db.session.execute(
+                    select(Tag.tecnico_id, TagDefinicao.nome).join(Tag.definicao).where(
+                        Tag.tecnico_id.in_(ids)
+                    ).order_by(Tag.id)
+                ):
+                    tags.setdefault(tecnico_id, []).append(nome)
+
+                for tid, nome, cidade, estado, status, valor, forma, chave, total in partition:
+                    yield (
+                        f"T-{str(tid).zfill(3)}", nome, cidade, estado, status,
+                        _money(valor), forma or '-', chave or '-', _money(total),
+                        ", ".join(tags.get(tid, []))
+                    )
+
+        return ExportDataset(
+            header=[
+                'ID', 'Nome', 'Cidade', 'Estado', 'Status', 'Valor/Atendimento',
+                'Banco', 'Chave', 'Total a Pagar', 'Tags'
+            ],
+            rows=rows(),
+            csv_row=lambda r: [
+                r[0], r[1], r[2], r[3], r[4], f"R$ {_comma(r[5])}",
+                r[6], r[7], f"R$ {_comma(r[8])}", r[9]
+            ]
+        )
+
+    # ==========================================================================
+    # FECHAMENTOS
+    # ==========================================================================
+
+    @staticmethod
+    def dataset_fechamento_contrato(cliente_id: int, data_inicio: date, data_fim: date,
+                                    estado: Optional[str] = None) -> ExportDataset:
+        """
+        Fechamento por contrato (mesmos filtros de ChamadoService.get_relatorio_faturamento).
+
+        Emite uma linha em branco e a linha TOTAL GERAL ao final.
+        """
+        stmt = select(
+            Chamado.data_atendimento, Chamado.codigo_chamado, Chamado.id,
+            Chamado.cidade, Tecnico.estado, CatalogoServico.nome,
+            Chamado.valor_receita_total
+        ).select_from(Chamado).join(
+            CatalogoServico, Chamado.catalogo_servico_id == CatalogoServico.id
+        ).join(
+            Cliente, CatalogoServico.cliente_id == Cliente.id
+        ).join(
+            Tecnico, Chamado.tecnico_id == Tecnico.id
+        ).where(
+            Cliente.id == int(cliente_id),
+            Chamado.data_atendimento >= data_inicio,
+            Chamado.data_atendimento <= data_fim
+        ).order_by(Chamado.data_atendimento, Chamado.id)
+
+        if estado:
+            stmt = stmt.where(Tecnico.estado == estado)
+
+        def rows():
+            total = Decimal('0.00')
+            for data, codigo, cid, cidade, uf, servico, valor in ExportService.stream(stmt):
+                valor = _money(valor)
+                total += valor
+                yield (data, codigo or f"ID-{cid}", cidade, uf or 'PB', servico, valor)
+            yield ()
+            yield (None, '', '', '', 'TOTAL GERAL', total)
+
+        return ExportDataset(
+            header=['Data', 'Código FSA', 'Cidade', 'Estado', 'Serviço', 'Valor Ticket'],
+            rows=rows(),
+            csv_row=lambda r: [_fmt_date(r[0]), r[1], r[2], r[3], r[4], str(float(r[5])).replace('.', ',')]
+        )
+
+    @staticmethod
+    def dataset_fechamento_cliente(cliente_id: int, mes: int, ano: int) -> ExportDataset:
+        """Fechamento mensal de um cliente (chamados concluídos e aprovados)."""
+        inicio = date(ano, mes, 1)
+        fim = date(ano + (mes // 12), mes % 12 + 1, 1)
+
+        stmt = select(
+            Chamado.data_atendimento, Chamado.loja, Chamado.cidade, Tecnico.nome,
+            Chamado.codigo_chamado, CatalogoServico.nome, Chamado.peca_usada,
+            Chamado.valor_receita_total
+        ).select_from(Chamado).join(
+            CatalogoServico, Chamado.catalogo_servico_id == CatalogoServico.id
+        ).outerjoin(
+            Tecnico, Chamado.tecnico_id == Tecnico.id
+        ).where(
+            CatalogoServico.cliente_id == cliente_id,
+            Chamado.data_atendimento >= inicio,
+            Chamado.data_atendimento < fim,
+            Chamado.status_chamado == 'Concluído',
+            Chamado.status_validacao == 'Aprovado'  # P0: Gate unificado
+        ).order_by(Chamado.data_atendimento, Chamado.id)
+
+        def rows():
+            for data, loja, cidade, tec_nome, codigo, servico, peca, receita in ExportService.stream(stmt):
+                yield (
+                    data, f"{loja or ''} {cidade}", tec_nome or 'N/A', codigo or '-',
+                    servico, peca or '-', _money(receita)
+                )
+
+        return ExportDataset(
+            header=['Data', 'Loja/Cidade', 'Técnico', 'FSA / Código', 'Serviço', 'Peça', 'Receita (R$)'],
+            rows=rows(),
+            csv_row=lambda r: [_fmt_date(r[0]), r[1], r[2], r[3], r[4], r[5], _comma(r[6])]
+        )
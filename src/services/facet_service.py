@@ -0,0 +1,230 @@
+"""
+FacetService - Contagens por valor de filtro (facetas) em uma única query.
+
+Para cada dimensão de filtro, conta quantos registros existem para cada valor
+considerando TODOS OS OUTROS filtros ativos (o filtro da própria dimensão é
+ignorado, senão só o valor selecionado apareceria). Evita o padrão de um
+COUNT por opção de filtro.
+
+    Postgres : GROUP BY GROUPING SETS ((dim1, rotulo1), (dim2, rotulo2), ...)
+               com COUNT(*) FILTER (WHERE <demais filtros>) por dimensão;
+               GROUPING() identifica a que conjunto cada linha pertence.
+    SQLite   : UNION ALL de um SELECT ... GROUP BY por dimensão (mesmo
+               statement, uma ida ao banco).
+
+Resultados cacheados brevemente (FACET_TTL) e invalidados por escrita nas
+tabelas envolvidas (utils/cache).
+"""
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, select, literal, cast, case, and_, or_, true, tuple_, String, union_all
+
+from ..models import db, Chamado, Tecnico, CatalogoServico
+from ..utils.cache import cached
+from .chamado_service import ChamadoService
+from .search_service import SearchService
+from .tag_service import TagService, TAG_TABLES
+
+
+FACET_TTL = 30
+MAX_VALORES = 50
+
+
+class Dimensao(NamedTuple):
+    """Dimensão de faceta: valor (como na query string), rótulo e filtro."""
+    valor: Any
+    rotulo: Any
+    condicao: Callable[[Any], Any]
+
+
+def _eq(coluna):
+    def cond(v):
+        if isinstance(v, (list, tuple)):
+            return coluna.in_(list(v))
+        return coluna == v
+    return cond
+
+
+def _congelar(filters: Optional[Dict]) -> tuple:
+    """dict de filtros -> tupla hashable (chave do cache); ignora vazios."""
+    itens = []
+    for k, v in (filters or {}).items():
+        if v in (None, '', [], ()):
+            continue
+        itens.append((k, tuple(v) if isinstance(v, (list, tuple)) else v))
+    return tuple(sorted(itens))
+
+
+class FacetService:
+
+    # =========================================================================
+    # MOTOR GENÉRICO
+    # =========================================================================
+
+    @staticmethod
+    def _contar(from_clause, dimensoes: Dict[str, Dimensao], ativos: Dict[str, Any],
+                base_conds: List) -> Dict[str, List[Dict]]:
+        """
+        Executa a contagem facetada.
+
+        Args:
+            from_clause: FROM (tabela ou join)
+            dimensoes: {nome: Dimensao}
+            ativos: {nome_dimensao: valor} filtros ativos por dimensão
+            base_conds: filtros que não são dimensões (busca, tags...)
+        """
+        conds = {}
+        for nome in dimensoes:
+            outras = [
+                dimensoes[d].condicao(v) for d, v in ativos.items()
+                if d != nome and d in dimensoes
+            ]
+            conds[nome] = and_(true(), *base_conds, *outras)
+
+        if db.session.get_bind().dialect.name == 'postgresql':
+            rows = FacetService._grouping_sets(from_clause, dimensoes, conds)
+        else:
+            rows = FacetService._union_all(from_clause, dimensoes, conds)
+
+        facetas = {nome: [] for nome in dimensoes}
+        for nome, valor, rotulo, total in rows:
+            if total:
+                facetas[nome].append({
+                    'valor': '' if valor is None else str(valor),
+                    'label': '' if rotulo is None else str(rotulo),
+                    'total': int(total)
+                })
+        for nome in facetas:
+            facetas[nome].sort(key=lambda f: (-f['total'], f['label']))
+            del facetas[nome][MAX_VALORES:]
+        return facetas
+
+    @staticmethod
+    def _grouping_sets(from_clause, dimensoes, conds):
+        cols = []
+        for nome, dim in dimensoes.items():
+            cols += [
+                dim.valor.label(f'v_{nome}'),
+                dim.rotulo.label(f'r_{nome}'),
+                func.grouping(dim.valor).label(f'g_{nome}'),
+                func.count().filter(conds[nome]).label(f'c_{nome}'),
+            ]
+        stmt = select(*cols).select_from(from_clause).where(
+            or_(*conds.values())
+        ).group_by(
+            func.grouping_sets(*[tuple_(dim.valor, dim.rotulo) for dim in dimensoes.values()])
+        )
+
+        resultado = []
+        for row in db.session.execute(stmt).mappings():
+            for nome in dimensoes:
+                if row[f'g_{nome}'] == 0:
+                    resultado.append((nome, row[f'v_{nome}'], row[f'r_{nome}'], row[f'c_{nome}']))
+                    break
+        return resultado
+
+    @staticmethod
+    def _union_all(from_clause, dimensoes, conds):
+        selects = [
+            select(
+                literal(nome).label('dimensao'),
+                cast(dim.valor, String).label('valor'),
+                cast(dim.rotulo, String).label('rotulo'),
+                func.count().label('total')
+            ).select_from(from_clause).where(conds[nome]).group_by(dim.valor, dim.rotulo)
+            for nome, dim in dimensoes.items()
+        ]
+        return [tuple(r) for r in db.session.execute(union_all(*selects))]
+
+    # =========================================================================
+    # CHAMADOS
+    # =========================================================================
+
+    @staticmethod
+    def chamados(filters: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """Facetas de /chamados: status, status_validacao, pago, tecnico, tipo."""
+        return FacetService._chamados_cached(_congelar(filters))
+
+    @staticmethod
+    @cached(tables=['chamados', 'tecnicos', 'catalogo_servicos'], maxsize=256, ttl=FACET_TTL)
+    def _chamados_cached(filtros: tuple) -> Dict[str, List[Dict]]:
+        f = dict(filtros)
+        pago_expr = case((Chamado.pago.is_(True), 'sim'), else_='nao')
+
+        dimensoes = {
+            'status': Dimensao(Chamado.status_chamado, Chamado.status_chamado, _eq(Chamado.status_chamado)),
+            'status_validacao': Dimensao(
+                Chamado.status_validacao, Chamado.status_validacao, _eq(Chamado.status_validacao)
+            ),
+            # Mesmo predicado da listagem (ChamadoService.get_all)
+            'pago': Dimensao(pago_expr, pago_expr, ChamadoService.filtro_pago),
+            'tecnico': Dimensao(Chamado.tecnico_id, Tecnico.nome, lambda v: Chamado.tecnico_id == int(v)),
+            'tipo': Dimensao(CatalogoServico.nome, CatalogoServico.nome, _eq(CatalogoServico.nome)),
+        }
+        ativos = {
+            'status': f.get('status'),
+            'status_validacao': f.get('status_validacao'),
+            'pago': f.get('pago'),
+            'tecnico': f.get('tecnico_id'),
+            'tipo': f.get('tipo'),
+        }
+        ativos = {k: v for k, v in ativos.items() if v not in (None, '', ())}
+
+        base_conds = []
+        if f.get('search'):
+            chamado_ids = SearchService.match_ids('chamado', f['search'])
+            if chamado_ids is not None:
+                base_conds.append(or_(
+                    Chamado.id.in_(chamado_ids),
+                    Chamado.tecnico_id.in_(SearchService.match_ids('tecnico', f['search']))
+                ))
+
+        from_clause = Chamado.__table__.join(
+            Tecnico.__table__, Chamado.tecnico_id == Tecnico.id
+        ).outerjoin(
+            CatalogoServico.__table__, Chamado.catalogo_servico_id == CatalogoServico.id
+        )
+        return FacetService._contar(from_clause, dimensoes, ativos, base_conds)
+
+    # =========================================================================
+    # TÉCNICOS
+    # =========================================================================
+
+    @staticmethod
+    def tecnicos(filters: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """Facetas de /tecnicos: estado, status e situação de pagamento."""
+        return FacetService._tecnicos_cached(_congelar(filters))
+
+    @staticmethod
+    @cached(tables=['tecnicos', 'chamados'] + TAG_TABLES, maxsize=256, ttl=FACET_TTL)
+    def _tecnicos_cached(filtros: tuple) -> Dict[str, List[Dict]]:
+        f = dict(filtros)
+
+        pend_sq = db.session.query(
+            Chamado.tecnico_id.label('tecnico_id'),
+            func.sum(func.coalesce(Chamado.custo_atribuido, 0)).label('total_pendente')
+        ).filter(Chamado.pendente_pagamento_condition()).group_by(Chamado.tecnico_id).subquery()
+        pagamento_expr = case(
+            (func.coalesce(pend_sq.c.total_pendente, 0) > 0, 'Pendente'), else_='Pago'
+        )
+
+        dimensoes = {
+            'estado': Dimensao(Tecnico.estado, Tecnico.estado, _eq(Tecnico.estado)),
+            'status': Dimensao(Tecnico.status, Tecnico.status, _eq(Tecnico.status)),
+            'pagamento': Dimensao(pagamento_expr, pagamento_expr, lambda v: pagamento_expr == v),
+        }
+        ativos = {k: f[k] for k in dimensoes if f.get(k)}
+
+        base_conds = []
+        if f.get('search'):
+            ids = SearchService.match_ids('tecnico', f['search'])
+            if ids is not None:
+                base_conds.append(Tecnico.id.in_(ids))
+        if f.get('tag'):
+            tag_cond = TagService.tecnico_condition(list(f['tag']) if isinstance(f['tag'], tuple) else f['tag'],
+                                                    f.get('tag_modo', 'qualquer'))
+            if tag_cond is not None:
+                base_conds.append(tag_cond)
+
+        from_clause = Tecnico.__table__.outerjoin(pend_sq, pend_sq.c.tecnico_id == Tecnico.id)
+        return FacetService._contar(from_clause, dimensoes, ativos, base_conds)
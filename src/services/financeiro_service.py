@@ -126,10 +126,8 @@ def task_processar_lote(tecnicos_ids, inicio_str, fim_str):
 
                     # Gate Unificado: Só processa APROVADOS
                     chamados_proprios = tecnico.chamados.filter(
+                        Chamado.pendente_pagamento_condition(),
                         Chamado.status_chamado == 'Concluído',
-                        Chamado.status_validacao == 'Aprovado',
-                        Chamado.pago == False,
-                        Chamado.pagamento_id == None,
                         Chamado.data_atendimento >= inicio,
                         Chamado.data_atendimento <= fim
                     ).all()
@@ -137,10 +135,8 @@ def task_processar_lote(tecnicos_ids, inicio_str, fim_str):
                     chamados_sub = []
                     for sub in tecnico.sub_tecnicos:
                         chamados_sub.extend(sub.chamados.filter(
+                            Chamado.pendente_pagamento_condition(),
                             Chamado.status_chamado == 'Concluído',
-                            Chamado.status_validacao == 'Aprovado',
-                            Chamado.pago == False,
-                            Chamado.pagamento_id == None,
                             Chamado.data_atendimento >= inicio,
                             Chamado.data_atendimento <= fim
                         ).all())
@@ -356,19 +352,15 @@ class FinanceiroService:
             
         # P0: UNIFICAR GATE - Exigir status_validacao == 'Aprovado'
         chamados_proprios = tecnico.chamados.filter(
-            Chamado.status_chamado == 'Concluído',
-            Chamado.status_validacao == 'Aprovado',  # P0: Gate unificado
-            Chamado.pago == False,
-            Chamado.pagamento_id == None
+            Chamado.pendente_pagamento_condition(),  # P0: Gate unificado
+            Chamado.status_chamado == 'Concluído'
         ).all()
         
         chamados_sub = []
         for sub in tecnico.sub_tecnicos:
             chamados_sub.extend(sub.chamados.filter(
-                Chamado.status_chamado == 'Concluído',
-                Chamado.status_validacao == 'Aprovado',  # P0: Gate unificado
-                Chamado.pago == False,
-                Chamado.pagamento_id == None
+                Chamado.pendente_pagamento_condition(),  # P0: Gate unificado
+                Chamado.status_chamado == 'Concluído'
             ).all())
             
         chamados_todos = chamados_proprios + chamados_sub
@@ -562,10 +554,8 @@ class FinanceiroService:
             Chamado, Tecnico.id == Chamado.tecnico_id
         ).filter(
             Tecnico.status == 'Ativo',
+            Chamado.pendente_pagamento_condition(),  # P0: Gate unificado (índice parcial)
             Chamado.status_chamado == 'Concluído',
-            Chamado.status_validacao == 'Aprovado',  # P0: Gate unificado
-            Chamado.pago == False,
-            Chamado.pagamento_id == None,
             Chamado.data_atendimento >= data_inicio,
             Chamado.data_atendimento <= data_fim
         ).group_by(
@@ -0,0 +1,178 @@
+"""
+KpiSnapshotService - Snapshots diários dos indicadores do cockpit (kpi_diario).
+
+    capturar(dia)         : grava/atualiza a linha do dia com os valores atuais
+                            (job noturno, scripts/kpi_snapshot.py)
+    backfill(inicio, fim) : reconstrói dias passados a partir do histórico
+    serie(inicio, fim)    : série temporal para gráficos (range scan em data)
+
+Reconstrução no backfill:
+    finalizados     : chamados 'Concluído' por data_atendimento (exato)
+    fila_validacao  : chamados em lote criados até o fim do dia e ainda não
+                      validados/rejeitados naquele momento (data_validacao /
+                      data_rejeicao)
+    tecnicos_ativos : técnicos hoje 'Ativo' com data_inicio <= dia
+                      (aproximação: não há histórico de status)
+    estoque         : sem histórico de saldo -> NULL
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, or_, and_
+
+from ..models import db, Chamado, Tecnico, TecnicoStock, KpiDiario
+
+
+# Mesmo limite dos alertas do cockpit (StockService.get_alertas_dashboard)
+LIMITE_ESTOQUE_BAIXO = 10
+MAX_DIAS_SERIE = 3660
+
+
+class KpiSnapshotService:
+
+    # =========================================================================
+    # MÉTRICAS
+    # =========================================================================
+
+    @staticmethod
+    def _fila_validacao(ate: Optional[datetime] = None) -> int:
+        """Pendentes de validação agora, ou no instante `ate` (backfill)."""
+        query = Chamado.query.filter(Chamado.batch_id.isnot(None))
+        if ate is None:
+            return query.filter(Chamado.status_validacao == 'Pendente').count()
+
+        saida = func.coalesce(Chamado.data_validacao, Chamado.data_rejeicao)
+        return query.filter(
+            Chamado.data_criacao < ate,
+            or_(
+                and_(Chamado.status_validacao == 'Pendente', saida.is_(None)),
+                saida >= ate
+            )
+        ).count()
+
+    @staticmethod
+    def _finalizados(inicio: date, fim: date) -> Dict[date, int]:
+        rows = db.session.query(
+            Chamado.data_atendimento, func.count(Chamado.id)
+        ).filter(
+            Chamado.status_chamado == 'Concluído',
+            Chamado.data_atendimento >= inicio,
+            Chamado.data_atendimento <= fim
+        ).group_by(Chamado.data_atendimento).all()
+        return {d: n for d, n in rows}
+
+    @staticmethod
+    def _tecnicos_ativos(ate: Optional[date] = None) -> int:
+        query = Tecnico.query.filter(Tecnico.status == 'Ativo')
+        if ate is not None:
+            query = query.filter(Tecnico.data_inicio <= ate)
+        return query.count()
+
+    @staticmethod
+    def _estoque() -> Dict[str, int]:
+        pecas = db.session.query(
+            func.coalesce(func.sum(TecnicoStock.quantidade), 0)
+        ).filter(TecnicoStock.quantidade > 0).scalar()
+
+        abaixo = db.session.query(TecnicoStock.item_lpu_id).group_by(
+            TecnicoStock.item_lpu_id
+        ).having(func.sum(TecnicoStock.quantidade) < LIMITE_ESTOQUE_BAIXO).subquery()
+        itens_baixo = db.session.query(func.count()).select_from(abaixo).scalar()
+
+        return {'pecas_em_campo': int(pecas or 0), 'itens_estoque_baixo': int(itens_baixo or 0)}
+
+    # =========================================================================
+    # GRAVAÇÃO
+    # =========================================================================
+
+    @staticmethod
+    def _upsert(dia: date, valores: Dict, origem: str) -> KpiDiario:
+        linha = KpiDiario.query.filter_by(data=dia).first()
+        if linha is None:
+            linha = KpiDiario(data=dia)
+            db.session.add(linha)
+        for campo, valor in valores.items():
+            setattr(linha, campo, valor)
+        linha.origem = origem
+        linha.calculado_em = datetime.utcnow()
+        return linha
+
+    @staticmethod
+    def capturar(dia: Optional[date] = None) -> KpiDiario:
+        """
+        Snapshot do dia (default: hoje) com os valores deste momento.
+        Idempotente: reexecutar no mesmo dia atualiza a linha.
+        """
+        dia = dia or date.today()
+        valores = {
+            'fila_validacao': KpiSnapshotService._fila_validacao(),
+            'finalizados': KpiSnapshotService._finalizados(dia, dia).get(dia, 0),
+            'tecnicos_ativos': KpiSnapshotService._tecnicos_ativos(),
+        }
+        valores.update(KpiSnapshotService._estoque())
+        linha = KpiSnapshotService._upsert(dia, valores, 'snapshot')
+        # db.session.commit() # Caller deve commitar
+        return linha
+
+    @staticmethod
+    def backfill(inicio: date, fim: date, sobrescrever: bool = False) -> int:
+        """
+        Reconstrói [inicio, fim] a partir do histórico. Dias que já têm
+        snapshot são preservados, salvo `sobrescrever`. Retorna dias gravados.
+        """
+        if fim < inicio:
+            raise ValueError("fim deve ser maior ou igual a inicio")
+
+        existentes = {
+            d for (d,) in db.session.query(KpiDiario.data).filter(
+                KpiDiario.data >= inicio, KpiDiario.data <= fim
+            )
+        }
+        finalizados = KpiSnapshotService._finalizados(inicio, fim)
+
+        gravados = 0
+        dia = inicio
+        while dia <= fim:
+            if sobrescrever or dia not in existentes:
+                fim_do_dia = datetime.combine(dia + timedelta(days=1), datetime.min.time())
+                KpiSnapshotService._upsert(dia, {
+                    'fila_validacao': KpiSnapshotService._fila_validacao(ate=fim_do_dia),
+                    'finalizados': finalizados.get(dia, 0),
+                    'tecnicos_ativos': KpiSnapshotService._tecnicos_ativos(ate=dia),
+                    'pecas_em_campo': None,
+                    'itens_estoque_baixo': None,
+                }, 'backfill')
+                gravados += 1
+            dia += timedelta(days=1)
+        # db.session.commit() # Caller deve commitar
+        return gravados
+
+    # =========================================================================
+    # LEITURA
+    # =========================================================================
+
+    @staticmethod
+    def serie(inicio: date, fim: date, metricas: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Série diária de [inicio, fim] (range scan no índice único de data).
+
+        Returns:
+            {'labels': [iso...], 'series': {metrica: [valor|None...]}, 'origem': [...]}
+            Dias sem snapshot são omitidos (labels trazem as datas presentes).
+        """
+        if fim < inicio:
+            raise ValueError("fim deve ser maior ou igual a inicio")
+        if (fim - inicio).days > MAX_DIAS_SERIE:
+            raise ValueError(f"Período máximo: {MAX_DIAS_SERIE} dias")
+
+        metricas = [m for m in (metricas or KpiDiario.METRICAS) if m in KpiDiario.METRICAS]
+        colunas = [getattr(KpiDiario, m) for m in metricas]
+        rows = db.session.query(KpiDiario.data, KpiDiario.origem, *colunas).filter(
+            KpiDiario.data >= inicio, KpiDiario.data <= fim
+        ).order_by(KpiDiario.data).all()
+
+        return {
+            'labels': [r.data.isoformat() for r in rows],
+            'series': {m: [getattr(r, m) for r in rows] for m in metricas},
+            'origem': [r.origem for r in rows],
+        }
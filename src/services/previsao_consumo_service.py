@@ -0,0 +1,286 @@
+"""
+PrevisaoConsumoService - Taxa de consumo e sugestão de reposição por
+(técnico, item).
+
+Job (scripts/previsao_consumo.py, diário):
+    1. SQL: USO agregado por (técnico, item, dia) na janela (PREVISAO_JANELA_DIAS)
+    2. pandas: matriz dias x pares (dias sem uso = 0) e, de forma vetorizada
+       em todas as colunas, a média móvel exponencial do consumo diário
+       (meia-vida PREVISAO_MEIA_VIDA_DIAS: reage a acelerações sem esquecer
+       a janela)
+    3. saldo atual (TecnicoStock) e solicitações em aberto por par
+    4. dias de cobertura = saldo / consumo diário
+       sugestão = ceil(consumo diário x (prazo de entrega + cobertura alvo))
+                  - saldo - solicitações em aberto   (mínimo 0)
+    5. tabela previsao_consumo regravada em uma transação
+
+A tabela alimenta o resumo de estoque do dashboard e pré-preenche
+solicitações de reposição (criar_solicitacoes).
+"""
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import joinedload
+
+from ..models import (
+    db, JobRun, PrevisaoConsumo, SolicitacaoReposicao, StockMovement, TecnicoStock
+)
+from .stock_report_service import StockReportService
+
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'previsao_consumo'
+
+DEFAULT_JANELA_DIAS = 90
+DEFAULT_MEIA_VIDA_DIAS = 14
+DEFAULT_PRAZO_ENTREGA_DIAS = 7
+DEFAULT_COBERTURA_DIAS = 30
+
+# Solicitações que já cobrem parte da necessidade
+STATUS_EM_ABERTO = ('Pendente', 'Aprovada')
+
+
+def _config(chave: str, default: int) -> int:
+    return int(current_app.config.get(chave, default))
+
+
+class PrevisaoConsumoService:
+
+    # =========================================================================
+    # CÁLCULO
+    # =========================================================================
+
+    @staticmethod
+    def _uso_diario(inicio: date, fim: date) -> pd.DataFrame:
+        dia = func.date(StockMovement.data_criacao)
+        rows = db.session.execute(
+            select(
+                StockMovement.origem_tecnico_id, StockMovement.item_lpu_id,
+                dia, func.sum(StockMovement.quantidade)
+            ).where(
+                StockMovement.tipo_movimento == 'USO',
+                StockMovement.origem_tecnico_id.isnot(None),
+                StockReportService.periodo_filter(StockMovement.data_criacao, inicio, fim)
+            ).group_by(StockMovement.origem_tecnico_id, StockMovement.item_lpu_id, dia)
+        ).all()
+        return pd.DataFrame(rows, columns=['tecnico_id', 'item_lpu_id', 'dia', 'quantidade'])
+
+    @staticmethod
+    def _por_par(stmt, coluna: str) -> pd.DataFrame:
+        return pd.DataFrame(
+            db.session.execute(stmt).all(), columns=['tecnico_id', 'item_lpu_id', coluna]
+        )
+
+    @staticmethod
+    def calcular(hoje: Optional[date] = None) -> pd.DataFrame:
+        """
+        Previsão para os pares com USO na janela.
+
+        Returns:
+            DataFrame com tecnico_id, item_lpu_id, consumo_janela,
+            consumo_diario, saldo_atual, dias_cobertura, quantidade_sugerida
+        """
+        hoje = hoje or date.today()
+        janela = _config('PREVISAO_JANELA_DIAS', DEFAULT_JANELA_DIAS)
+        meia_vida = _config('PREVISAO_MEIA_VIDA_DIAS', DEFAULT_MEIA_VIDA_DIAS)
+        horizonte = (_config('PREVISAO_PRAZO_ENTREGA_DIAS', DEFAULT_PRAZO_ENTREGA_DIAS)
+                     + _config('PREVISAO_COBERTURA_DIAS', DEFAULT_COBERTURA_DIAS))
+        inicio = hoje - timedelta(days=janela - 1)
+
+        uso = PrevisaoConsumoService._uso_diario(inicio, hoje)
+        if uso.empty:
+            return pd.DataFrame(columns=[
+                'tecnico_id', 'item_lpu_id', 'consumo_janela', 'consumo_diario',
+                'saldo_atual', 'dias_cobertura', 'quantidade_sugerida'
+            ])
+
+        # Matriz dias x (técnico, item), com os dias sem uso preenchidos
+        uso['dia'] = pd.to_datetime(uso['dia'])
+        serie = uso.pivot_table(
+            index='dia', columns=['tecnico_id', 'item_lpu_id'],
+            values='quantidade', aggfunc='sum', fill_value=0
+        ).reindex(pd.date_range(inicio, hoje, freq='D'), fill_value=0)
+
+        res = pd.DataFrame({
+            'consumo_janela': serie.sum(),
+            'consumo_diario': serie.ewm(halflife=meia_vida).mean().iloc[-1],
+        }).reset_index()
+
+        saldos = PrevisaoConsumoService._por_par(
+            select(TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id, TecnicoStock.quantidade)
+            .where(TecnicoStock.tecnico_id.in_(uso['tecnico_id'].unique().tolist())),
+            'saldo_atual'
+        )
+        abertas = PrevisaoConsumoService._por_par(
+            select(
+                SolicitacaoReposicao.tecnico_id, SolicitacaoReposicao.item_lpu_id,
+                func.sum(SolicitacaoReposicao.quantidade)
+            ).where(SolicitacaoReposicao.status.in_(STATUS_EM_ABERTO)).group_by(
+                SolicitacaoReposicao.tecnico_id, SolicitacaoReposicao.item_lpu_id
+            ),
+            'em_aberto'
+        )
+        res = res.merge(saldos, how='left', on=['tecnico_id', 'item_lpu_id']).merge(
+            abertas, how='left', on=['tecnico_id', 'item_lpu_id']
+        )
+        res[['saldo_atual', 'em_aberto']] = res[['saldo_atual', 'em_aberto']].fillna(0).astype(int)
+
+        taxa = res['consumo_diario'].to_numpy(dtype=float)
+        saldo = res['saldo_atual'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            res['dias_cobertura'] = np.where(taxa > 0, np.round(saldo / taxa, 1), np.nan)
+        res['quantidade_sugerida'] = np.maximum(
+            0, np.ceil(np.round(taxa * horizonte - saldo - res['em_aberto'].to_numpy(), 6))
+        ).astype(int)
+        res['consumo_diario'] = res['consumo_diario'].round(4)
+        return res.drop(columns=['em_aberto'])
+
+    @staticmethod
+    def atualizar(hoje: Optional[date] = None) -> int:
+        """
+        Recalcula e regrava previsao_consumo (DELETE + INSERT em lote).
+
+        Returns:
+            pares gravados
+        """
+        res = PrevisaoConsumoService.calcular(hoje)
+        agora = datetime.utcnow()
+        linhas = [
+            {
+                'tecnico_id': int(r.tecnico_id),
+                'item_lpu_id': int(r.item_lpu_id),
+                'consumo_janela': int(r.consumo_janela),
+                'consumo_diario': float(r.consumo_diario),
+                'saldo_atual': int(r.saldo_atual),
+                'dias_cobertura': None if pd.isna(r.dias_cobertura) else float(r.dias_cobertura),
+                'quantidade_sugerida': int(r.quantidade_sugerida),
+                'calculado_em': agora,
+            }
+            for r in res.itertuples(index=False)
+        ]
+        db.session.execute(delete(PrevisaoConsumo))
+        if linhas:
+            db.session.execute(insert(PrevisaoConsumo), linhas)
+        # db.session.commit() # Caller deve commitar
+        return len(linhas)
+
+    @staticmethod
+    def executar_job(hoje: Optional[date] = None) -> JobRun:
+        """
+        Executa atualizar() registrando um JobRun ('previsao_consumo').
+
+        WARNING: JOB BOUNDARY - commita o resultado e o JobRun.
+        """
+        job = JobRun(job_name=JOB_NAME, status='RUNNING')
+        db.session.add(job)
+        db.session.commit()
+
+        try:
+            pares = PrevisaoConsumoService.atualizar(hoje)
+            job.status = 'COMPLETED'
+            job.total_items = pares
+            job.success_count = pares
+            job.log_text = json.dumps({'pares': pares})
+            job.end_time = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("[PREVISAO] Falha no job #%s", job.id)
+            job.status = 'FAILED'
+            job.log_text = str(e)
+            job.end_time = datetime.utcnow()
+            db.session.commit()
+            raise
+
+        logger.info("[PREVISAO] Job #%s: %s par(es)", job.id, job.total_items)
+        return job
+
+    # =========================================================================
+    # LEITURA
+    # =========================================================================
+
+    @staticmethod
+    def sugestoes(limite: int = 50, apenas_com_sugestao: bool = True) -> List[Dict]:
+        """Pares ordenados pela menor cobertura (sem consumo por último)."""
+        query = PrevisaoConsumo.query.options(
+            joinedload(PrevisaoConsumo.tecnico), joinedload(PrevisaoConsumo.item_lpu)
+        )
+        if apenas_com_sugestao:
+            query = query.filter(PrevisaoConsumo.quantidade_sugerida > 0)
+        rows = query.order_by(
+            PrevisaoConsumo.dias_cobertura.is_(None),
+            PrevisaoConsumo.dias_cobertura,
+            PrevisaoConsumo.id
+        ).limit(limite).all()
+        return [r.to_dict() for r in rows]
+
+    @staticmethod
+    def resumo(limite: int = 5) -> Dict:
+        """Bloco do resumo de estoque: pares em risco e principais sugestões."""
+        prazo = _config('PREVISAO_PRAZO_ENTREGA_DIAS', DEFAULT_PRAZO_ENTREGA_DIAS)
+        em_risco = db.session.query(func.count(PrevisaoConsumo.id)).filter(
+            PrevisaoConsumo.dias_cobertura <= prazo
+        ).scalar()
+        return {
+            'em_risco': int(em_risco or 0),
+            'prazo_entrega_dias': prazo,
+            'sugestoes': PrevisaoConsumoService.sugestoes(limite=limite),
+        }
+
+    # =========================================================================
+    # SOLICITAÇÕES PRÉ-PREENCHIDAS
+    # =========================================================================
+
+    @staticmethod
+    def criar_solicitacoes(previsao_ids: Iterable[int], user_id: Optional[int]) -> List[SolicitacaoReposicao]:
+        """
+        Cria solicitações 'Pendente' com a quantidade sugerida. Pares que já
+        têm solicitação em aberto ou sem sugestão são ignorados.
+
+        Raises:
+            ValueError: nenhuma previsão informada
+        """
+        ids = {int(i) for i in previsao_ids}
+        if not ids:
+            raise ValueError("Nenhuma sugestão selecionada.")
+
+        previsoes = PrevisaoConsumo.query.filter(
+            PrevisaoConsumo.id.in_(ids), PrevisaoConsumo.quantidade_sugerida > 0
+        ).all()
+        abertas = {
+            (t, i) for t, i in db.session.query(
+                SolicitacaoReposicao.tecnico_id, SolicitacaoReposicao.item_lpu_id
+            ).filter(
+                SolicitacaoReposicao.status.in_(STATUS_EM_ABERTO),
+                SolicitacaoReposicao.tecnico_id.in_({p.tecnico_id for p in previsoes} or {0})
+            )
+        }
+
+        criadas = []
+        for p in previsoes:
+            if (p.tecnico_id, p.item_lpu_id) in abertas:
+                continue
+            cobertura = f"{float(p.dias_cobertura):.1f} dia(s)" if p.dias_cobertura is not None else "-"
+            solicitacao = SolicitacaoReposicao(
+                tecnico_id=p.tecnico_id,
+                item_lpu_id=p.item_lpu_id,
+                quantidade=p.quantidade_sugerida,
+                status='Pendente',
+                justificativa=(
+                    f"Sugestão automática: consumo {float(p.consumo_diario):.2f}/dia, "
+                    f"saldo {p.saldo_atual}, cobertura {cobertura}."
+                ),
+                created_by_id=user_id
+            )
+            db.session.add(solicitacao)
+            criadas.append(solicitacao)
+        db.session.flush()
+        # db.session.commit() # Caller deve commitar
+        return criadas
@@ -0,0 +1,118 @@
+"""
+ReferenceDataService - Snapshot versionado dos catálogos (clientes, serviços, LPU).
+
+Os catálogos mudam raramente, mas eram recarregados (e serializados) a cada
+request: /api/dados_contrato fazia Cliente.to_dict() com relacionamentos
+dinâmicos (2 queries por cliente) a cada abertura do formulário de chamado.
+
+O snapshot é montado com 3 queries (clientes, serviços e itens em lote),
+mantido em memória via utils/cache (invalidado quando clientes,
+catalogo_servicos ou itens_lpu são escritos, inclusive em outros workers via
+cache_bus) e cada seção é servida já serializada, com ETag forte derivado do
+conteúdo. Como o hash é do conteúdo, todos os workers geram o mesmo ETag e o
+navegador recebe 304 ao revalidar com If-None-Match.
+"""
+import hashlib
+import json
+from collections import defaultdict
+from typing import Dict, NamedTuple
+
+from flask import Response, request
+
+from ..models import db, Cliente, CatalogoServico, ItemLPU
+from ..utils.cache import cached
+
+
+class ReferenceSection(NamedTuple):
+    """Seção serializada do snapshot."""
+    body: bytes
+    etag: str
+
+
+class ReferenceDataService:
+
+    SECTIONS = ('contratos', 'itens_estoque', 'pecas')
+
+    @staticmethod
+    @cached(tables=['clientes', 'catalogo_servicos', 'itens_lpu'], maxsize=1)
+    def snapshot() -> Dict[str, ReferenceSection]:
+        """
+        Monta todas as seções de uma vez. Retorna {secao: ReferenceSection}.
+
+        Seções:
+            contratos     : {'clientes': [...]} no formato de Cliente.to_dict()
+            itens_estoque : ItemLPU.to_dict() dos itens de estoque (cliente_id NULL)
+            pecas         : peças únicas por nome (id, nome, valor_receita, valor_custo)
+        """
+        clientes = db.session.query(Cliente).filter(
+            Cliente.ativo.is_(True)
+        ).order_by(Cliente.nome).all()
+        cliente_ids = [c.id for c in clientes]
+
+        servicos_por_cliente = defaultdict(list)
+        itens_por_cliente = defaultdict(list)
+        if cliente_ids:
+            for s in CatalogoServico.query.filter(
+                CatalogoServico.cliente_id.in_(cliente_ids)
+            ).order_by(CatalogoServico.id):
+                servicos_por_cliente[s.cliente_id].append(s.to_dict())
+
+        itens_estoque = []
+        pecas, vistos = [], set()
+        for item in ItemLPU.query.order_by(ItemLPU.nome, ItemLPU.id):
+            if item.cliente_id is None:
+                itens_estoque.append(item.to_dict())
+            else:
+                itens_por_cliente[item.cliente_id].append(item.to_dict())
+            if item.nome not in vistos:
+                vistos.add(item.nome)
+                pecas.append({
+                    'id': item.id,
+                    'nome': item.nome,
+                    'valor_receita': float(item.valor_receita or 0),
+                    'valor_custo': float(item.valor_custo or 0)
+                })
+        for lista in itens_por_cliente.values():
+            lista.sort(key=lambda i: i['id'])
+
+        contratos = {'clientes': [
+            {
+                'id': c.id,
+                'nome': c.nome,
+                'ativo': c.ativo,
+                'servicos': servicos_por_cliente.get(c.id, []),
+                'lpu': itens_por_cliente.get(c.id, [])
+            }
+            for c in clientes
+        ]}
+
+        return {
+            'contratos': ReferenceDataService._serialize(contratos),
+            'itens_estoque': ReferenceDataService._serialize(itens_estoque),
+            'pecas': ReferenceDataService._serialize(pecas)
+        }
+
+    @staticmethod
+    def _serialize(data) -> ReferenceSection:
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return ReferenceSection(body=body, etag=hashlib.sha256(body).hexdigest()[:32])
+
+    @staticmethod
+    def get(section: str):
+        """Conteúdo desserializado de uma seção (para uso em templates)."""
+        return json.loads(ReferenceDataService.snapshot()[section].body)
+
+    @staticmethod
+    def response(section: str) -> Response:
+        """
+        Resposta JSON da seção com ETag forte.
+
+        Cache-Control: private, no-cache -> o navegador guarda, mas revalida
+        sempre (If-None-Match) e recebe 304 sem corpo se nada mudou.
+        """
+        data = ReferenceDataService.snapshot()[section]
+        resp = Response(data.body, mimetype='application/json')
+        resp.set_etag(data.etag)
+        resp.cache_control.private = True
+        resp.cache_control.no_cache = True
+        return resp.make_conditional(request)
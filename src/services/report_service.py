@@ -4,6 +4,8 @@ from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 from decimal import Decimal
 
+from ..utils.cache import cached
+
 
 class ReportService:
     """
@@ -218,11 +220,15 @@ class ReportService:
         return data[:limit]
 
     @staticmethod
+    @cached(tables=['chamados', 'tecnicos', 'itens_lpu', 'stock_movements'], maxsize=64, ttl=300)
     def kpis_dashboard(inicio: date = None, fim: date = None) -> dict:
         """
         Retorna todos os KPIs de ROI consolidados para o dashboard.
         Otimizado para uma única chamada.
 
+        Cacheado por (inicio, fim); TTL de 5 min porque os defaults dependem
+        de date.today().
+
         Returns:
             {
                 'margem_global': {...},
@@ -313,9 +319,7 @@ class ReportService:
             func.count(Chamado.id).label('qtd'),
             func.coalesce(func.sum(Chamado.custo_atribuido), 0).label('valor')
         ).filter(
-            Chamado.status_chamado.in_(['Concluído', 'SPARE']),
-            Chamado.pago == False,
-            Chamado.pagamento_id == None,
+            Chamado.pendente_pagamento_condition(),  # P0: Gate unificado (índice parcial)
             Chamado.custo_atribuido > 0
         ).first()
 
@@ -0,0 +1,181 @@
+"""
+SearchService - Busca textual indexada e insensível a acentos.
+
+Substitui os ILIKE '%termo%' (full scan a cada busca) por índices:
+
+    Postgres : GIN pg_trgm sobre funções IMMUTABLE (migration a014)
+                   tecnico_search_doc(nome, cidade, documento)
+                   chamado_search_doc(codigo_chamado, fsa_codes, loja, observacoes)
+                   search_normalize(itens_lpu.nome)
+               Cada palavra do termo vira um LIKE '%palavra%' (servido pelo
+               trigram); ranking por word_similarity.
+    SQLite   : tabelas FTS5 search_fts_* (ver models.SEARCH_FTS_SOURCES),
+               cada palavra como prefixo ("palavra"*); ranking por bm25.
+
+Uso:
+    - match_ids(entidade, termo): subquery de ids para filtros de listagem
+    - search(q, tipos, limit): busca unificada ranqueada (/api/search)
+"""
+import re
+import unicodedata
+from typing import Dict, List, Optional, Iterable
+
+from flask import url_for
+from sqlalchemy import func, text, select, and_, Integer, Float
+
+from ..models import db, Tecnico, Chamado, ItemLPU
+
+
+ENTIDADES = ('tecnico', 'chamado', 'item')
+
+# tabela FTS (SQLite) e pesos bm25 por coluna (mesma ordem de SEARCH_FTS_SOURCES)
+_FTS = {
+    'tecnico': ('search_fts_tecnicos', '10.0, 3.0, 5.0'),
+    'chamado': ('search_fts_chamados', '10.0, 8.0, 3.0, 1.0'),
+    'item': ('search_fts_itens', '1.0'),
+}
+
+MAX_LIMIT = 50
+
+
+def normalize(termo: str) -> str:
+    """Minúsculas e sem acentos (mesma normalização do índice)."""
+    decomposed = unicodedata.normalize('NFKD', termo or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokens(termo: str) -> List[str]:
+    return re.findall(r'\w+', normalize(termo))
+
+
+class SearchService:
+
+    @staticmethod
+    def _is_postgres() -> bool:
+        return db.session.get_bind().dialect.name == 'postgresql'
+
+    @staticmethod
+    def _pg_document(entidade: str):
+        if entidade == 'tecnico':
+            return func.tecnico_search_doc(Tecnico.nome, Tecnico.cidade, Tecnico.documento)
+        if entidade == 'chamado':
+            return func.chamado_search_doc(
+                Chamado.codigo_chamado, Chamado.fsa_codes, Chamado.loja, Chamado.observacoes
+            )
+        return func.search_normalize(ItemLPU.nome)
+
+    @staticmethod
+    def _model(entidade: str):
+        return {'tecnico': Tecnico, 'chamado': Chamado, 'item': ItemLPU}[entidade]
+
+    @staticmethod
+    def _fts_query(palavras: Iterable[str]) -> str:
+        return ' '.join(f'"{p}"*' for p in palavras)
+
+    @staticmethod
+    def _pg_conditions(entidade: str, palavras: List[str]):
+        doc = SearchService._pg_document(entidade)
+        escaped = [p.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') for p in palavras]
+        return doc, and_(*[doc.like(f'%{p}%', escape='\\') for p in escaped])
+
+    @staticmethod
+    def _ranked(entidade: str, palavras: List[str], limit: int):
+        """SELECT (id, score) das ocorrências, maior score primeiro."""
+        if SearchService._is_postgres():
+            model = SearchService._model(entidade)
+            doc, cond = SearchService._pg_conditions(entidade, palavras)
+            score = func.word_similarity(' '.join(palavras), doc)
+            return select(model.id.label('id'), score.label('score')).where(cond).order_by(
+                score.desc(), model.id.desc()
+            ).limit(limit)
+
+        fts, pesos = _FTS[entidade]
+        return text(
+            f"SELECT rowid AS id, -bm25({fts}, {pesos}) AS score FROM {fts} "
+            f"WHERE {fts} MATCH :q ORDER BY score DESC, rowid DESC LIMIT :limit"
+        ).bindparams(q=SearchService._fts_query(palavras), limit=limit).columns(
+            id=Integer, score=Float
+        )
+
+    @staticmethod
+    def match_ids(entidade: str, termo: str):
+        """
+        Subquery com os ids que casam com `termo` (para Model.id.in_(...)).
+        Retorna None se o termo não tiver palavras (não filtrar).
+        """
+        palavras = tokens(termo)
+        if not palavras:
+            return None
+
+        if SearchService._is_postgres():
+            model = SearchService._model(entidade)
+            _, cond = SearchService._pg_conditions(entidade, palavras)
+            return select(model.id).where(cond)
+
+        fts, _ = _FTS[entidade]
+        sub = text(f"SELECT rowid AS id FROM {fts} WHERE {fts} MATCH :q").bindparams(
+            q=SearchService._fts_query(palavras)
+        ).columns(id=Integer).subquery()
+        return select(sub.c.id)
+
+    @staticmethod
+    def search(q: str, tipos: Optional[Iterable[str]] = None, limit: int = 10) -> List[Dict]:
+        """
+        Busca unificada em técnicos, chamados (código, FSAs, loja,
+        observações) e itens LPU. Resultados ordenados por relevância.
+
+        Returns:
+            [{'tipo', 'id', 'label', 'detalhe', 'score', 'url'}, ...]
+        """
+        palavras = tokens(q)
+        if not palavras:
+            return []
+        limit = max(1, min(int(limit or 10), MAX_LIMIT))
+        tipos = [t for t in (tipos or ENTIDADES) if t in ENTIDADES]
+
+        resultados = []
+        for entidade in tipos:
+            ranked = db.session.execute(SearchService._ranked(entidade, palavras, limit)).all()
+            scores = {r.id: float(r.score or 0) for r in ranked}
+            if not scores:
+                continue
+            for item in SearchService._describe(entidade, list(scores)):
+                item['score'] = round(scores[item['id']], 4)
+                resultados.append(item)
+
+        resultados.sort(key=lambda r: r['score'], reverse=True)
+        return resultados[:limit]
+
+    @staticmethod
+    def _describe(entidade: str, ids: List[int]) -> List[Dict]:
+        """Projeção (label, detalhe, url) dos ids encontrados."""
+        if entidade == 'tecnico':
+            rows = db.session.query(
+                Tecnico.id, Tecnico.nome, Tecnico.cidade, Tecnico.estado
+            ).filter(Tecnico.id.in_(ids))
+            return [{
+                'tipo': 'tecnico', 'id': r.id, 'label': r.nome,
+                'detalhe': f"{r.cidade}/{r.estado}",
+                'url': url_for('operacional.tecnico_detalhes', id=r.id)
+            } for r in rows]
+
+        if entidade == 'chamado':
+            rows = db.session.query(
+                Chamado.id, Chamado.codigo_chamado, Chamado.loja,
+                Chamado.data_atendimento, Tecnico.nome.label('tecnico_nome')
+            ).join(Tecnico, Chamado.tecnico_id == Tecnico.id).filter(Chamado.id.in_(ids))
+            return [{
+                'tipo': 'chamado', 'id': r.id, 'label': r.codigo_chamado or f"#{r.id}",
+                'detalhe': ' · '.join(filter(None, [
+                    r.tecnico_nome, r.loja,
+                    r.data_atendimento.strftime('%d/%m/%Y') if r.data_atendimento else None
+                ])),
+                'url': url_for('operacional.editar_chamado', id=r.id)
+            } for r in rows]
+
+        rows = db.session.query(ItemLPU.id, ItemLPU.nome, ItemLPU.cliente_id).filter(ItemLPU.id.in_(ids))
+        return [{
+            'tipo': 'item', 'id': r.id, 'label': r.nome,
+            'detalhe': 'Estoque' if r.cliente_id is None else 'Contrato',
+            'url': url_for('stock.controle_estoque', item_id=r.id)
+        } for r in rows]
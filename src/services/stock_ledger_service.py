@@ -0,0 +1,323 @@
+"""
+StockLedgerService - Saldos de estoque a partir do livro de movimentações.
+
+Convenção de StockMovement (quantidade sempre positiva):
+    destino_tecnico_id = T  ->  +quantidade para T
+    origem_tecnico_id  = T  ->  -quantidade para T
+(vale para ENVIO, USO, DEVOLUCAO, AJUSTE, TRANSFERENCIA.)
+
+Saldo em um instante passado:
+    checkpoint mensal mais próximo (StockSaldoCheckpoint, data_corte <= D)
+    + movimentos em [data_corte, D)
+agregados em UMA query (UNION ALL + GROUP BY), sem replay do histórico.
+
+Os checkpoints são gerados incrementalmente: corte N = corte N-1 +
+movimentos do mês (scripts/stock_checkpoints.py, mensal).
+
+Reconciliação: o saldo do livro (último corte + movimentos desde ele) é
+comparado com TecnicoStock em SQL; divergências são reportadas ou corrigidas
+com movimentos AJUSTE (scripts/reconciliar_estoque.py, /stock/api/reconciliacao).
+
+Datas de movimentação são UTC (datetime.utcnow).
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, literal, or_, select, tuple_, union_all
+
+from ..models import db, ItemLPU, StockMovement, StockSaldoCheckpoint, Tecnico, TecnicoStock
+
+
+# Pares travados/ajustados por statement na reparação
+LOTE_RECONCILIACAO = 500
+
+
+def _inicio_mes(d: date) -> datetime:
+    return datetime(d.year, d.month, 1)
+
+
+def _proximo_mes(d: datetime) -> datetime:
+    return datetime(d.year + (d.month // 12), d.month % 12 + 1, 1)
+
+
+class StockLedgerService:
+
+    # =========================================================================
+    # LIVRO (movimentos com sinal por técnico)
+    # =========================================================================
+
+    @staticmethod
+    def movimentos_assinados(inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                             tecnico_id: Optional[int] = None, item_id: Optional[int] = None):
+        """
+        SELECTs (tecnico_id, item_lpu_id, quantidade com sinal) dos movimentos
+        em [inicio, fim). Sem `inicio`, inclui movimentos legados sem data.
+
+        Returns:
+            (entradas, saidas): dois Select para compor em UNION ALL
+        """
+        def janela(*conds):
+            conds = list(conds)
+            if fim is not None:
+                if inicio is None:
+                    conds.append(or_(StockMovement.data_criacao < fim, StockMovement.data_criacao.is_(None)))
+                else:
+                    conds.append(StockMovement.data_criacao < fim)
+            if inicio is not None:
+                conds.append(StockMovement.data_criacao >= inicio)
+            if item_id is not None:
+                conds.append(StockMovement.item_lpu_id == item_id)
+            return conds
+
+        entradas = select(
+            StockMovement.destino_tecnico_id.label('tecnico_id'),
+            StockMovement.item_lpu_id.label('item_lpu_id'),
+            StockMovement.quantidade.label('quantidade')
+        ).where(*janela(
+            StockMovement.destino_tecnico_id == tecnico_id if tecnico_id is not None
+            else StockMovement.destino_tecnico_id.isnot(None)
+        ))
+        saidas = select(
+            StockMovement.origem_tecnico_id.label('tecnico_id'),
+            StockMovement.item_lpu_id.label('item_lpu_id'),
+            (-StockMovement.quantidade).label('quantidade')
+        ).where(*janela(
+            StockMovement.origem_tecnico_id == tecnico_id if tecnico_id is not None
+            else StockMovement.origem_tecnico_id.isnot(None)
+        ))
+        return entradas, saidas
+
+    @staticmethod
+    def _saldos_stmt(corte: Optional[datetime], fim: Optional[datetime],
+                     tecnico_id: Optional[int] = None, item_id: Optional[int] = None):
+        """(tecnico_id, item_lpu_id, quantidade) != 0 em `fim` (None: agora), partindo do corte."""
+        partes = list(StockLedgerService.movimentos_assinados(corte, fim, tecnico_id, item_id))
+        if corte is not None:
+            base = select(
+                StockSaldoCheckpoint.tecnico_id, StockSaldoCheckpoint.item_lpu_id,
+                StockSaldoCheckpoint.quantidade
+            ).where(StockSaldoCheckpoint.data_corte == corte)
+            if tecnico_id is not None:
+                base = base.where(StockSaldoCheckpoint.tecnico_id == tecnico_id)
+            if item_id is not None:
+                base = base.where(StockSaldoCheckpoint.item_lpu_id == item_id)
+            partes.insert(0, base)
+
+        ledger = union_all(*partes).subquery()
+        total = func.sum(ledger.c.quantidade)
+        return select(
+            ledger.c.tecnico_id, ledger.c.item_lpu_id, total.label('quantidade')
+        ).group_by(ledger.c.tecnico_id, ledger.c.item_lpu_id).having(total != 0)
+
+    @staticmethod
+    def corte_anterior(momento: datetime) -> Optional[datetime]:
+        """data_corte do checkpoint mais próximo <= momento (ou None)."""
+        return db.session.query(func.max(StockSaldoCheckpoint.data_corte)).filter(
+            StockSaldoCheckpoint.data_corte <= momento
+        ).scalar()
+
+    # =========================================================================
+    # CONSULTA "SALDO EM"
+    # =========================================================================
+
+    @staticmethod
+    def saldo_em_stmt(momento: datetime, tecnico_id: Optional[int] = None,
+                      item_id: Optional[int] = None):
+        """
+        SELECT dos saldos != 0 no instante `momento`, com nomes.
+
+        Returns:
+            (stmt, corte): stmt com (tecnico_id, tecnico, item_id, item,
+            quantidade) ordenado por técnico/item; corte usado (ou None)
+        """
+        corte = StockLedgerService.corte_anterior(momento)
+        saldos = StockLedgerService._saldos_stmt(corte, momento, tecnico_id, item_id).subquery()
+        stmt = select(
+            saldos.c.tecnico_id, Tecnico.nome.label('tecnico'),
+            saldos.c.item_lpu_id.label('item_id'), ItemLPU.nome.label('item'),
+            saldos.c.quantidade
+        ).join(
+            Tecnico, Tecnico.id == saldos.c.tecnico_id
+        ).join(
+            ItemLPU, ItemLPU.id == saldos.c.item_lpu_id
+        ).order_by(Tecnico.nome, Tecnico.id, ItemLPU.nome, ItemLPU.id)
+        return stmt, corte
+
+    @staticmethod
+    def saldo_em(data: date, tecnico_id: Optional[int] = None,
+                 item_id: Optional[int] = None) -> Dict:
+        """
+        Saldos ao FINAL do dia `data` (movimentos com data_criacao < data + 1).
+
+        Returns:
+            {'data': iso, 'corte': iso | None,
+             'saldos': [{'tecnico_id', 'tecnico', 'item_id', 'item', 'quantidade'}]}
+        """
+        momento = datetime.combine(data + timedelta(days=1), datetime.min.time())
+        stmt, corte = StockLedgerService.saldo_em_stmt(momento, tecnico_id, item_id)
+        return {
+            'data': data.isoformat(),
+            'corte': corte.isoformat() if corte else None,
+            'saldos': [dict(r._mapping) for r in db.session.execute(stmt)],
+        }
+
+    # =========================================================================
+    # CHECKPOINTS
+    # =========================================================================
+
+    @staticmethod
+    def gerar_checkpoint(data_corte: datetime) -> int:
+        """
+        (Re)grava o checkpoint de `data_corte` a partir do corte anterior +
+        movimentos no intervalo, com um INSERT ... SELECT.
+
+        Returns:
+            linhas gravadas (saldos != 0)
+        """
+        anterior = db.session.query(func.max(StockSaldoCheckpoint.data_corte)).filter(
+            StockSaldoCheckpoint.data_corte < data_corte
+        ).scalar()
+
+        db.session.execute(delete(StockSaldoCheckpoint).where(StockSaldoCheckpoint.data_corte == data_corte))
+        saldos = StockLedgerService._saldos_stmt(anterior, data_corte).subquery()
+        result = db.session.execute(insert(StockSaldoCheckpoint).from_select(
+            ['data_corte', 'tecnico_id', 'item_lpu_id', 'quantidade', 'calculado_em'],
+            select(
+                literal(data_corte), saldos.c.tecnico_id, saldos.c.item_lpu_id,
+                saldos.c.quantidade, literal(datetime.utcnow())
+            )
+        ))
+        # db.session.commit() # Caller deve commitar
+        return result.rowcount
+
+    @staticmethod
+    def gerar_checkpoints(ate: Optional[date] = None) -> List[Dict]:
+        """
+        Gera os cortes mensais pendentes (1º dia de cada mês, 00:00) após o
+        último existente, até o mês de `ate` (default: mês corrente).
+
+        Returns:
+            [{'data_corte': iso, 'linhas': int}, ...]
+        """
+        limite = _inicio_mes(ate or date.today())
+        ultimo = db.session.query(func.max(StockSaldoCheckpoint.data_corte)).scalar()
+        if ultimo is not None:
+            corte = _proximo_mes(ultimo)
+        else:
+            primeiro = db.session.query(func.min(StockMovement.data_criacao)).scalar()
+            if primeiro is None:
+                return []
+            corte = _proximo_mes(_inicio_mes(primeiro))
+
+        gerados = []
+        while corte <= limite:
+            gerados.append({
+                'data_corte': corte.isoformat(),
+                'linhas': StockLedgerService.gerar_checkpoint(corte)
+            })
+            corte = _proximo_mes(corte)
+        # db.session.commit() # Caller deve commitar
+        return gerados
+
+    # =========================================================================
+    # RECONCILIAÇÃO (TecnicoStock x livro)
+    # =========================================================================
+
+    @staticmethod
+    def divergencias_stmt(chaves: Optional[List] = None):
+        """
+        Pares (técnico, item) em que TecnicoStock.quantidade difere do saldo
+        do livro (último checkpoint + movimentos desde ele), em uma query:
+        UNION ALL (esperado, 0) / (0, atual) + GROUP BY + HAVING.
+
+        Args:
+            chaves: restringe a [(tecnico_id, item_id), ...]
+        """
+        corte = StockLedgerService.corte_anterior(datetime.utcnow())
+        esperado = StockLedgerService._saldos_stmt(corte, None).subquery()
+
+        livro = select(
+            esperado.c.tecnico_id, esperado.c.item_lpu_id,
+            esperado.c.quantidade.label('esperado'), literal(0).label('atual')
+        )
+        saldo = select(
+            TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id,
+            literal(0).label('esperado'), TecnicoStock.quantidade.label('atual')
+        ).where(TecnicoStock.quantidade != 0)
+        if chaves:
+            livro = livro.where(tuple_(esperado.c.tecnico_id, esperado.c.item_lpu_id).in_(chaves))
+            saldo = saldo.where(tuple_(TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id).in_(chaves))
+
+        u = union_all(livro, saldo).subquery()
+        total_esperado = func.sum(u.c.esperado)
+        total_atual = func.sum(u.c.atual)
+        return select(
+            u.c.tecnico_id, u.c.item_lpu_id,
+            total_esperado.label('esperado'), total_atual.label('atual')
+        ).group_by(u.c.tecnico_id, u.c.item_lpu_id).having(
+            total_esperado != total_atual
+        ).order_by(u.c.tecnico_id, u.c.item_lpu_id)
+
+    @staticmethod
+    def reconciliar(reparar: bool = False, user_id: Optional[int] = None,
+                    limite_detalhes: int = 500) -> Dict:
+        """
+        Compara TecnicoStock com o livro de movimentações.
+
+        Com `reparar`, o saldo operacional (TecnicoStock) é mantido e o livro
+        é corrigido com um movimento AJUSTE por divergência (entrada se o
+        saldo é maior que o livro, saída se menor). As linhas divergentes são
+        travadas (FOR UPDATE, em ordem) e recalculadas antes do ajuste, para
+        não corrigir com base em uma leitura concorrente.
+
+        Returns:
+            {'divergencias': int, 'ajustes': int,
+             'itens': [{'tecnico_id', 'item_id', 'esperado', 'atual', 'diferenca'}]}
+        """
+        divergencias = db.session.execute(StockLedgerService.divergencias_stmt()).all()
+        ajustes = 0
+
+        if reparar and divergencias:
+            chaves = [(d.tecnico_id, d.item_lpu_id) for d in divergencias]
+            for i in range(0, len(chaves), LOTE_RECONCILIACAO):
+                lote = chaves[i:i + LOTE_RECONCILIACAO]
+                db.session.execute(
+                    select(TecnicoStock.id).where(
+                        tuple_(TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id).in_(lote)
+                    ).order_by(TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id).with_for_update()
+                ).all()
+                confirmadas = db.session.execute(StockLedgerService.divergencias_stmt(lote)).all()
+
+                agora = datetime.utcnow()
+                movimentos = []
+                for d in confirmadas:
+                    diferenca = int(d.atual) - int(d.esperado)
+                    movimentos.append({
+                        'item_lpu_id': d.item_lpu_id,
+                        'tipo_movimento': 'AJUSTE',
+                        'quantidade': abs(diferenca),
+                        'destino_tecnico_id': d.tecnico_id if diferenca > 0 else None,
+                        'origem_tecnico_id': d.tecnico_id if diferenca < 0 else None,
+                        'observacao': f'Reconciliação: livro {int(d.esperado)} -> saldo {int(d.atual)}',
+                        'created_by_id': user_id,
+                        'data_criacao': agora,
+                    })
+                if movimentos:
+                    db.session.execute(insert(StockMovement), movimentos)
+                    ajustes += len(movimentos)
+            # db.session.commit() # Caller deve commitar
+
+        return {
+            'divergencias': len(divergencias),
+            'ajustes': ajustes,
+            'itens': [
+                {
+                    'tecnico_id': d.tecnico_id,
+                    'item_id': d.item_lpu_id,
+                    'esperado': int(d.esperado),
+                    'atual': int(d.atual),
+                    'diferenca': int(d.atual) - int(d.esperado),
+                }
+                for d in divergencias[:limite_detalhes]
+            ],
+        }
@@ -0,0 +1,182 @@
+"""
+StockMatrixService - Matriz técnico x item do controle de estoque, paginada.
+
+O controle de estoque carregava todos os técnicos ativos, todos os itens e a
+tabela TecnicoStock inteira para montar a matriz em Python. Aqui:
+
+    - linhas (técnicos) paginadas por cursor (keyset em nome, id): custo
+      constante por página, sem OFFSET
+    - colunas (itens) escolhidas pelo usuário (item_ids) ou, por padrão, os
+      itens com saldo nas linhas da página
+    - apenas células não-zero, em codificação esparsa (COO):
+        cells = [[indice_linha, indice_coluna, quantidade], ...]
+
+A exportação da matriz completa (pivot CSV/XLSX) está em
+ExportService.dataset_matriz_estoque.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, func, or_, select
+
+from ..models import db, ItemLPU, Tecnico, TecnicoStock
+from .search_service import SearchService
+
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+MAX_COLUNAS = 300
+
+
+class StockMatrixService:
+
+    # =========================================================================
+    # CURSOR
+    # =========================================================================
+
+    @staticmethod
+    def encode_cursor(nome: str, tecnico_id: int) -> str:
+        raw = json.dumps([nome, tecnico_id], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Raises ValueError se o cursor for inválido."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            nome, tecnico_id = json.loads(raw.decode('utf-8'))
+            return str(nome), int(tecnico_id)
+        except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+            raise ValueError("Cursor inválido")
+
+    # =========================================================================
+    # FILTROS
+    # =========================================================================
+
+    @staticmethod
+    def tecnicos_condition(search: Optional[str] = None, tecnico_id: Optional[int] = None):
+        """
+        Técnicos da matriz (mesma regra da página de controle): ativos,
+        filtrados pela busca; tecnico_id sobrescreve os demais filtros.
+        """
+        if tecnico_id:
+            return Tecnico.id == tecnico_id
+        conds = [Tecnico.status == 'Ativo']
+        match = SearchService.match_ids('tecnico', search or '')
+        if match is not None:
+            conds.append(Tecnico.id.in_(match))
+        return and_(*conds)
+
+    @staticmethod
+    def parse_item_ids(value: Optional[str]) -> Optional[List[int]]:
+        """'3,1,2' -> [3, 1, 2] (ordem preservada, sem duplicatas)."""
+        if not value:
+            return None
+        try:
+            ids = list(dict.fromkeys(int(v) for v in value.split(',') if v.strip()))
+        except ValueError:
+            raise ValueError("item_ids deve ser uma lista de inteiros separada por vírgula")
+        if len(ids) > MAX_COLUNAS:
+            raise ValueError(f"Máximo de {MAX_COLUNAS} itens por consulta")
+        return ids or None
+
+    # =========================================================================
+    # PÁGINA ESPARSA
+    # =========================================================================
+
+    @staticmethod
+    def pagina(cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT,
+               item_ids: Optional[Sequence[int]] = None, search: Optional[str] = None,
+               tecnico_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Uma página da matriz.
+
+        Returns:
+            {
+              'rows':    [{'id', 'nome', 'cidade', 'estado'}, ...],
+              'columns': [{'id', 'nome'}, ...],
+              'cells':   [[row_idx, col_idx, quantidade], ...],  # só != 0
+              'next_cursor': str | None
+            }
+
+        Raises:
+            ValueError: cursor inválido
+        """
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+
+        stmt = select(Tecnico.id, Tecnico.nome, Tecnico.cidade, Tecnico.estado).where(
+            StockMatrixService.tecnicos_condition(search, tecnico_id)
+        )
+        if cursor:
+            nome, ultimo_id = StockMatrixService.decode_cursor(cursor)
+            stmt = stmt.where(or_(
+                Tecnico.nome > nome,
+                and_(Tecnico.nome == nome, Tecnico.id > ultimo_id)
+            ))
+        tecnicos = db.session.execute(
+            stmt.order_by(Tecnico.nome, Tecnico.id).limit(limit + 1)
+        ).all()
+
+        next_cursor = None
+        if len(tecnicos) > limit:
+            tecnicos = tecnicos[:limit]
+            next_cursor = StockMatrixService.encode_cursor(tecnicos[-1].nome, tecnicos[-1].id)
+
+        rows = [
+            {'id': t.id, 'nome': t.nome, 'cidade': t.cidade, 'estado': t.estado}
+            for t in tecnicos
+        ]
+        if not rows:
+            return {'rows': [], 'columns': [], 'cells': [], 'next_cursor': None}
+
+        celulas = select(
+            TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id, TecnicoStock.quantidade
+        ).where(
+            TecnicoStock.tecnico_id.in_([r['id'] for r in rows]),
+            TecnicoStock.quantidade != 0
+        )
+        if item_ids:
+            celulas = celulas.where(TecnicoStock.item_lpu_id.in_(item_ids))
+        celulas = db.session.execute(celulas).all()
+
+        if item_ids:
+            nomes = dict(db.session.execute(
+                select(ItemLPU.id, ItemLPU.nome).where(ItemLPU.id.in_(item_ids))
+            ).all())
+            columns = [{'id': i, 'nome': nomes[i]} for i in item_ids if i in nomes]
+        else:
+            presentes = {c.item_lpu_id for c in celulas}
+            columns = [
+                {'id': i, 'nome': nome}
+                for i, nome in db.session.execute(
+                    select(ItemLPU.id, ItemLPU.nome).where(ItemLPU.id.in_(presentes))
+                    .order_by(ItemLPU.nome, ItemLPU.id)
+                ).all()
+            ] if presentes else []
+
+        row_idx = {r['id']: n for n, r in enumerate(rows)}
+        col_idx = {c['id']: n for n, c in enumerate(columns)}
+        cells = sorted(
+            [row_idx[c.tecnico_id], col_idx[c.item_lpu_id], c.quantidade]
+            for c in celulas if c.item_lpu_id in col_idx
+        )
+
+        return {'rows': rows, 'columns': columns, 'cells': cells, 'next_cursor': next_cursor}
+
+    @staticmethod
+    def totais_por_item(item_ids: Optional[Sequence[int]] = None, search: Optional[str] = None,
+                        tecnico_id: Optional[int] = None) -> Dict[int, int]:
+        """Total em rua por item sobre TODOS os técnicos do filtro (rodapé da matriz)."""
+        stmt = select(
+            TecnicoStock.item_lpu_id, func.sum(TecnicoStock.quantidade)
+        ).join(
+            Tecnico, Tecnico.id == TecnicoStock.tecnico_id
+        ).where(
+            StockMatrixService.tecnicos_condition(search, tecnico_id),
+            TecnicoStock.quantidade != 0
+        ).group_by(TecnicoStock.item_lpu_id)
+        if item_ids is not None:
+            stmt = stmt.where(TecnicoStock.item_lpu_id.in_(item_ids))
+        return {item_id: int(total or 0) for item_id, total in db.session.execute(stmt)}
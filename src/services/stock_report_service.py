@@ -36,6 +36,23 @@ class StockReportService:
     garantindo separação de responsabilidades e melhor testabilidade.
     """
 
+    @staticmethod
+    def periodo_filter(column, data_inicio: Optional[date] = None, data_fim: Optional[date] = None):
+        """
+        Filtro de período sobre coluna DateTime como intervalo semiaberto.
+
+        [data_inicio 00:00, data_fim + 1 dia 00:00) equivale a filtrar
+        DATE(column) entre data_inicio e data_fim, mas mantém a coluna "nua"
+        no WHERE para que os índices compostos (tipo/item/tecnico, data_criacao)
+        possam ser usados.
+        """
+        conds = []
+        if data_inicio is not None:
+            conds.append(column >= datetime.combine(data_inicio, datetime.min.time()))
+        if data_fim is not None:
+            conds.append(column < datetime.combine(data_fim + timedelta(days=1), datetime.min.time()))
+        return db.and_(*conds)
+
     @staticmethod
     def get_uso_periodo(data_inicio: date, data_fim: date) -> UsoPeriodo:
         """
@@ -53,8 +70,7 @@ class StockReportService:
             func.sum(StockMovement.quantidade).label('total_pecas')
         ).filter(
             StockMovement.tipo_movimento == 'USO',
-            func.date(StockMovement.data_criacao) >= data_inicio,
-            func.date(StockMovement.data_criacao) <= data_fim
+            StockReportService.periodo_filter(StockMovement.data_criacao, data_inicio, data_fim)
         ).first()
         
         return UsoPeriodo(
@@ -86,8 +102,7 @@ class StockReportService:
             StockMovement, StockMovement.item_lpu_id == ItemLPU.id
         ).filter(
             StockMovement.tipo_movimento == 'USO',
-            func.date(StockMovement.data_criacao) >= data_inicio,
-            func.date(StockMovement.data_criacao) <= data_fim
+            StockReportService.periodo_filter(StockMovement.data_criacao, data_inicio, data_fim)
         ).group_by(ItemLPU.id).order_by(
             func.sum(StockMovement.quantidade).desc()
         ).limit(limit).all()
@@ -132,7 +147,7 @@ class StockReportService:
     def get_movimentacoes_recentes(data_inicio: date, limit: int = 20) -> List[Any]:
         """Retorna movimentações recentes a partir de uma data."""
         return StockMovement.query.filter(
-            func.date(StockMovement.data_criacao) >= data_inicio
+            StockReportService.periodo_filter(StockMovement.data_criacao, data_inicio)
         ).order_by(StockMovement.data_criacao.desc()).limit(limit).all()
 
     @staticmethod
@@ -164,7 +179,7 @@ class StockReportService:
         solicitacoes_pendentes = SolicitacaoReposicao.query.filter_by(status='Pendente').count()
         
         alteracoes_preco = ItemLPUPrecoHistorico.query.filter(
-            func.date(ItemLPUPrecoHistorico.data_alteracao) >= data_30d
+            StockReportService.periodo_filter(ItemLPUPrecoHistorico.data_alteracao, data_30d)
         ).count()
 
         # 5. Top peças do mês
@@ -182,6 +197,10 @@ class StockReportService:
             func.sum(TecnicoStock.quantidade).desc()
         ).limit(3).all()
 
+        # 7. Reposição sugerida (tabela do job de previsão de consumo)
+        from .previsao_consumo_service import PrevisaoConsumoService
+        reposicao = PrevisaoConsumoService.resumo(limite=3)
+
         return {
             'estoque': {
                 'total_pecas': estoque.total_pecas,
@@ -204,12 +223,58 @@ class StockReportService:
             'tecnicos_mais_estoque': [
                 {'nome': t.nome, 'quantidade': t.total} for t in tecnicos_estoque
             ],
+            'reposicao': reposicao,
             'periodo': {
                 'inicio_mes': inicio_mes.isoformat(),
                 'hoje': hoje.isoformat()
             }
         }
 
+    @staticmethod
+    def get_dashboard_kpis() -> Dict[str, Any]:
+        """
+        KPIs simplificados para os cards do dashboard (4 indicadores).
+
+        Extraído de `/api/dashboard/kpis` para uso também no bundle do
+        dashboard (DashboardService).
+        """
+        hoje = datetime.now().date()
+        inicio_mes = hoje.replace(day=1)
+
+        # KPI 1: Peças em campo
+        pecas_campo = db.session.query(
+            func.sum(TecnicoStock.quantidade)
+        ).filter(TecnicoStock.quantidade > 0).scalar() or 0
+
+        # KPI 2: Valor imobilizado
+        valor_imobilizado = db.session.query(
+            func.sum(TecnicoStock.quantidade * ItemLPU.valor_custo)
+        ).join(ItemLPU, TecnicoStock.item_lpu_id == ItemLPU.id).filter(
+            TecnicoStock.quantidade > 0
+        ).scalar() or 0
+
+        # KPI 3: Custo do mês
+        custo_mes = db.session.query(
+            func.sum(Chamado.custo_peca)
+        ).filter(
+            Chamado.data_atendimento >= inicio_mes,
+            Chamado.custo_peca > 0
+        ).scalar() or 0
+
+        # KPI 4: Alertas pendentes
+        alertas = SolicitacaoReposicao.query.filter_by(status='Pendente').count()
+        alertas += TecnicoStock.query.filter(
+            TecnicoStock.quantidade <= 1,
+            TecnicoStock.quantidade > 0
+        ).count()
+
+        return {
+            'pecas_em_campo': pecas_campo,
+            'valor_imobilizado': float(valor_imobilizado),
+            'custo_mes': float(custo_mes),
+            'alertas_pendentes': alertas
+        }
+
     @staticmethod
     def get_relatorio_periodo(data_inicio: date, data_fim: date) -> Dict[str, Any]:
         """
@@ -1,7 +1,8 @@
-from ..models import db, Tecnico, ItemLPU, TecnicoStock, StockMovement, User, Notification
+from ..models import db, Tecnico, ItemLPU, TecnicoStock, StockMovement
+from .alerta_estoque_service import AlertaEstoqueService
 from datetime import datetime
 from sqlalchemy import func
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
 # Helper para formatar valores monetarios como string
 def _format_money(value):
@@ -93,9 +94,9 @@ class StockService:
         REFATORADO (2026-01): Removida atualização síncrona de ItemLPU.valor_custo.
         
         O custo de aquisição agora é APENAS registrado no StockMovement.custo_unitario
-        para rastreabilidade. O custo médio do item deve ser calculado em um processo
-        batch separado ou relatório, não durante a transferência, para evitar
-        bloqueios na tabela mestra de produtos.
+        para rastreabilidade. O custo médio do item é calculado pelo job
+        incremental CustoMedioService (scripts/custo_medio.py), não durante a
+        transferência, para evitar bloqueios na tabela mestra de produtos.
         """
         # Custo médio DESACOPLADO - apenas log no movimento
         # O valor é salvo no StockMovement.custo_unitario para auditoria futura
@@ -146,6 +147,252 @@ class StockService:
         except Exception as e:
             raise e
 
+    # ==========================================================================
+    # MOVIMENTAÇÃO EM LOTE
+    # ==========================================================================
+
+    @staticmethod
+    def movimentar_lote(linhas, user_id, obs=None):
+        """
+        Aplica várias movimentações (tecnico, item, qtd) em uma única transação.
+
+        Args:
+            linhas: [{'tipo': 'ENVIO' | 'DEVOLUCAO' | 'TRANSFERENCIA',
+                      'tecnico_id', 'item_id', 'quantidade',
+                      'destino_tecnico_id' (TRANSFERENCIA),
+                      'custo_unitario' (opcional, ENVIO),
+                      'observacao' (opcional)}, ...]
+            user_id: usuário responsável
+            obs: observação padrão das linhas sem 'observacao'
+
+        Em vez de um _update_stock (lock + flush) por linha:
+            1. linhas inexistentes de TecnicoStock criadas com INSERT ... ON
+               CONFLICT DO NOTHING (sem begin_nested/retry);
+            2. todas as linhas afetadas travadas em um único SELECT ... FOR
+               UPDATE ordenado por (tecnico_id, item_lpu_id): lotes
+               concorrentes adquirem os locks na mesma ordem (sem deadlock);
+            3. saldos validados pelo delta líquido de cada (técnico, item);
+            4. StockMovement inseridos em um único executemany.
+
+        Raises:
+            ValueError: linha inválida, técnico/item inexistente ou saldo
+                        insuficiente (nada é aplicado; caller faz rollback)
+
+        Returns:
+            dict: {'movimentos': int, 'saldos': [{'tecnico_id', 'item_id', 'quantidade'}]}
+        """
+        from sqlalchemy import select, insert, tuple_
+        from sqlalchemy.dialects import postgresql, sqlite
+
+        if not linhas:
+            raise ValueError("Nenhuma movimentação informada.")
+
+        deltas = {}
+        movimentos = []
+        for n, linha in enumerate(linhas, start=1):
+            if not isinstance(linha, dict):
+                raise ValueError(f"Linha {n}: formato inválido.")
+            tipo = linha.get('tipo') or ''
+            if not isinstance(tipo, str):
+                raise ValueError(f"Linha {n}: tipo inválido '{tipo}'.")
+            tipo = tipo.upper()
+            try:
+                tecnico_id = int(linha['tecnico_id'])
+                item_id = int(linha['item_id'])
+                qtd = int(linha['quantidade'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Linha {n}: tecnico_id, item_id e quantidade são obrigatórios.")
+            if qtd <= 0:
+                raise ValueError(f"Linha {n}: quantidade deve ser positiva.")
+
+            mov = {
+                'item_lpu_id': item_id,
+                'tipo_movimento': tipo,
+                'quantidade': qtd,
+                'custo_unitario': None,
+                'observacao': linha.get('observacao') or obs,
+                'created_by_id': user_id,
+                'origem_tecnico_id': None,
+                'destino_tecnico_id': None,
+            }
+            if tipo == 'ENVIO':
+                deltas[(tecnico_id, item_id)] = deltas.get((tecnico_id, item_id), 0) + qtd
+                mov['destino_tecnico_id'] = tecnico_id
+                if linha.get('custo_unitario') not in (None, ''):
+                    try:
+                        custo = Decimal(str(linha['custo_unitario']))
+                    except InvalidOperation:
+                        custo = None
+                    if custo is None or not custo.is_finite() or custo < 0:
+                        raise ValueError(f"Linha {n}: custo_unitario inválido.")
+                    mov['custo_unitario'] = custo
+            elif tipo == 'DEVOLUCAO':
+                deltas[(tecnico_id, item_id)] = deltas.get((tecnico_id, item_id), 0) - qtd
+                mov['origem_tecnico_id'] = tecnico_id
+            elif tipo == 'TRANSFERENCIA':
+                try:
+                    destino_id = int(linha['destino_tecnico_id'])
+                except (KeyError, TypeError, ValueError):
+                    raise ValueError(f"Linha {n}: transferência exige destino_tecnico_id.")
+                if destino_id == tecnico_id:
+                    raise ValueError(f"Linha {n}: origem e destino são o mesmo técnico.")
+                deltas[(tecnico_id, item_id)] = deltas.get((tecnico_id, item_id), 0) - qtd
+                deltas[(destino_id, item_id)] = deltas.get((destino_id, item_id), 0) + qtd
+                mov['origem_tecnico_id'] = tecnico_id
+                mov['destino_tecnico_id'] = destino_id
+            else:
+                raise ValueError(f"Linha {n}: tipo inválido '{tipo}'.")
+            movimentos.append(mov)
+
+        chaves = sorted(deltas)
+        tecnico_ids = {t for t, _ in chaves}
+        item_ids = {i for _, i in chaves}
+
+        encontrados = {r.id for r in db.session.query(Tecnico.id).filter(Tecnico.id.in_(tecnico_ids))}
+        if tecnico_ids - encontrados:
+            raise ValueError(f"Técnico(s) não encontrado(s): {sorted(tecnico_ids - encontrados)}")
+        nomes = dict(db.session.query(ItemLPU.id, ItemLPU.nome).filter(ItemLPU.id.in_(item_ids)).all())
+        if item_ids - set(nomes):
+            raise ValueError(f"Item(ns) não encontrado(s): {sorted(item_ids - set(nomes))}")
+
+        # 1. Upsert das linhas de saldo que vão receber entrada
+        novas = [
+            {'tecnico_id': t, 'item_lpu_id': i, 'quantidade': 0, 'data_atualizacao': datetime.utcnow()}
+            for (t, i) in chaves if deltas[(t, i)] > 0
+        ]
+        if novas:
+            dialeto = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+            db.session.execute(
+                dialeto.insert(TecnicoStock.__table__).values(novas).on_conflict_do_nothing(
+                    index_elements=['tecnico_id', 'item_lpu_id']
+                )
+            )
+
+        # 2. Lock de todas as linhas afetadas, em ordem determinística
+        saldos = {
+            (s.tecnico_id, s.item_lpu_id): s
+            for s in db.session.execute(
+                select(TecnicoStock).where(
+                    tuple_(TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id).in_(chaves)
+                ).order_by(
+                    TecnicoStock.tecnico_id, TecnicoStock.item_lpu_id
+                ).with_for_update().execution_options(populate_existing=True)
+            ).scalars()
+        }
+
+        # 3. Delta líquido por (técnico, item)
+        for chave in chaves:
+            stock = saldos.get(chave)
+            atual = stock.quantidade if stock else 0
+            if atual + deltas[chave] < 0:
+                raise ValueError(
+                    f"Saldo insuficiente: {nomes[chave[1]]} (técnico #{chave[0]}). "
+                    f"Atual: {atual}, Solicitado: {abs(deltas[chave])}"
+                )
+            if stock is not None:
+                stock.quantidade = atual + deltas[chave]
+
+        # 4. Movimentos em um único executemany
+        db.session.execute(insert(StockMovement), movimentos)
+
+        for chave in chaves:
+            if deltas[chave] < 0:
+                StockService.verificar_estoque_baixo(*chave)
+
+        db.session.flush()
+        # db.session.commit() # Caller deve commitar
+        return {
+            'movimentos': len(movimentos),
+            'saldos': [
+                {'tecnico_id': t, 'item_id': i, 'quantidade': saldos[(t, i)].quantidade}
+                for (t, i) in chaves if (t, i) in saldos
+            ]
+        }
+
+    @staticmethod
+    def aprovar_solicitacoes_lote(solicitacao_ids, user_id, resposta=None):
+        """
+        Aprova e envia várias SolicitacaoReposicao pendentes de uma vez.
+
+            1. solicitações travadas (FOR UPDATE, ordem de id): duas aprovações
+               concorrentes do mesmo lote não enviam em dobro;
+            2. quantidades agrupadas por (técnico, item) -> um ENVIO por grupo,
+               aplicado por movimentar_lote (locks ordenados + executemany);
+            3. status atualizado em um único UPDATE;
+            4. uma notificação por solicitante, em um único INSERT.
+
+        Raises:
+            ValueError: nenhuma solicitação informada (ou erro de movimentar_lote;
+                        nada é aplicado, caller faz rollback)
+
+        Returns:
+            dict: {'aprovadas': [ids], 'ignoradas': [ids não pendentes],
+                   'movimentos': int}
+        """
+        from sqlalchemy import select, insert, update
+        from ..models import SolicitacaoReposicao, Notification
+
+        ids = sorted({int(i) for i in solicitacao_ids})
+        if not ids:
+            raise ValueError("Nenhuma solicitação selecionada.")
+
+        solicitacoes = db.session.execute(
+            select(SolicitacaoReposicao).where(
+                SolicitacaoReposicao.id.in_(ids),
+                SolicitacaoReposicao.status == 'Pendente'
+            ).order_by(SolicitacaoReposicao.id).with_for_update()
+        ).scalars().all()
+        aprovadas = [s.id for s in solicitacoes]
+        ignoradas = sorted(set(ids) - set(aprovadas))
+        if not solicitacoes:
+            return {'aprovadas': [], 'ignoradas': ignoradas, 'movimentos': 0}
+
+        grupos = {}
+        for s in solicitacoes:
+            grupos.setdefault((s.tecnico_id, s.item_lpu_id), []).append(s)
+
+        linhas = []
+        for (tecnico_id, item_id), itens in sorted(grupos.items()):
+            refs = ', '.join(f"#{s.id}" for s in itens)
+            linhas.append({
+                'tipo': 'ENVIO',
+                'tecnico_id': tecnico_id,
+                'item_id': item_id,
+                'quantidade': sum(s.quantidade for s in itens),
+                'observacao': f"Reposição em lote - Solicitações {refs}"[:200]
+            })
+        resultado = StockService.movimentar_lote(linhas, user_id)
+
+        agora = datetime.now()
+        db.session.execute(
+            update(SolicitacaoReposicao).where(
+                SolicitacaoReposicao.id.in_(aprovadas)
+            ).values(
+                status='Enviada',
+                aprovado_por_id=user_id,
+                data_resposta=agora,
+                resposta_admin=resposta or 'Aprovado e enviado (lote).'
+            ).execution_options(synchronize_session='fetch')
+        )
+
+        por_solicitante = {}
+        for s in solicitacoes:
+            if s.created_by_id:
+                por_solicitante[s.created_by_id] = por_solicitante.get(s.created_by_id, 0) + 1
+        if por_solicitante:
+            db.session.execute(insert(Notification), [
+                {
+                    'user_id': uid,
+                    'title': 'Reposição Aprovada',
+                    'message': f"{n} solicitação(ões) de reposição aprovada(s) e enviada(s).",
+                    'notification_type': 'success'
+                }
+                for uid, n in sorted(por_solicitante.items())
+            ])
+
+        # db.session.commit() # Caller deve commitar
+        return {'aprovadas': aprovadas, 'ignoradas': ignoradas, 'movimentos': resultado['movimentos']}
+
     @staticmethod
     def get_stock_by_tecnico(tecnico_id):
         return TecnicoStock.query.filter_by(tecnico_id=tecnico_id).all()
@@ -203,52 +450,18 @@ class StockService:
     @staticmethod
     def verificar_estoque_baixo(tecnico_id, item_id, limite=2):
         """
-        Verifica se o estoque está baixo e cria notificação se necessário.
+        Agenda a verificação de estoque baixo para após o commit.
+
+        Não executa SQL: a notificação (deduplicada por admin) é criada em
+        lote fora da transação de estoque (AlertaEstoqueService). Se a
+        transação for revertida, o alerta é descartado.
 
         Args:
             tecnico_id: ID do técnico
             item_id: ID do item
             limite: Quantidade mínima antes de alertar (default: 2)
-
-        Returns:
-            bool: True se estoque está baixo
         """
-        stock = TecnicoStock.query.filter_by(
-            tecnico_id=tecnico_id,
-            item_lpu_id=item_id
-        ).first()
-
-        if stock and stock.quantidade <= limite:
-            item = ItemLPU.query.get(item_id)
-            tecnico = Tecnico.query.get(tecnico_id)
-
-            if item and tecnico:
-                # Notifica admins (user_id=1 por padrão, ajustar conforme necessário)
-                admin_ids = db.session.query(User.id).filter(User.role == 'Admin').all()
-
-                for (admin_id,) in admin_ids:
-                    # Evita duplicatas (verifica se já existe notificação recente)
-                    existe = Notification.query.filter(
-                        Notification.user_id == admin_id,
-                        Notification.title.contains(f'{tecnico.nome}'),
-                        Notification.title.contains(f'{item.nome}'),
-                        Notification.is_read == False
-                    ).first()
-
-                    if not existe:
-                        notif = Notification(
-                            user_id=admin_id,
-                            title=f"Estoque Baixo: {item.nome}",
-                            message=f"O técnico {tecnico.nome} possui apenas {stock.quantidade} "
-                                    f"unidade(s) de '{item.nome}' em estoque.\n\n"
-                                    f"Considere enviar reposição.",
-                            notification_type='warning'
-                        )
-                        db.session.add(notif)
-
-                return True
-
-        return False
+        AlertaEstoqueService.enfileirar(tecnico_id, item_id, limite)
 
     @staticmethod
     def get_alertas_estoque_baixo(limite=2):
@@ -1,13 +1,30 @@
-from ..models import db, Tag
+from sqlalchemy import func, select, and_
+
+from ..models import db, Tag, TagDefinicao, Tecnico
+from ..utils.cache import cached
+
+# Tabelas do dicionário de tags + associação (dependências do cache)
+TAG_TABLES = ['tag_definicoes', 'tecnico_tags']
+
+MODOS_FILTRO = ('qualquer', 'todas')
+
 
 class TagService:
     @staticmethod
     def create_tag(data):
-        tag = Tag(
-            nome=data['nome'],
-            cor=data['cor'],
-            tecnico_id=data['tecnico_id']
-        )
+        """
+        Associa a tag (pelo nome, criando a definição se necessário) ao técnico.
+        Idempotente: se o técnico já tem a tag, retorna a associação existente.
+        """
+        definicao = TagDefinicao.obter_ou_criar(data['nome'], data.get('cor'))
+        if definicao.id is not None:
+            existente = Tag.query.filter_by(
+                tecnico_id=data['tecnico_id'], tag_id=definicao.id
+            ).first()
+            if existente:
+                return existente
+
+        tag = Tag(definicao=definicao, tecnico_id=data['tecnico_id'])
         db.session.add(tag)
         # db.session.commit() # REMOVIDO (P0.2): Caller deve commitar
         return tag
@@ -25,10 +42,63 @@ class TagService:
         return Tag.query.filter_by(tecnico_id=tecnico_id).all()
 
     @staticmethod
+    @cached(tables=TAG_TABLES)
     def get_all_unique():
         """
         Returns a list of unique tag definitions (nome, cor) used in the system,
         useful for autocomplete or filtering suggestions.
         """
-        # SQLAlchemy distinct query
-        return db.session.query(Tag.nome, Tag.cor).distinct().all()
+        em_uso = select(Tag.tag_id)
+        return db.session.query(TagDefinicao.nome, TagDefinicao.cor).filter(
+            TagDefinicao.id.in_(em_uso)
+        ).order_by(TagDefinicao.nome).all()
+
+    @staticmethod
+    @cached(tables=TAG_TABLES)
+    def get_facets():
+        """
+        Facetas de tags: (id, nome, cor, total de técnicos) em uma única query
+        agregada sobre o índice (tag_id, tecnico_id).
+        """
+        total = func.count(Tag.tecnico_id)
+        return db.session.query(
+            TagDefinicao.id, TagDefinicao.nome, TagDefinicao.cor, total.label('total')
+        ).join(
+            Tag, Tag.tag_id == TagDefinicao.id
+        ).group_by(
+            TagDefinicao.id, TagDefinicao.nome, TagDefinicao.cor
+        ).order_by(total.desc(), TagDefinicao.nome).all()
+
+    @staticmethod
+    def tecnico_condition(nomes, modo='qualquer'):
+        """
+        Condição SQL sobre Tecnico.id para o filtro por tags.
+
+        Args:
+            nomes: nome ou lista de nomes de tags
+            modo: 'qualquer' (any-of) ou 'todas' (all-of)
+
+        Os nomes são resolvidos para ids primeiro (dicionário pequeno); cada
+        tag vira um semi-join IN (SELECT tecnico_id ... WHERE tag_id = ?)
+        servido pelo índice ix_tecnico_tags_tag_tecnico. Retorna None se não
+        houver nomes (não filtrar).
+        """
+        if isinstance(nomes, str):
+            nomes = [nomes]
+        nomes = {n.strip() for n in (nomes or []) if n and n.strip()}
+        if not nomes:
+            return None
+
+        tag_ids = [r.id for r in db.session.query(TagDefinicao.id).filter(TagDefinicao.nome.in_(nomes))]
+
+        if modo == 'todas':
+            if len(tag_ids) < len(nomes):
+                return db.false()  # alguma tag não existe: ninguém tem todas
+            return and_(*[
+                Tecnico.id.in_(select(Tag.tecnico_id).where(Tag.tag_id == tag_id))
+                for tag_id in tag_ids
+            ])
+
+        if not tag_ids:
+            return db.false()
+        return Tecnico.id.in_(select(Tag.tecnico_id).where(Tag.tag_id.in_(tag_ids)))
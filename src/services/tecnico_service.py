@@ -2,8 +2,11 @@ from ..models import db, Tecnico, Chamado, Tag
 from datetime import datetime
 from dataclasses import dataclass
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func, case, and_, or_
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import func, case
+from ..utils.cache import cached
+from .search_service import SearchService
+from .tag_service import TagService
 from marshmallow import Schema, fields, validate, ValidationError, pre_load, EXCLUDE
 
 
@@ -115,13 +118,13 @@ class TecnicoService:
 
     @staticmethod
     def _chamado_pendente_condition():
-        """Condição SQL para chamados pendentes de pagamento."""
-        return and_(
-            Chamado.status_chamado.in_(['Concluído', 'SPARE']),
-            Chamado.status_validacao == 'Aprovado',
-            Chamado.pago == False,
-            Chamado.pagamento_id == None
-        )
+        """
+        Condição SQL para chamados pendentes de pagamento.
+
+        Delegada a Chamado.pendente_pagamento_condition() para casar com o
+        índice parcial ix_chamados_pendente_pagamento.
+        """
+        return Chamado.pendente_pagamento_condition()
 
     @staticmethod
     def _valor_chamado_expr():
@@ -140,52 +143,34 @@ class TecnicoService:
         pend_cond = TecnicoService._chamado_pendente_condition()
 
         # ======================================================================
-        # AGREGACOES SQL (Tudo em uma query)
+        # AGREGACOES SQL
         # ======================================================================
+        # REFATORADO (2026-01): Pendências agregadas em subquery própria filtrada
+        # pelo predicado canônico -> usa o índice parcial/cobrindo e escala com
+        # o working set pendente, não com a tabela inteira de chamados.
+
+        # Totais gerais (atendimentos / concluidos)
+        totais_sq = db.session.query(
+            Chamado.tecnico_id.label('tecnico_id'),
+            func.count(Chamado.id).label('total_atendimentos'),
+            func.sum(
+                case(
+                    (Chamado.status_chamado.in_(['Concluído', 'SPARE']), 1),
+                    else_=0
+                )
+            ).label('total_concluidos')
+        ).group_by(Chamado.tecnico_id).subquery()
 
-        # Total de atendimentos
-        total_atendimentos = func.count(Chamado.id).label('total_atendimentos')
-
-        # Total concluidos
-        total_concluidos = func.sum(
-            case(
-                (Chamado.status_chamado.in_(['Concluído', 'SPARE']), 1),
-                else_=0
-            )
-        ).label('total_concluidos')
-
-        # Total nao pagos
-        # Total nao pagos (VALIDADOS E PENDENTES DE PAGAMENTO)
-        total_nao_pagos = func.sum(
-            case(
-                (pend_cond, 1),
-                else_=0
-            )
-        ).label('total_nao_pagos')
-
-        # Valor pendente de pagamento
-        valor_pendente = func.sum(
-            case(
-                (pend_cond, val_expr),
-                else_=0
-            )
-        ).label('total_pendente')
-
-        # Data mais antiga de chamado pendente
-        oldest_pending = func.min(
-            case(
-                (pend_cond, Chamado.data_atendimento),
-                else_=None
-            )
-        ).label('oldest_pending')
+        # Pendentes de pagamento (VALIDADOS E NAO PAGOS)
+        pend_sq = db.session.query(
+            Chamado.tecnico_id.label('tecnico_id'),
+            func.count(Chamado.id).label('total_nao_pagos'),
+            func.sum(val_expr).label('total_pendente'),
+            func.min(Chamado.data_atendimento).label('oldest_pending'),
+            func.max(Chamado.data_atendimento).label('newest_pending')
+        ).filter(pend_cond).group_by(Chamado.tecnico_id).subquery()
 
-        # Data mais recente de chamado pendente
-        newest_pending = func.max(
-            case(
-                (pend_cond, Chamado.data_atendimento),
-                else_=None
-            )
-        ).label('newest_pending')
+        valor_pendente = pend_sq.c.total_pendente
 
         # ======================================================================
         # QUERY PRINCIPAL
@@ -193,15 +178,19 @@ class TecnicoService:
 
         query = db.session.query(
             Tecnico,
-            total_atendimentos,
-            total_concluidos,
-            total_nao_pagos,
+            totais_sq.c.total_atendimentos,
+            totais_sq.c.total_concluidos,
+            pend_sq.c.total_nao_pagos,
             valor_pendente,
-            oldest_pending,
-            newest_pending
+            pend_sq.c.oldest_pending,
+            pend_sq.c.newest_pending
         ).outerjoin(
-            Chamado, Tecnico.id == Chamado.tecnico_id
-        ).group_by(Tecnico.id)
+            totais_sq, Tecnico.id == totais_sq.c.tecnico_id
+        ).outerjoin(
+            pend_sq, Tecnico.id == pend_sq.c.tecnico_id
+        ).options(
+            selectinload(Tecnico.tags)  # badges da listagem sem N+1
+        )
 
         # ======================================================================
         # FILTROS
@@ -209,14 +198,18 @@ class TecnicoService:
 
         if filters:
             if filters.get('search'):
-                term = f"%{filters['search']}%"
-                query = query.filter(
-                    or_(
-                        Tecnico.nome.ilike(term),
-                        Tecnico.cidade.ilike(term),
-                        Tecnico.documento.ilike(term)
-                    )
+                # Índice de busca (nome, cidade, documento; sem acentos)
+                ids = SearchService.match_ids('tecnico', filters['search'])
+                if ids is not None:
+                    query = query.filter(Tecnico.id.in_(ids))
+
+            if filters.get('tag'):
+                # Semi-join indexado em tecnico_tags (any-of / all-of)
+                tag_cond = TagService.tecnico_condition(
+                    filters['tag'], filters.get('tag_modo', 'qualquer')
                 )
+                if tag_cond is not None:
+                    query = query.filter(tag_cond)
 
             if filters.get('estado'):
                 query = query.filter(Tecnico.estado == filters['estado'])
@@ -224,11 +217,11 @@ class TecnicoService:
             if filters.get('status'):
                 query = query.filter(Tecnico.status == filters['status'])
 
-            # Filtro por status de pagamento (HAVING pos-agregacao)
+            # Filtro por status de pagamento (sobre a subquery agregada)
             if filters.get('pagamento') == 'Pendente':
-                query = query.having(valor_pendente > 0)
+                query = query.filter(valor_pendente > 0)
             elif filters.get('pagamento') == 'Pago':
-                query = query.having(func.coalesce(valor_pendente, 0) == 0)
+                query = query.filter(func.coalesce(valor_pendente, 0) == 0)
 
         # Ordenacao
         query = query.order_by(Tecnico.nome)
@@ -264,16 +257,12 @@ class TecnicoService:
             # Busca soma de pendentes agrupada por tecnico_principal_id
             sub_query = db.session.query(
                 Tecnico.tecnico_principal_id,
-                func.sum(
-                    case(
-                        (pend_cond, val_expr),
-                        else_=0
-                    )
-                ).label('sub_total')
+                func.sum(val_expr).label('sub_total')
             ).join(
                 Chamado, Tecnico.id == Chamado.tecnico_id
             ).filter(
-                Tecnico.tecnico_principal_id != None
+                Tecnico.tecnico_principal_id != None,
+                pend_cond
             ).group_by(
                 Tecnico.tecnico_principal_id
             ).all()
@@ -397,12 +386,13 @@ class TecnicoService:
 
         # Query para o proprio tecnico
         own_result = db.session.query(
-            func.sum(case((pend_cond, val_expr), else_=0)).label('valor'),
-            func.sum(case((pend_cond, 1), else_=0)).label('count'),
-            func.min(case((pend_cond, Chamado.data_atendimento), else_=None)).label('oldest'),
-            func.max(case((pend_cond, Chamado.data_atendimento), else_=None)).label('newest')
+            func.sum(val_expr).label('valor'),
+            func.count(Chamado.id).label('count'),
+            func.min(Chamado.data_atendimento).label('oldest'),
+            func.max(Chamado.data_atendimento).label('newest')
         ).filter(
-            Chamado.tecnico_id == tecnico_id
+            Chamado.tecnico_id == tecnico_id,
+            pend_cond
         ).first()
 
         own_val = float(own_result[0] or 0)
@@ -412,12 +402,13 @@ class TecnicoService:
 
         # Query para sub-tecnicos (uma unica query)
         sub_result = db.session.query(
-            func.sum(case((pend_cond, val_expr), else_=0)).label('valor'),
-            func.sum(case((pend_cond, 1), else_=0)).label('count')
+            func.sum(val_expr).label('valor'),
+            func.count(Chamado.id).label('count')
         ).join(
             Tecnico, Chamado.tecnico_id == Tecnico.id
         ).filter(
-            Tecnico.tecnico_principal_id == tecnico_id
+            Tecnico.tecnico_principal_id == tecnico_id,
+            pend_cond
         ).first()
 
         sub_val = float(sub_result[0] or 0)
@@ -507,8 +498,8 @@ class TecnicoService:
         pend_cond = TecnicoService._chamado_pendente_condition()
 
         total_pendente = db.session.query(
-            func.sum(case((pend_cond, val_expr), else_=0))
-        ).scalar() or 0.0
+            func.sum(val_expr)
+        ).filter(pend_cond).scalar() or 0.0
 
         return {
             'ativos': Tecnico.query.filter_by(status='Ativo').count(),
@@ -555,6 +546,7 @@ class TecnicoService:
         return sorted(list(set(codes)))
 
     @staticmethod
+    @cached(tables=['tecnicos'])
     def get_distribuicao_geografica():
         """Retorna contagem de técnicos ativos por estado."""
         result = db.session.query(
@@ -0,0 +1,233 @@
+"""
+Cache de leitura para métodos de serviço com invalidação por tabela.
+
+Uso:
+    from ..utils.cache import cached
+
+    class TagService:
+        @staticmethod
+        @cached(tables=TAG_TABLES)
+        def get_all_unique():
+            ...
+
+Cada função decorada ganha uma região LRU própria (maxsize entradas, TTL
+opcional) e declara as tabelas das quais o resultado depende. Os eventos da
+Session registram as tabelas escritas (after_flush / do_orm_execute para
+UPDATE/DELETE/INSERT em massa) e, no after_commit, todas as regiões que
+dependem dessas tabelas são esvaziadas. Rollback descarta o registro
+(rollback de SAVEPOINT, só o que foi escrito dentro dele; ver
+utils/session_buffer.py).
+
+IMPORTANTE:
+    - Retornar apenas dados "planos" (tuplas, Rows, dicts, números). Nunca
+      instâncias ORM: elas ficariam presas a uma sessão já encerrada.
+    - O valor em cache é compartilhado entre chamadas: o caller não deve
+      mutá-lo.
+    - Escritas fora da Session (engine.begin(), SQL manual em scripts) não
+      invalidam; use invalidate_tables() nesses casos.
+    - A invalidação aqui é local ao processo; a propagação para os outros
+      workers do gunicorn fica em utils/cache_bus.py.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from .session_buffer import SessionBuffer
+
+
+_MISSING = object()
+
+# tabela -> regiões dependentes
+_regions_by_table: Dict[str, List['CacheRegion']] = {}
+_all_regions: List['CacheRegion'] = []
+_registry_lock = threading.Lock()
+
+# Tabelas escritas na transação corrente (session.info['cache_dirty_tables'])
+_dirty = SessionBuffer('cache_dirty_tables')
+
+# Callbacks (session, tables) chamados após a invalidação local no commit
+# (ex: cache_bus publica para os demais workers)
+_commit_listeners: List[Callable] = []
+
+
+class CacheRegion:
+    """Armazenamento LRU limitado + contadores de uma função cacheada."""
+
+    def __init__(self, name: str, tables: Iterable[str], maxsize: int = 128,
+                 ttl: Optional[float] = None):
+        self.name = name
+        self.tables = frozenset(tables)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._data: 'OrderedDict[Any, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return _MISSING
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': self.name,
+                'tables': sorted(self.tables),
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+def _make_key(args, kwargs):
+    key = args
+    if kwargs:
+        key += (_MISSING,) + tuple(sorted(kwargs.items()))
+    hash(key)  # TypeError se algum argumento não for hashable
+    return key
+
+
+def cached(tables: Iterable[str], maxsize: int = 128, ttl: Optional[float] = None):
+    """
+    Memoiza uma função de leitura, invalidando quando `tables` são escritas.
+
+    Args:
+        tables: nomes das tabelas (__tablename__) das quais o resultado depende
+        maxsize: número máximo de entradas (LRU)
+        ttl: validade em segundos (para resultados que dependem do relógio,
+             ex: "mês corrente"); None = até a próxima invalidação
+    """
+    def decorator(fn: Callable):
+        region = CacheRegion(f"{fn.__module__}.{fn.__qualname__}", tables, maxsize, ttl)
+        _register(region)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                key = _make_key(args, kwargs)
+            except TypeError:
+                return fn(*args, **kwargs)
+
+            value = region.get(key)
+            if value is _MISSING:
+                value = fn(*args, **kwargs)
+                region.set(key, value)
+            return value
+
+        wrapper.cache_region = region
+        wrapper.cache_clear = region.clear
+        wrapper.cache_info = region.info
+        return wrapper
+
+    return decorator
+
+
+def _register(region: CacheRegion):
+    with _registry_lock:
+        _all_regions.append(region)
+        for table in region.tables:
+            _regions_by_table.setdefault(table, []).append(region)
+
+
+def invalidate_tables(tables: Iterable[str]) -> int:
+    """Esvazia as regiões que dependem de qualquer uma das tabelas. Retorna quantas."""
+    regions = set()
+    with _registry_lock:
+        for table in tables:
+            regions.update(_regions_by_table.get(table, ()))
+    for region in regions:
+        region.clear()
+    return len(regions)
+
+
+def add_commit_listener(fn: Callable):
+    """Registra fn(session, tables) para rodar após cada commit com escrita."""
+    if fn not in _commit_listeners:
+        _commit_listeners.append(fn)
+
+
+def remove_commit_listener(fn: Callable):
+    """Remove um listener registrado por add_commit_listener."""
+    if fn in _commit_listeners:
+        _commit_listeners.remove(fn)
+
+
+def clear_all():
+    """Esvazia todas as regiões (ex: entre testes)."""
+    for region in list(_all_regions):
+        region.clear()
+
+
+def cache_stats() -> List[Dict[str, Any]]:
+    """Contadores de todas as regiões registradas."""
+    return [region.info() for region in list(_all_regions)]
+
+
+# =============================================================================
+# EVENTOS DA SESSION (registro das tabelas escritas + invalidação no commit)
+# =============================================================================
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    tables = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        for table in sa_inspect(obj).mapper.tables:
+            tables.add(table.name)
+    for name in tables:
+        _dirty.add(session, name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _do_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    name = getattr(table, 'name', None)
+    if name:
+        _dirty.add(orm_execute_state.session, name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    tables = set(_dirty.pop(session))
+    if tables:
+        invalidate_tables(tables)
+        for listener in list(_commit_listeners):
+            listener(session, tables)
@@ -0,0 +1,248 @@
+"""
+Barramento de invalidação do cache entre workers (gunicorn multi-processo).
+
+O cache de utils/cache.py é por processo: um commit no worker A invalida só
+o cache de A. Este módulo propaga a invalidação para os demais workers:
+
+    Postgres : após o commit publica  NOTIFY cache_invalidate, '<tabela>:<chave>'
+               e cada worker mantém uma thread com LISTEN cache_invalidate.
+    SQLite   : contador de geração por tabela num arquivo compartilhado
+               (instance/cache_generations.json); a thread de cada worker
+               observa o arquivo e invalida as tabelas cuja geração mudou.
+
+As regiões do cache são indexadas por argumentos da função, não por linha;
+por isso a chave publicada é sempre '*' (tabela inteira). Um payload com
+chave específica recebido de outra origem também invalida a tabela toda.
+
+A thread de escuta é iniciada no primeiro request de cada processo (não em
+create_app), para sobreviver ao fork do gunicorn --preload. Ao (re)conectar
+o LISTEN, o cache local é esvaziado: notificações perdidas durante a queda
+não podem deixar dados velhos.
+
+Config:
+    CACHE_BUS_ENABLED         (default: true; false com app.testing/TESTING)
+    CACHE_BUS_FILE            (default: <instance>/cache_generations.json)
+    CACHE_BUS_POLL_SECONDS    (default: 1.0)
+"""
+import json
+import logging
+import os
+import select
+import threading
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from .cache import add_commit_listener, invalidate_tables, clear_all
+
+try:
+    import fcntl
+except ImportError:  # Windows (dev): escrita sem lock, melhor esforço
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cache_invalidate'
+WILDCARD = '*'
+
+
+def parse_payload(payload: str) -> Optional[str]:
+    """'<tabela>:<chave>' -> tabela (None se malformado)."""
+    table, sep, _key = (payload or '').partition(':')
+    return table if sep and table else None
+
+
+class CacheInvalidationBus:
+    """Extensão Flask (init_app) que publica/escuta invalidações do cache."""
+
+    def __init__(self, app=None):
+        self.mode = None
+        self.file_path = None
+        self.poll_seconds = 1.0
+        self._url = None
+        self._pid = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+        self._file_stamp = None
+        self._baseline = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Testes não devem escrever em instance/ nem abrir LISTEN
+        testing = app.testing or os.environ.get('TESTING', '').lower() in ('1', 'true', 'yes')
+        enabled = str(app.config.get(
+            'CACHE_BUS_ENABLED', os.environ.get('CACHE_BUS_ENABLED', 'false' if testing else 'true')
+        )).lower() in ('1', 'true', 'yes')
+        if not enabled:
+            return
+
+        self._url = app.config['SQLALCHEMY_DATABASE_URI']
+        self.mode = 'postgres' if self._url.startswith(('postgres', 'postgresql')) else 'file'
+        self.poll_seconds = float(app.config.get('CACHE_BUS_POLL_SECONDS', 1.0))
+        self.file_path = app.config.get('CACHE_BUS_FILE') or os.path.join(
+            app.instance_path, 'cache_generations.json'
+        )
+        if self.mode == 'file':
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+
+        add_commit_listener(self._on_commit)
+        app.before_request(self.ensure_listener)
+
+    # =========================================================================
+    # PUBLICAÇÃO
+    # =========================================================================
+
+    def _on_commit(self, session, tables):
+        """Hook de utils/cache: roda no after_commit com as tabelas escritas."""
+        if not self.mode:
+            return
+        try:
+            if self.mode == 'postgres':
+                bind = session.get_bind()
+                self.publish_postgres(getattr(bind, 'engine', bind), tables)
+            else:
+                self.publish_file(tables)
+        except Exception as e:
+            # Nunca derrubar o request por causa do barramento
+            logger.warning(f"[CACHE_BUS] Falha ao publicar invalidação {sorted(tables)}: {e}")
+
+    @staticmethod
+    def publish_postgres(engine, tables: Iterable[str]):
+        payloads = [{'canal': CHANNEL, 'payload': f"{t}:{WILDCARD}"} for t in sorted(tables)]
+        with engine.begin() as conn:
+            conn.execute(text("SELECT pg_notify(:canal, :payload)"), payloads)
+
+    def publish_file(self, tables: Iterable[str]):
+        """Incrementa a geração das tabelas no arquivo compartilhado (com flock)."""
+        with open(self.file_path, 'a+', encoding='utf-8') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                generations = self._load(f.read())
+                for table in tables:
+                    generations[table] = generations.get(table, 0) + 1
+                f.seek(0)
+                f.truncate()
+                json.dump(generations, f)
+                f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+        # As tabelas já foram invalidadas localmente no commit: não reprocessar
+        with self._lock:
+            for table in tables:
+                self._generations[table] = generations[table]
+
+    # =========================================================================
+    # ESCUTA
+    # =========================================================================
+
+    def ensure_listener(self):
+        """Inicia (uma vez por processo) a thread de escuta."""
+        if not self.mode:
+            return
+        pid = os.getpid()
+        if self._pid == pid and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._thread and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._stop.clear()
+            target = self._listen_postgres if self.mode == 'postgres' else self._listen_file
+            self._thread = threading.Thread(target=target, name='cache-invalidation-bus', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def handle_payload(self, payload: str):
+        table = parse_payload(payload)
+        if table:
+            invalidate_tables([table])
+
+    def _listen_postgres(self):
+        # Conexão dedicada (fora do pool da app), em autocommit
+        engine = create_engine(self._url, poolclass=NullPool)
+        backoff = 1
+        while not self._stop.is_set():
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {CHANNEL}")
+                clear_all()  # notificações perdidas enquanto estava desconectado
+                backoff = 1
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_seconds * 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.handle_payload(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning(f"[CACHE_BUS] LISTEN interrompido ({e}); reconectando em {backoff}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+            finally:
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+
+    def _listen_file(self):
+        self.poll_file()  # baseline
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll_file()
+            except Exception as e:
+                logger.warning(f"[CACHE_BUS] Falha ao ler {self.file_path}: {e}")
+
+    def poll_file(self) -> int:
+        """Invalida as tabelas cuja geração avançou. Retorna quantas."""
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            self._baseline = True  # arquivo ainda não existe: geração zero
+            return 0
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._file_stamp:
+            return 0
+
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            generations = self._load(f.read())
+
+        with self._lock:
+            first = not self._baseline
+            self._baseline = True
+            self._file_stamp = stamp
+            changed = [
+                t for t, g in generations.items()
+                if g != self._generations.get(t)
+            ]
+            self._generations.update(generations)
+
+        if first or not changed:
+            return 0
+        invalidate_tables(changed)
+        return len(changed)
+
+    @staticmethod
+    def _load(raw: str) -> Dict[str, int]:
+        try:
+            data = json.loads(raw) if raw.strip() else {}
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+cache_bus = CacheInvalidationBus()
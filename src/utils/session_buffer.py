@@ -0,0 +1,65 @@
+"""
+Buffer por transação em session.info, com semântica de rollback correta.
+
+Usado por quem acumula algo durante a transação para agir no commit
+(cache.py: tabelas escritas; AlertaEstoqueService: alertas;
+AuditService: linhas de auditoria):
+
+    _buffer = SessionBuffer('minha_chave')
+
+    _buffer.add(session, item)        # durante a transação
+    itens = _buffer.pop(session)      # no before_commit/after_commit
+
+Cada item é marcado com a transação corrente (SAVEPOINT, se houver):
+
+    - fim da transação raiz sem commit (rollback, close): descarta tudo
+    - rollback de SAVEPOINT: descarta só o que foi adicionado dentro dele
+      (em SQLAlchemy 2.x after_rollback também dispara para SAVEPOINT,
+      por isso ele não é usado aqui)
+"""
+from typing import Any, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+def _dentro_de(transacao, descartada) -> bool:
+    while transacao is not None:
+        if transacao is descartada:
+            return True
+        transacao = transacao.parent
+    return False
+
+
+class SessionBuffer:
+    """Lista de itens em session.info[key], presa à transação da Session."""
+
+    def __init__(self, key: str):
+        self.key = key
+        event.listen(Session, 'after_transaction_end', self._after_transaction_end)
+        event.listen(Session, 'after_soft_rollback', self._after_soft_rollback)
+
+    def add(self, session, item: Any):
+        transacao = (session.get_nested_transaction() or session.get_transaction()
+                     or session.begin())
+        session.info.setdefault(self.key, []).append((transacao, item))
+
+    def count(self, session) -> int:
+        return len(session.info.get(self.key, ()))
+
+    def pop(self, session) -> List[Any]:
+        """Retira e retorna os itens, na ordem em que foram adicionados."""
+        return [item for _, item in session.info.pop(self.key, None) or ()]
+
+    def _after_transaction_end(self, session, transaction):
+        if transaction.parent is None:
+            session.info.pop(self.key, None)
+
+    def _after_soft_rollback(self, session, previous_transaction):
+        buffer = session.info.get(self.key)
+        if not buffer or previous_transaction.parent is None:
+            return
+        session.info[self.key] = [
+            (transacao, item) for transacao, item in buffer
+            if not _dentro_de(transacao, previous_transaction)
+        ]
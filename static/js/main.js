@@ -183,3 +183,31 @@ document.addEventListener('click', function (e) {
 
 
 
+
+// --- Facet Counts (forms com data-facets-url) ---
+// Acrescenta "(N)" às opções dos selects de filtro com a contagem
+// considerando os demais filtros ativos (ver FacetService).
+document.addEventListener('DOMContentLoaded', async () => {
+    const form = document.querySelector('form[data-facets-url]');
+    if (!form) return;
+
+    try {
+        const res = await fetch(form.dataset.facetsUrl + window.location.search);
+        if (!res.ok) return;
+        const { facets } = await res.json();
+
+        Object.entries(facets).forEach(([name, values]) => {
+            const select = form.querySelector(`select[name="${name}"]`);
+            if (!select) return;
+            const totals = Object.fromEntries(values.map(v => [v.valor, v.total]));
+
+            select.querySelectorAll('option').forEach(option => {
+                if (!option.value || 'semContagem' in option.dataset) return;
+                option.dataset.label = option.dataset.label || option.textContent.trim();
+                option.textContent = `${option.dataset.label} (${totals[option.value] || 0})`;
+            });
+        });
+    } catch (e) {
+        console.error(e);
+    }
+});
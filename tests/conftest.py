@@ -1,6 +1,12 @@
 import os
+from datetime import date
+
 import pytest
+from sqlalchemy import delete, select, tuple_
+
 from src import create_app, db as _db
+from src.models import Cliente, ItemLPU, Tecnico, User
+from src.utils.cache import clear_all
 
 @pytest.fixture(scope='session')
 def app():
@@ -26,30 +32,74 @@ def app():
         yield _app
         _db.drop_all()
 
+def _chaves(connection, table):
+    pk = list(table.primary_key.columns)
+    return {tuple(row) for row in connection.execute(select(*pk))}
+
+
 @pytest.fixture(scope='function')
 def db(app):
     """
     Fixture for cleaning up database between tests.
-    Uses delete() instead of drop_all() for speed if possible, or simple transaction rollback.
-    For simplicity in this monolith, we'll try to keep it clean.
+
+    Rows created during the test are deleted on teardown (reverse dependency
+    order), including rows committed by the code under test, by worker
+    threads or through its own engine connections. Pre-existing rows that the
+    test updates are not restored.
     """
-    # Create a new connection execution context
-    connection = _db.engine.connect()
-    transaction = connection.begin()
-    
-    # Bind the session to the connection
-    options = dict(bind=connection, binds={})
-    session = _db.create_scoped_session(options=options)
-    
-    # Override the default session with our scoped session
-    _db.session = session
-    
+    tabelas = [t for t in _db.metadata.sorted_tables if t.primary_key.columns]
+    with _db.engine.connect() as connection:
+        antes = {t.name: _chaves(connection, t) for t in tabelas}
+
     yield _db
-    
-    # Rollback the transaction and close connection
-    session.remove()
-    transaction.rollback()
-    connection.close()
+
+    _db.session.rollback()
+    _db.session.remove()
+    with _db.engine.begin() as connection:
+        for table in reversed(tabelas):
+            novas = _chaves(connection, table) - antes[table.name]
+            if not novas:
+                continue
+            pk = list(table.primary_key.columns)
+            if len(pk) == 1:
+                cond = pk[0].in_([chave[0] for chave in novas])
+            else:
+                cond = tuple_(*pk).in_(list(novas))
+            connection.execute(delete(table).where(cond))
+    clear_all()
+
+
+class Fabrica:
+    """Registros básicos com valores padrão (sobrescreva por keyword)."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def _add(self, obj):
+        self.session.add(obj)
+        self.session.flush()
+        return obj
+
+    def tecnico(self, nome='Tecnico Teste', **campos):
+        campos = {'contato': '11999990000', 'cidade': 'Recife', 'estado': 'PE',
+                  'data_inicio': date(2025, 1, 1), **campos}
+        return self._add(Tecnico(nome=nome, **campos))
+
+    def item(self, nome='Item Teste', **campos):
+        return self._add(ItemLPU(nome=nome, **campos))
+
+    def cliente(self, nome='Cliente Teste', **campos):
+        return self._add(Cliente(nome=nome, **campos))
+
+    def user(self, username='usuario_teste', role='Admin', **campos):
+        return self._add(User(username=username, role=role, password_hash='hash', **campos))
+
+
+@pytest.fixture(scope='function')
+def fabrica(db):
+    """Fábrica de registros sobre o fixture db (limpos no teardown)."""
+    return Fabrica(db.session)
+
 
 @pytest.fixture(scope='function')
 def client(app):
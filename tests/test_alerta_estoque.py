@@ -0,0 +1,78 @@
+"""
+Alertas de estoque baixo: enfileirados na transação, criados após o commit
+em lote e deduplicados pelo índice parcial (user_id, dedup_key).
+"""
+import pytest
+
+from src.models import db, Notification
+from src.services.alerta_estoque_service import dedup_key
+from src.services.stock_service import StockService
+
+
+@pytest.fixture
+def estoque_alerta(app, db, fabrica, monkeypatch):
+    monkeypatch.setitem(app.config, 'ESTOQUE_ALERTAS_ASYNC', False)
+    admin = fabrica.user('alerta_admin')
+    tecnico = fabrica.tecnico('Alerta Tec')
+    item = fabrica.item('Alerta Bobina')
+    db.session.commit()
+    StockService.transferir_sede_para_tecnico(tecnico.id, item.id, 5, admin.id)
+    db.session.commit()
+
+    return admin, tecnico, item
+
+
+def _alertas(admin, tecnico, item):
+    return Notification.query.filter_by(
+        user_id=admin.id, dedup_key=dedup_key(tecnico.id, item.id)
+    ).all()
+
+
+def test_alerta_criado_apos_commit_e_deduplicado(app, estoque_alerta):
+    admin, tecnico, item = estoque_alerta
+
+    StockService.movimentar_lote([{'tipo': 'DEVOLUCAO', 'tecnico_id': tecnico.id,
+                                   'item_id': item.id, 'quantidade': 3}], admin.id)
+    # Nada é escrito em notifications dentro da transação de estoque
+    assert _alertas(admin, tecnico, item) == []
+    db.session.commit()
+
+    alertas = _alertas(admin, tecnico, item)
+    assert len(alertas) == 1
+    assert 'apenas 2 unidade(s)' in alertas[0].message
+
+    # Nova baixa com alerta não lido: sem duplicata
+    StockService.movimentar_lote([{'tipo': 'DEVOLUCAO', 'tecnico_id': tecnico.id,
+                                   'item_id': item.id, 'quantidade': 1}], admin.id)
+    db.session.commit()
+    assert len(_alertas(admin, tecnico, item)) == 1
+
+    # Lido -> próxima baixa gera novo alerta
+    alertas[0].is_read = True
+    db.session.commit()
+    StockService.movimentar_lote([{'tipo': 'DEVOLUCAO', 'tecnico_id': tecnico.id,
+                                   'item_id': item.id, 'quantidade': 1}], admin.id)
+    db.session.commit()
+    assert len(_alertas(admin, tecnico, item)) == 2
+
+
+def test_alerta_descartado_no_rollback(app, estoque_alerta):
+    admin, tecnico, item = estoque_alerta
+    StockService.movimentar_lote([{'tipo': 'DEVOLUCAO', 'tecnico_id': tecnico.id,
+                                   'item_id': item.id, 'quantidade': 4}], admin.id)
+    db.session.rollback()
+    db.session.commit()
+    assert _alertas(admin, tecnico, item) == []
+
+
+def test_rollback_de_savepoint_mantem_alerta_da_transacao(app, estoque_alerta):
+    admin, tecnico, item = estoque_alerta
+    StockService.movimentar_lote([{'tipo': 'DEVOLUCAO', 'tecnico_id': tecnico.id,
+                                   'item_id': item.id, 'quantidade': 3}], admin.id)
+    savepoint = db.session.begin_nested()
+    db.session.add(Notification(user_id=admin.id, title='Savepoint', message='descartada'))
+    db.session.flush()
+    savepoint.rollback()
+    db.session.commit()
+
+    assert len(_alertas(admin, tecnico, item)) == 1
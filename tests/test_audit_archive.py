@@ -0,0 +1,109 @@
+"""
+Arquivamento mensal de audit_logs em JSONL comprimido e busca por cursor
+sobre tabela + arquivo.
+"""
+import os
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import update
+
+from src.models import db, AuditLog
+from src.services.audit_archive_service import AuditArchiveService
+
+
+MODELO = 'AuditArchiveTest'
+
+
+@pytest.fixture
+def logs(app, db, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'AUDIT_ARCHIVE_DIR', str(tmp_path))
+    datas = [datetime(2019, 1, 5), datetime(2019, 1, 20), datetime(2019, 2, 10), datetime.utcnow()]
+    registros = [
+        AuditLog(model_name=MODELO, object_id=str(n), action='UPDATE', timestamp=ts,
+                 changes='{"campo": %d}' % n)
+        for n, ts in enumerate(datas)
+    ]
+    db.session.add_all(registros)
+    db.session.commit()
+
+    return tmp_path
+
+
+def test_arquivar_meses_antigos(app, logs):
+    arquivados = AuditArchiveService.arquivar(hoje=date(2019, 3, 15), meses=1)
+    assert [(m['mes'], m['registros']) for m in arquivados] == [('2019-01', 2)]
+    assert os.listdir(logs) == [arquivados[0]['arquivo']]
+
+    vivos = sorted(a.object_id for a in AuditLog.query.filter_by(model_name=MODELO))
+    assert vivos == ['2', '3']
+
+    # reexecução: nada mais a arquivar
+    assert AuditArchiveService.arquivar(hoje=date(2019, 3, 15), meses=1) == []
+
+
+def test_busca_continua_no_arquivo(app, logs):
+    AuditArchiveService.arquivar(hoje=date(2019, 3, 15), meses=1)
+
+    primeira = AuditArchiveService.buscar(model_name=MODELO, limit=2)
+    assert [(i['object_id'], i['arquivado']) for i in primeira['itens']] == [('3', False), ('2', False)]
+    assert primeira['next_cursor']
+
+    segunda = AuditArchiveService.buscar(model_name=MODELO, limit=2, cursor=primeira['next_cursor'])
+    assert [(i['object_id'], i['arquivado']) for i in segunda['itens']] == [('1', True), ('0', True)]
+    assert segunda['next_cursor'] is None
+    assert segunda['itens'][0]['changes'] == '{"campo": 1}'
+
+    # filtros valem para o arquivo
+    filtrada = AuditArchiveService.buscar(model_name=MODELO, object_id='0')
+    assert [i['object_id'] for i in filtrada['itens']] == ['0']
+    periodo = AuditArchiveService.buscar(model_name=MODELO, data_inicio=date(2019, 1, 10),
+                                         data_fim=date(2019, 2, 28))
+    assert [i['object_id'] for i in periodo['itens']] == ['2', '1']
+
+    with pytest.raises(ValueError):
+        AuditArchiveService.buscar(cursor='invalido')
+
+
+def test_registros_sem_timestamp_vem_por_ultimo(app, logs):
+    sem_data = [AuditLog(model_name=MODELO, object_id=f'sem-data-{n}', action='UPDATE') for n in range(2)]
+    db.session.add_all(sem_data)
+    db.session.flush()
+    db.session.execute(update(AuditLog).where(AuditLog.id.in_([a.id for a in sem_data])).values(timestamp=None))
+    db.session.commit()
+    AuditArchiveService.arquivar(hoje=date(2019, 3, 15), meses=1)
+
+    vistos, cursor = [], None
+    while True:
+        pagina = AuditArchiveService.buscar(model_name=MODELO, limit=1, cursor=cursor)
+        vistos += [i['object_id'] for i in pagina['itens']]
+        cursor = pagina['next_cursor']
+        if not cursor:
+            break
+    assert vistos == ['3', '2', '1', '0', 'sem-data-1', 'sem-data-0']
+
+    com_data = AuditArchiveService.buscar(model_name=MODELO, data_fim=date.today())
+    assert [i['object_id'] for i in com_data['itens']] == ['3', '2', '1', '0']
+
+
+def test_leitura_do_arquivo_para_com_a_pagina_completa(app, logs, monkeypatch):
+    db.session.add_all([
+        AuditLog(model_name=MODELO, object_id=f'jan-{n}', action='UPDATE', timestamp=datetime(2019, 1, 10, n))
+        for n in range(10)
+    ])
+    db.session.commit()
+    AuditArchiveService.arquivar(hoje=date(2019, 3, 15), meses=1)
+
+    lidas = []
+    original = AuditArchiveService._ler_arquivo
+
+    def contando(caminho):
+        for linha in original(caminho):
+            lidas.append(linha['id'])
+            yield linha
+
+    monkeypatch.setattr(AuditArchiveService, '_ler_arquivo', staticmethod(contando))
+    pagina = AuditArchiveService.buscar(model_name=MODELO, data_fim=date(2019, 1, 31), limit=3)
+    assert [i['object_id'] for i in pagina['itens']] == ['1', 'jan-9', 'jan-8']
+    assert pagina['next_cursor']
+    assert len(lidas) <= 5  # página + 1, não o mês inteiro (12 linhas)
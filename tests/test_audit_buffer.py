@@ -0,0 +1,75 @@
+"""
+AuditService: buffer da sessão gravado com INSERT multi-linha no commit,
+descartado em rollback (inclusive de SAVEPOINT) e opt-out de flush imediato.
+"""
+import pytest
+from sqlalchemy import event
+
+from src.models import db, AuditLog
+from src.services.audit_service import AuditService
+
+
+MODELO = 'AuditBufferTest'
+
+
+def _gravados():
+    return sorted(
+        a.object_id for a in AuditLog.query.filter_by(model_name=MODELO)
+    )
+
+
+@pytest.fixture
+def inserts(db):
+    """Conta os comandos INSERT em audit_logs enviados ao banco."""
+    comandos = []
+
+    def _contar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('INSERT INTO AUDIT_LOGS'):
+            comandos.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', _contar)
+    yield comandos
+    event.remove(db.engine, 'before_cursor_execute', _contar)
+
+
+def test_buffer_gravado_em_um_insert_no_commit(app, inserts):
+    for n in range(3):
+        AuditService.log_change(MODELO, n, 'UPDATE', {'campo': {'old': n, 'new': n + 1}}, user_id=None)
+
+    assert AuditService.pendentes() == 3
+    assert _gravados() == []
+    assert inserts == []
+
+    db.session.commit()
+    assert _gravados() == ['0', '1', '2']
+    assert len(inserts) == 1
+    assert AuditService.pendentes() == 0
+
+
+def test_rollback_descarta_buffer(app, inserts):
+    AuditService.log_change(MODELO, 'fora', 'UPDATE', user_id=None)
+    db.session.rollback()
+    db.session.commit()
+    assert _gravados() == []
+
+
+def test_rollback_de_savepoint_descarta_so_o_interno(app, inserts):
+    AuditService.log_change(MODELO, 'externo', 'UPDATE', user_id=None)
+    savepoint = db.session.begin_nested()
+    AuditService.log_change(MODELO, 'interno', 'UPDATE', user_id=None)
+    savepoint.rollback()
+    db.session.commit()
+    assert _gravados() == ['externo']
+
+
+def test_opt_out_flush_imediato(app, inserts, monkeypatch):
+    AuditService.log_change(MODELO, 'imediato', 'DELETE', user_id=None, imediato=True)
+    assert AuditService.pendentes() == 0
+    assert len(inserts) == 1
+
+    monkeypatch.setitem(app.config, 'AUDIT_BUFFER', False)
+    AuditService.log_change(MODELO, 'config', 'DELETE', user_id=None)
+    assert AuditService.pendentes() == 0
+    assert len(inserts) == 2
+    db.session.commit()
+    assert _gravados() == ['config', 'imediato']
@@ -0,0 +1,56 @@
+"""
+Autocomplete (id, label) de técnicos e itens LPU (AutocompleteService).
+"""
+import pytest
+from sqlalchemy import text
+
+from src.models import db, Tecnico
+from src.services.autocomplete_service import AutocompleteService
+
+
+@pytest.fixture
+def cadastro(db, fabrica):
+    def tecnico(nome, status='Ativo'):
+        return fabrica.tecnico(nome, contato='11999990002', cidade='Campinas', estado='SP',
+                               status=status)
+
+    registros = [
+        tecnico('Zacarias Autocomplete'), tecnico('zélia Autocomplete'),
+        tecnico('Zumbi Inativo', status='Inativo'), tecnico('Bruno Autocomplete'),
+        tecnico('Élcio Autocomplete'),
+        fabrica.item('Zebra ZT230'), fabrica.item('Zebra Cabo USB'),
+    ]
+    db.session.commit()
+    return registros
+
+
+def test_tecnicos_prefixo_ativos(app, cadastro):
+    labels = [r['label'] for r in AutocompleteService.tecnicos('Za')]
+    assert labels == ['Zacarias Autocomplete | SP - Campinas']
+
+    nomes = [r['label'].split(' |')[0] for r in AutocompleteService.tecnicos('z')]
+    assert 'Zumbi Inativo' not in nomes
+    assert 'Bruno Autocomplete' not in nomes
+
+
+def test_prefixo_acentuado_ignora_caixa(app, cadastro):
+    for termo in ('él', 'ÉL', 'Élcio'):
+        labels = [r['label'] for r in AutocompleteService.tecnicos(termo)]
+        assert labels == ['Élcio Autocomplete | SP - Campinas']
+
+
+def test_limite_e_itens(app, cadastro):
+    assert len(AutocompleteService.tecnicos('', limit=1)) == 1
+    assert len(AutocompleteService.tecnicos('', limit=10_000)) <= 50
+
+    itens = AutocompleteService.itens('zebra')
+    assert [i['label'] for i in itens] == ['Zebra Cabo USB', 'Zebra ZT230']
+
+
+def test_busca_usa_indice_lower(app, cadastro):
+    query = AutocompleteService._match(
+        db.session.query(Tecnico.id), Tecnico.nome, 'za'
+    ).limit(20)
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    plano = ' '.join(str(r[-1]) for r in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)))
+    assert 'ix_tecnicos_nome_lower' in plano
@@ -0,0 +1,58 @@
+"""
+Barramento de invalidação entre workers (src/utils/cache_bus.py), modo arquivo.
+"""
+from src.models import db, Cliente
+from src.services.cliente_service import ClienteService
+from src.utils.cache import add_commit_listener, clear_all, remove_commit_listener
+from src.utils.cache_bus import CacheInvalidationBus, parse_payload
+
+
+def _bus(path):
+    bus = CacheInvalidationBus()
+    bus.mode = 'file'
+    bus.file_path = str(path)
+    return bus
+
+
+def test_parse_payload():
+    assert parse_payload('clientes:*') == 'clientes'
+    assert parse_payload('itens_lpu:42') == 'itens_lpu'
+    assert parse_payload('malformado') is None
+
+
+def test_geracao_de_outro_worker_invalida(app, tmp_path):
+    arquivo = tmp_path / 'cache_generations.json'
+    worker_a, worker_b = _bus(arquivo), _bus(arquivo)
+    worker_b.poll_file()  # baseline (arquivo ainda não existe)
+
+    clear_all()
+    ativos = ClienteService.get_ativos()
+
+    worker_a.publish_file(['clientes'])
+    assert worker_a.poll_file() == 0  # a própria publicação não reprocessa
+    assert ClienteService.get_ativos() is ativos
+
+    assert worker_b.poll_file() == 1
+    assert ClienteService.get_ativos() is not ativos
+
+
+def test_desligado_em_testes(app):
+    from src.utils.cache_bus import cache_bus
+
+    assert cache_bus.mode is None
+
+
+def test_commit_publica_geracao(app, tmp_path):
+    arquivo = tmp_path / 'cache_generations.json'
+    bus = _bus(arquivo)
+    add_commit_listener(bus._on_commit)
+    try:
+        cliente = Cliente(nome='Cliente Bus')
+        db.session.add(cliente)
+        db.session.commit()
+        db.session.delete(cliente)
+        db.session.commit()
+    finally:
+        remove_commit_listener(bus._on_commit)
+
+    assert CacheInvalidationBus._load(arquivo.read_text())['clientes'] == 2
@@ -0,0 +1,55 @@
+"""
+Listagem de chamados: filtro por tipo de serviço em SQL e eager loading
+(técnico + serviço) sem N+1.
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from src.models import db, Chamado, CatalogoServico
+from src.services.chamado_service import ChamadoService
+
+
+@pytest.fixture
+def chamados_tipos(db, fabrica):
+    cliente = fabrica.cliente('Listagem Cliente')
+    zebra = CatalogoServico(nome='Listagem Zebra', cliente_id=cliente.id)
+    spare = CatalogoServico(nome='Listagem Spare', cliente_id=cliente.id)
+    db.session.add_all([zebra, spare])
+    tecnicos = [
+        fabrica.tecnico(f'Listagem {i}', contato='11999990007', cidade='Palmas', estado='TO')
+        for i in range(3)
+    ]
+    db.session.add_all([
+        Chamado(tecnico_id=t.id, catalogo_servico_id=s.id, data_atendimento=date(2025, 4, 1),
+                status_validacao='Pendente', codigo_chamado='LISTX')
+        for t in tecnicos for s in (zebra, spare)
+    ])
+    db.session.commit()
+    return tecnicos
+
+
+def test_filtro_tipo_em_sql(app, chamados_tipos):
+    pagination = ChamadoService.get_all({'tipo': 'Listagem Zebra'}, per_page=50)
+    assert pagination.total == 3
+    assert {c.catalogo_servico.nome for c in pagination.items} == {'Listagem Zebra'}
+
+
+def test_listagem_sem_n_mais_1(app, chamados_tipos):
+    db.session.expire_all()
+    statements = []
+
+    def contar(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', contar)
+    try:
+        pagination = ChamadoService.get_all({'search': 'LISTX'}, per_page=50)
+        linhas = [(c.tecnico.nome, c.localizacao, c.servico_nome) for c in pagination.items]
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', contar)
+
+    assert len(linhas) == 6
+    # página + count da paginação, independente do número de linhas
+    assert len(statements) <= 2
@@ -0,0 +1,91 @@
+"""
+Custo médio ponderado: dobra incremental dos ENVIOs a partir do checkpoint
+por item, com histórico de preço a cada alteração.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.models import db, ItemCustoMedio, ItemLPUPrecoHistorico, StockMovement
+from src.services.custo_medio_service import CustoMedioService
+from src.services.stock_service import StockService
+
+
+FUTURO = datetime.utcnow() + timedelta(days=1)
+
+
+@pytest.fixture
+def item_custo(db, fabrica):
+    tecnico = fabrica.tecnico('Custo Tec')
+    item = fabrica.item('Custo Impressora', valor_custo=Decimal('10.00'))
+    db.session.commit()
+    return tecnico, item
+
+
+def test_media_ponderada_incremental(app, item_custo):
+    tecnico, item = item_custo
+    StockService.transferir_sede_para_tecnico(tecnico.id, item.id, 2, None, custo_aquisicao=Decimal('12.00'))
+    StockService.transferir_sede_para_tecnico(tecnico.id, item.id, 3, None, custo_aquisicao=Decimal('14.50'))
+    StockService.transferir_sede_para_tecnico(tecnico.id, item.id, 1, None)  # sem custo: ignorado
+    db.session.commit()
+
+    resultado = CustoMedioService.processar(ate=FUTURO)
+    db.session.commit()
+    assert resultado['movimentos'] >= 2
+    # (2 x 12,00 + 3 x 14,50) / 5
+    assert Decimal(str(item.valor_custo)) == Decimal('13.50')
+
+    # Segunda execução: só o ENVIO novo, a partir do checkpoint
+    StockService.transferir_sede_para_tecnico(tecnico.id, item.id, 5, None, custo_aquisicao=Decimal('10.00'))
+    db.session.commit()
+    CustoMedioService.processar(ate=FUTURO)
+    db.session.commit()
+
+    checkpoint = db.session.get(ItemCustoMedio, item.id)
+    assert checkpoint.quantidade_acumulada == 10
+    # (13,50 x 5 + 10,00 x 5) / 10
+    assert Decimal(str(item.valor_custo)) == Decimal('11.75')
+
+    historico = ItemLPUPrecoHistorico.query.filter_by(item_lpu_id=item.id).order_by(
+        ItemLPUPrecoHistorico.id
+    ).all()
+    assert [(h.valor_custo_anterior, h.valor_custo_novo) for h in historico] == [
+        (Decimal('10.00'), Decimal('13.50')), (Decimal('13.50'), Decimal('11.75'))
+    ]
+    assert historico[-1].motivo.endswith('(1 envio(s))')
+
+
+def test_corte_adia_movimentos_recentes(app, item_custo):
+    tecnico, item = item_custo
+    StockService.transferir_sede_para_tecnico(tecnico.id, item.id, 1, None, custo_aquisicao=Decimal('20.00'))
+    db.session.commit()
+
+    CustoMedioService.processar(ate=datetime.utcnow() - timedelta(minutes=5))
+    db.session.commit()
+    assert db.session.get(ItemCustoMedio, item.id) is None
+    assert Decimal(str(item.valor_custo)) == Decimal('10.00')
+
+
+def test_envio_de_id_menor_visto_depois_nao_e_pulado(app, item_custo):
+    tecnico, item = item_custo
+    StockService.transferir_sede_para_tecnico(tecnico.id, item.id, 2, None, custo_aquisicao=Decimal('12.00'))
+    StockService.transferir_sede_para_tecnico(tecnico.id, item.id, 2, None, custo_aquisicao=Decimal('16.00'))
+    db.session.commit()
+    atrasado, seguinte = StockMovement.query.filter_by(item_lpu_id=item.id).order_by(StockMovement.id).all()
+    # Simula o ENVIO de id menor ainda invisível na primeira execução
+    atrasado.data_criacao = FUTURO
+    db.session.commit()
+
+    CustoMedioService.processar(ate=FUTURO - timedelta(hours=1))
+    db.session.commit()
+    assert Decimal(str(item.valor_custo)) == Decimal('16.00')
+    assert seguinte.custo_processado_em is not None
+    assert atrasado.custo_processado_em is None
+
+    CustoMedioService.processar(ate=FUTURO + timedelta(hours=1))
+    db.session.commit()
+    assert atrasado.custo_processado_em is not None
+    assert db.session.get(ItemCustoMedio, item.id).quantidade_acumulada == 4
+    # (2 x 16,00 + 2 x 12,00) / 4
+    assert Decimal(str(item.valor_custo)) == Decimal('14.00')
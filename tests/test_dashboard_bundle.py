@@ -0,0 +1,39 @@
+"""
+Bundle do dashboard: widgets independentes em paralelo, com tempo por widget
+e falhas isoladas.
+"""
+import threading
+
+from src.services import dashboard_service
+from src.services.dashboard_service import DashboardService, WIDGETS
+
+
+def test_bundle_todos_os_widgets(app):
+    resultado = DashboardService.bundle()
+    assert set(resultado['widgets']) == set(WIDGETS)
+    for nome, widget in resultado['widgets'].items():
+        assert 'error' not in widget, (nome, widget)
+        assert widget['ms'] >= 0
+    assert isinstance(resultado['widgets']['tecnicos_ativos']['data'], int)
+    assert 'ultimos' in resultado['widgets']['chamados']['data']
+
+
+def test_bundle_paralelo_e_falha_isolada(app, monkeypatch):
+    barreira = threading.Barrier(2, timeout=5)
+
+    def espera():
+        # só passa se os dois widgets estiverem rodando ao mesmo tempo
+        barreira.wait()
+        return threading.get_ident()
+
+    def falha():
+        raise RuntimeError('quebrou')
+
+    monkeypatch.setitem(dashboard_service.WIDGETS, 'a', espera)
+    monkeypatch.setitem(dashboard_service.WIDGETS, 'b', espera)
+    monkeypatch.setitem(dashboard_service.WIDGETS, 'falha', falha)
+
+    widgets = DashboardService.bundle(['a', 'b', 'falha', 'inexistente'])['widgets']
+    assert set(widgets) == {'a', 'b', 'falha'}
+    assert widgets['a']['data'] != widgets['b']['data']
+    assert widgets['falha']['error'] == 'quebrou'
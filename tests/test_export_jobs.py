@@ -0,0 +1,64 @@
+"""
+Exportações em background (ExportJobService): artefato, notificação e limpeza.
+"""
+import json
+import os
+import time
+from datetime import date
+
+import pytest
+
+from src.models import db, JobRun, Notification
+from src.services.export_job_service import ExportJobService, task_exportar
+
+
+@pytest.fixture
+def artifacts(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'EXPORT_ARTIFACTS_DIR', str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def admin(db, fabrica):
+    user = fabrica.user('export_admin')
+    db.session.commit()
+    return user
+
+
+def test_job_gera_artefato_e_notifica(app, artifacts, admin):
+    hoje = date.today().strftime('%Y-%m-%d')
+    job = JobRun(job_name='export_movimentacoes', status='PENDING', metadata_json=json.dumps({
+        'tipo': 'movimentacoes', 'formato': 'csv',
+        'params': {'data_inicio': hoje, 'data_fim': hoje}, 'user_id': admin.id
+    }))
+    db.session.add(job)
+    db.session.commit()
+
+    task_exportar(job.id)
+
+    job = JobRun.query.get(job.id)
+    status = ExportJobService.status(job)
+    assert status['status'] == 'COMPLETED'
+    assert status['download_url'] == f'/api/exports/{job.id}/download'
+    assert os.path.exists(ExportJobService.caminho_artefato(job))
+
+    notif = Notification.query.filter_by(user_id=admin.id).one()
+    assert status['download_url'] in notif.message
+
+
+def test_limpeza_por_ttl_e_tamanho(app, artifacts, monkeypatch):
+    velho = artifacts / 'velho.csv'
+    velho.write_bytes(b'x' * 10)
+    os.utime(velho, (time.time() - 48 * 3600,) * 2)
+
+    for i in range(3):
+        f = artifacts / f'novo{i}.csv'
+        f.write_bytes(b'x' * 600 * 1024)
+        os.utime(f, (time.time() - (10 - i),) * 2)
+
+    monkeypatch.setitem(app.config, 'EXPORT_ARTIFACTS_MAX_MB', 1)
+    removidos = ExportJobService.limpar_artefatos()
+
+    # expirado + os dois mais antigos (1.8MB -> 1.2MB -> 0.6MB <= 1MB)
+    assert removidos == 3
+    assert sorted(p.name for p in artifacts.iterdir()) == ['novo2.csv']
@@ -0,0 +1,121 @@
+"""
+Exportações CSV em streaming (ExportService).
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.models import Tag, TecnicoStock, StockMovement, Chamado, CatalogoServico
+from src.services.export_service import ExportService
+
+
+@pytest.fixture
+def dados_export(db, fabrica):
+    cliente = fabrica.cliente('Cliente Export')
+    servico = CatalogoServico(nome='Visita Export', cliente_id=cliente.id, valor_receita=150)
+    tecnico = fabrica.tecnico('Tecnico Export')
+    item = fabrica.item('Scanner Export', valor_custo=Decimal('10.50'))
+    db.session.add(servico)
+    db.session.flush()
+
+    db.session.add_all([
+        Tag(nome='VIP', cor='#ff0000', tecnico_id=tecnico.id),
+        TecnicoStock(tecnico_id=tecnico.id, item_lpu_id=item.id, quantidade=3),
+        StockMovement(item_lpu_id=item.id, destino_tecnico_id=tecnico.id, quantidade=3,
+                      tipo_movimento='ENVIO', data_criacao=datetime.utcnow()),
+        Chamado(tecnico_id=tecnico.id, catalogo_servico_id=servico.id, cidade='Recife',
+                data_atendimento=date.today(), status_chamado='Concluído',
+                status_validacao='Aprovado', custo_atribuido=Decimal('120.00'),
+                valor_receita_total=Decimal('150.00')),
+    ])
+    db.session.commit()
+
+    return {'cliente': cliente, 'tecnico': tecnico, 'item': item}
+
+
+def _render(app, dataset, **kwargs):
+    with app.test_request_context():
+        response = ExportService.csv_response(dataset, 'teste.csv', **kwargs)
+        assert response.is_streamed
+        return response.get_data().decode('utf-8-sig').splitlines()
+
+
+def test_export_estoque_streaming(app, dados_export):
+    linhas = _render(app, ExportService.dataset_estoque())
+
+    assert linhas[0].startswith('Técnico;Cidade;Estado;Peça')
+    assert 'Tecnico Export;Recife;PE;Scanner Export;3;10.50;31.50;' in linhas[1]
+
+
+def test_export_movimentacoes_periodo(app, dados_export):
+    hoje = date.today()
+    linhas = _render(app, ExportService.dataset_movimentacoes(hoje, hoje))
+    assert any('ENVIO;Scanner Export;3;10.50;Almoxarifado;Tecnico Export' in l for l in linhas)
+
+    ontem = hoje - timedelta(days=1)
+    assert len(_render(app, ExportService.dataset_movimentacoes(ontem, ontem))) == 1
+
+
+def test_export_tecnicos_total_e_tags(app, dados_export):
+    linhas = _render(app, ExportService.dataset_tecnicos(), bom=True)
+    linha = next(l for l in linhas if 'Tecnico Export' in l)
+
+    assert 'R$ 120,00' in linha
+    assert linha.endswith(';VIP')
+
+
+def test_export_fechamento_contrato_total(app, dados_export):
+    hoje = date.today()
+    linhas = _render(app, ExportService.dataset_fechamento_contrato(
+        dados_export['cliente'].id, hoje, hoje
+    ))
+
+    assert 'Visita Export;150,0' in linhas[1]
+    assert linhas[-1].endswith('TOTAL GERAL;150,0')
+
+
+def test_export_xlsx_celulas_tipadas(app, dados_export):
+    from io import BytesIO
+    from openpyxl import load_workbook
+
+    hoje = date.today()
+    buffer = BytesIO()
+    total = ExportService.write_xlsx(
+        ExportService.dataset_fechamento_contrato(dados_export['cliente'].id, hoje, hoje),
+        buffer, sheet_title='Fechamento'
+    )
+    assert total == 3  # 1 chamado + linha em branco + TOTAL GERAL
+
+    buffer.seek(0)
+    ws = load_workbook(buffer, read_only=True)['Fechamento']
+    linhas = list(ws.iter_rows(values_only=True))
+
+    assert linhas[0][0] == 'Data'
+    assert isinstance(linhas[1][0], datetime)  # data tipada, não string
+    assert linhas[1][5] == 150
+    assert linhas[-1][4:] == ('TOTAL GERAL', 150)
+
+
+def test_export_xlsx_remove_temporario_sem_iterar(app, dados_export, tmp_path, monkeypatch):
+    import tempfile
+
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    hoje = date.today()
+    dataset = ExportService.dataset_fechamento_contrato(dados_export['cliente'].id, hoje, hoje)
+
+    # HEAD / cliente desconectado: a resposta é fechada sem iterar o corpo
+    with app.test_request_context():
+        response = ExportService.xlsx_response(dataset, 'teste.xlsx')
+    assert len(list(tmp_path.glob('*.xlsx'))) == 1
+    response.close()
+    assert list(tmp_path.glob('*.xlsx')) == []
+
+    # Envio completo seguido do close: sem erro de remoção dupla
+    with app.test_request_context():
+        response = ExportService.xlsx_response(
+            ExportService.dataset_fechamento_contrato(dados_export['cliente'].id, hoje, hoje), 'teste.xlsx'
+        )
+    assert response.get_data()[:2] == b'PK'
+    response.close()
+    assert list(tmp_path.glob('*.xlsx')) == []
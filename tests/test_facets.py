@@ -0,0 +1,84 @@
+"""
+Facetas: contagem por valor de filtro considerando os demais filtros ativos.
+"""
+from datetime import date
+
+import pytest
+
+from src.models import db, Chamado, CatalogoServico
+from src.services.chamado_service import ChamadoService
+from src.services.facet_service import FacetService
+
+
+@pytest.fixture
+def base_facetas(db, fabrica):
+    cliente = fabrica.cliente('Facet Cliente')
+    zebra = CatalogoServico(nome='Facet Zebra', cliente_id=cliente.id)
+    spare = CatalogoServico(nome='Facet Spare', cliente_id=cliente.id)
+    db.session.add_all([zebra, spare])
+    a = fabrica.tecnico('Facetovaldo Um', contato='11999990005', cidade='Macapá', estado='AP',
+                        status='Ativo')
+    b = fabrica.tecnico('Facetovaldo Dois', contato='11999990006', cidade='Macapá', estado='AP',
+                        status='Inativo')
+
+    def chamado(tecnico, servico, status, pago):
+        return Chamado(tecnico_id=tecnico.id, catalogo_servico_id=servico.id,
+                       data_atendimento=date(2025, 3, 1), status_chamado=status,
+                       status_validacao='Pendente', pago=pago, codigo_chamado='FACETX')
+
+    db.session.add_all([
+        chamado(a, zebra, 'Concluído', False),
+        chamado(a, zebra, 'Cancelado', True),
+        chamado(a, spare, 'Concluído', False),
+        chamado(b, spare, 'Concluído', False),
+    ])
+    db.session.commit()
+    return cliente, a, b
+
+
+def _totais(facetas, dimensao):
+    return {f['valor']: f['total'] for f in facetas[dimensao]}
+
+
+def test_facetas_chamados_ignoram_o_proprio_filtro(app, base_facetas):
+    _, a, b = base_facetas
+    facetas = FacetService.chamados({'search': 'FACETX', 'tecnico_id': str(a.id), 'status': 'Concluído'})
+
+    # tecnico: filtrado por status, ignora o próprio filtro de técnico
+    assert _totais(facetas, 'tecnico') == {str(a.id): 2, str(b.id): 1}
+    assert {f['label'] for f in facetas['tecnico']} == {'Facetovaldo Um', 'Facetovaldo Dois'}
+    # status: filtrado por técnico, mostra todos os status dele
+    assert _totais(facetas, 'status') == {'Concluído': 2, 'Cancelado': 1}
+    # demais dimensões: técnico + status aplicados
+    assert _totais(facetas, 'tipo') == {'Facet Zebra': 1, 'Facet Spare': 1}
+    assert _totais(facetas, 'pago') == {'nao': 2}
+
+
+def test_facetas_chamados_cache_invalidado_por_escrita(app, base_facetas):
+    _, a, _ = base_facetas
+    filtros = {'search': 'FACETX', 'tecnico_id': str(a.id)}
+    assert _totais(FacetService.chamados(filtros), 'pago') == {'nao': 2, 'sim': 1}
+
+    Chamado.query.filter_by(tecnico_id=a.id).update({'pago': True})
+    db.session.commit()
+    assert _totais(FacetService.chamados(filtros), 'pago') == {'sim': 3}
+
+
+def test_faceta_pago_usa_o_filtro_da_listagem(app, base_facetas):
+    _, a, b = base_facetas
+    Chamado.query.filter_by(tecnico_id=b.id).update({'pago': None})
+    db.session.commit()
+
+    base = {'search': 'FACETX', 'status_validacao': []}
+    totais = _totais(FacetService.chamados(base), 'pago')
+    assert totais == {'nao': 3, 'sim': 1}
+    for valor, total in totais.items():
+        assert ChamadoService.get_all(dict(base, pago=valor)).total == total
+
+
+def test_facetas_tecnicos(app, base_facetas):
+    facetas = FacetService.tecnicos({'search': 'Facetovaldo', 'status': 'Ativo'})
+    assert _totais(facetas, 'status') == {'Ativo': 1, 'Inativo': 1}
+    assert _totais(facetas, 'estado') == {'AP': 1}
+    assert sum(_totais(facetas, 'pagamento').values()) == 1
+
@@ -0,0 +1,68 @@
+"""
+Snapshots diários de KPIs: captura idempotente, backfill do histórico e série.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.models import db, Chamado, KpiDiario
+from src.services.kpi_snapshot_service import KpiSnapshotService
+
+
+DIA = date(2024, 6, 10)
+
+
+@pytest.fixture
+def historico(db, fabrica):
+    tecnico = fabrica.tecnico('KPI Diario', data_inicio=DIA - timedelta(days=1), status='Ativo')
+
+    def chamado(**kw):
+        return Chamado(tecnico_id=tecnico.id, data_atendimento=DIA, batch_id='kpi-lote', **kw)
+
+    db.session.add_all([
+        # concluído no dia, validado no dia seguinte -> conta na fila do DIA
+        chamado(status_chamado='Concluído', status_validacao='Aprovado',
+                data_criacao=datetime(2024, 6, 10, 9), data_validacao=datetime(2024, 6, 11, 9)),
+        # criado e rejeitado no mesmo dia -> fora da fila ao fim do DIA
+        chamado(status_chamado='Concluído', status_validacao='Rejeitado',
+                data_criacao=datetime(2024, 6, 10, 9), data_rejeicao=datetime(2024, 6, 10, 15)),
+        # ainda pendente
+        chamado(status_chamado='Cancelado', status_validacao='Pendente',
+                data_criacao=datetime(2024, 6, 10, 10)),
+    ])
+    db.session.commit()
+
+    return tecnico
+
+
+def test_backfill_reconstroi_historico(app, historico):
+    gravados = KpiSnapshotService.backfill(DIA - timedelta(days=1), DIA + timedelta(days=1))
+    db.session.commit()
+    assert gravados == 3
+
+    linhas = {k.data: k for k in KpiDiario.query.filter(KpiDiario.data.between(
+        DIA - timedelta(days=1), DIA + timedelta(days=1)))}
+    assert linhas[DIA].finalizados == 2
+    assert linhas[DIA].fila_validacao == 2
+    assert linhas[DIA + timedelta(days=1)].fila_validacao == 1
+    assert linhas[DIA - timedelta(days=1)].fila_validacao == 0
+    assert linhas[DIA].origem == 'backfill'
+    assert linhas[DIA].pecas_em_campo is None
+
+    # dias existentes são preservados sem --sobrescrever
+    assert KpiSnapshotService.backfill(DIA, DIA) == 0
+
+
+def test_capturar_idempotente_e_serie(app, historico):
+    KpiSnapshotService.capturar(DIA)
+    KpiSnapshotService.capturar(DIA)
+    db.session.commit()
+    assert KpiDiario.query.filter_by(data=DIA).count() == 1
+
+    serie = KpiSnapshotService.serie(DIA - timedelta(days=3), DIA, ['finalizados', 'invalida'])
+    assert serie['labels'] == [DIA.isoformat()]
+    assert serie['series'] == {'finalizados': [2]}
+    assert serie['origem'] == ['snapshot']
+
+    with pytest.raises(ValueError):
+        KpiSnapshotService.serie(DIA, DIA - timedelta(days=1))
@@ -0,0 +1,33 @@
+"""
+Garante que o predicado canônico de "pendente de pagamento" casa com o
+índice parcial ix_chamados_pendente_pagamento.
+"""
+import pytest
+from sqlalchemy import inspect, func
+
+from src.models import db, Chamado
+
+
+def test_indice_parcial_existe(app):
+    nomes = {ix['name'] for ix in inspect(db.engine).get_indexes('chamados')}
+    assert 'ix_chamados_pendente_pagamento' in nomes
+
+
+def test_predicado_usa_indice_parcial(app):
+    if db.engine.dialect.name != 'sqlite':
+        pytest.skip("EXPLAIN QUERY PLAN é específico do SQLite")
+
+    query = db.session.query(
+        func.sum(Chamado.custo_atribuido)
+    ).filter(
+        Chamado.tecnico_id == 1,
+        Chamado.pendente_pagamento_condition()
+    )
+    stmt = query.statement.compile(
+        dialect=db.engine.dialect,
+        compile_kwargs={'literal_binds': True}
+    )
+
+    plan = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {stmt}")).fetchall()
+
+    assert any('ix_chamados_pendente_pagamento' in str(row) for row in plan), plan
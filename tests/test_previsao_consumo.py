@@ -0,0 +1,79 @@
+"""
+Previsão de consumo: taxa diária de USO, dias de cobertura, reposição
+sugerida e solicitações pré-preenchidas.
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.models import db, PrevisaoConsumo, SolicitacaoReposicao, StockMovement, TecnicoStock
+from src.services.previsao_consumo_service import PrevisaoConsumoService
+
+
+HOJE = date(2019, 6, 30)
+
+
+@pytest.fixture
+def consumo(db, fabrica):
+    tecnico = fabrica.tecnico('Previsao A', data_inicio=date(2019, 1, 1))
+    cabo = fabrica.item('Previsao Cabo')
+    fonte = fabrica.item('Previsao Fonte')
+
+    # 90 dias de uso constante: cabo 2/dia, fonte 1/dia
+    for n in range(90):
+        dia = datetime.combine(HOJE - timedelta(days=n), datetime.min.time()) + timedelta(hours=10)
+        db.session.add_all([
+            StockMovement(tipo_movimento='USO', origem_tecnico_id=tecnico.id,
+                          item_lpu_id=cabo.id, quantidade=2, data_criacao=dia),
+            StockMovement(tipo_movimento='USO', origem_tecnico_id=tecnico.id,
+                          item_lpu_id=fonte.id, quantidade=1, data_criacao=dia),
+        ])
+    db.session.add_all([
+        TecnicoStock(tecnico_id=tecnico.id, item_lpu_id=cabo.id, quantidade=10),
+        TecnicoStock(tecnico_id=tecnico.id, item_lpu_id=fonte.id, quantidade=100),
+        SolicitacaoReposicao(tecnico_id=tecnico.id, item_lpu_id=cabo.id, quantidade=4,
+                             status='Pendente'),
+    ])
+    db.session.commit()
+
+    return tecnico, cabo, fonte
+
+
+def test_taxa_cobertura_e_sugestao(app, consumo):
+    tecnico, cabo, fonte = consumo
+    assert PrevisaoConsumoService.atualizar(HOJE) == 2
+    db.session.commit()
+
+    linhas = {p.item_lpu_id: p for p in PrevisaoConsumo.query.filter_by(tecnico_id=tecnico.id)}
+    p_cabo, p_fonte = linhas[cabo.id], linhas[fonte.id]
+
+    assert p_cabo.consumo_janela == 180
+    assert float(p_cabo.consumo_diario) == pytest.approx(2.0)
+    assert float(p_cabo.dias_cobertura) == 5.0
+    # 2/dia x (7 + 30) dias - saldo 10 - pendente 4
+    assert p_cabo.quantidade_sugerida == 60
+
+    assert float(p_fonte.dias_cobertura) == 100.0
+    assert p_fonte.quantidade_sugerida == 0
+
+    sugestoes = PrevisaoConsumoService.sugestoes()
+    assert [s['item'] for s in sugestoes if s['tecnico_id'] == tecnico.id] == ['Previsao Cabo']
+
+
+def test_criar_solicitacoes_pre_preenchidas(app, consumo):
+    tecnico, cabo, _ = consumo
+    SolicitacaoReposicao.query.filter_by(tecnico_id=tecnico.id).update({'status': 'Enviada'})
+    PrevisaoConsumoService.atualizar(HOJE)
+    db.session.commit()
+
+    ids = [p.id for p in PrevisaoConsumo.query.filter_by(tecnico_id=tecnico.id)]
+    criadas = PrevisaoConsumoService.criar_solicitacoes(ids, user_id=None)
+    db.session.commit()
+    assert [(s.item_lpu_id, s.quantidade, s.status) for s in criadas] == [(cabo.id, 64, 'Pendente')]
+    assert 'cobertura 5.0 dia(s)' in criadas[0].justificativa
+
+    # já existe solicitação em aberto para o par
+    assert PrevisaoConsumoService.criar_solicitacoes(ids, user_id=None) == []
+
+    with pytest.raises(ValueError):
+        PrevisaoConsumoService.criar_solicitacoes([], user_id=None)
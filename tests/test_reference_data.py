@@ -0,0 +1,48 @@
+"""
+Snapshot de dados de referência (ReferenceDataService): conteúdo, ETag e 304.
+"""
+import json
+from decimal import Decimal
+
+import pytest
+
+from src.models import db, CatalogoServico
+from src.services.reference_data_service import ReferenceDataService
+
+
+@pytest.fixture
+def catalogo(db, fabrica):
+    cliente = fabrica.cliente('Cliente Referencia')
+    db.session.add(CatalogoServico(nome='Visita Ref', cliente_id=cliente.id, valor_receita=Decimal('90')))
+    fabrica.item('Leitor Ref', cliente_id=cliente.id, valor_receita=Decimal('40'))
+    estoque = fabrica.item('Leitor Ref', valor_custo=Decimal('12.30'))
+    db.session.commit()
+
+    return {'cliente': cliente, 'estoque': estoque}
+
+
+def test_snapshot_formato_dados_contrato(app, catalogo):
+    clientes = ReferenceDataService.get('contratos')['clientes']
+    cliente = next(c for c in clientes if c['id'] == catalogo['cliente'].id)
+
+    assert cliente == catalogo['cliente'].to_dict()
+    assert any(i['id'] == catalogo['estoque'].id for i in ReferenceDataService.get('itens_estoque'))
+    assert [p['nome'] for p in ReferenceDataService.get('pecas')].count('Leitor Ref') == 1
+
+
+def test_etag_304_e_invalidacao(app, catalogo):
+    with app.test_request_context():
+        etag = ReferenceDataService.response('itens_estoque').get_etag()[0]
+
+    with app.test_request_context(headers={'If-None-Match': f'"{etag}"'}):
+        resp = ReferenceDataService.response('itens_estoque')
+        assert resp.status_code == 304
+
+    catalogo['estoque'].valor_custo = Decimal('15.00')
+    db.session.commit()
+
+    with app.test_request_context(headers={'If-None-Match': f'"{etag}"'}):
+        resp = ReferenceDataService.response('itens_estoque')
+        assert resp.status_code == 200
+        item = next(i for i in json.loads(resp.get_data()) if i['id'] == catalogo['estoque'].id)
+        assert item['valor_custo'] == '15.00'
@@ -0,0 +1,55 @@
+"""
+Índice de busca (SearchService): FTS5 sincronizado por triggers, sem acentos.
+"""
+from datetime import date
+
+import pytest
+
+from src.models import db, Chamado
+from src.services.search_service import SearchService
+from src.services.tecnico_service import TecnicoService
+
+
+@pytest.fixture
+def dados_busca(db, fabrica):
+    tecnico = fabrica.tecnico('João Conceição Busca', contato='11999990003', cidade='São Luís',
+                              estado='MA', documento='98765432100')
+    chamado = Chamado(tecnico_id=tecnico.id, codigo_chamado='INC778899', loja='Loja Centro',
+                      fsa_codes='FSA-445566', observacoes='Impressora térmica travando',
+                      data_atendimento=date.today())
+    db.session.add(chamado)
+    item = fabrica.item('Cabeça de Impressão Busca')
+    db.session.commit()
+    return {'tecnico': tecnico, 'chamado': chamado, 'item': item}
+
+
+def _ids(tipo, q):
+    return [r['id'] for r in SearchService.search(q, tipos=[tipo])]
+
+
+def test_busca_sem_acentos_e_prefixo(app, dados_busca):
+    with app.test_request_context():
+        assert dados_busca['tecnico'].id in _ids('tecnico', 'conceicao sao')
+        assert dados_busca['item'].id in _ids('item', 'cabeca impress')
+        assert dados_busca['chamado'].id in _ids('chamado', 'termica')
+        assert dados_busca['chamado'].id in _ids('chamado', '445566')
+        assert dados_busca['chamado'].id in _ids('chamado', 'INC778899')
+
+
+def test_indice_segue_update_e_delete(app, dados_busca):
+    chamado = dados_busca['chamado']
+    chamado.observacoes = 'Leitor quebrado'
+    db.session.commit()
+
+    with app.test_request_context():
+        assert chamado.id not in _ids('chamado', 'termica')
+        assert chamado.id in _ids('chamado', 'leitor')
+
+        resultado = SearchService.search('busca')
+        assert {r['tipo'] for r in resultado} >= {'tecnico', 'item'}
+        assert resultado == sorted(resultado, key=lambda r: r['score'], reverse=True)
+
+
+def test_filtro_listagem_tecnicos(app, dados_busca):
+    result = TecnicoService.get_tecnicos_com_metricas(filters={'search': 'joao'}, page=None)
+    assert [m.tecnico.id for m in result['items']] == [dados_busca['tecnico'].id]
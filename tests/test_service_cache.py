@@ -0,0 +1,91 @@
+"""
+Cache de leitura com invalidação por tabela (src/utils/cache.py).
+"""
+from src.models import db, Tag, Cliente
+from src.services.cliente_service import ClienteService
+from src.services.tag_service import TagService
+from src.utils.cache import cached, clear_all
+
+
+def test_lru_limite_e_contadores():
+    chamadas = []
+
+    @cached(tables=['tabela_fake'], maxsize=2)
+    def dobro(x):
+        chamadas.append(x)
+        return x * 2
+
+    assert dobro(1) == 2 and dobro(1) == 2
+    dobro(2)
+    dobro(3)  # expulsa 1 (LRU)
+    dobro(1)
+
+    info = dobro.cache_info()
+    assert chamadas == [1, 2, 3, 1]
+    assert info['hits'] == 1 and info['misses'] == 4
+    assert info['size'] == 2 and info['evictions'] == 2
+
+
+def test_argumento_nao_hashable_nao_usa_cache():
+    @cached(tables=['tabela_fake'])
+    def tamanho(itens):
+        return len(itens)
+
+    assert tamanho([1, 2]) == 2
+    assert tamanho.cache_info()['size'] == 0
+
+
+def test_commit_invalida_tabela_dependente(app, db, fabrica):
+    clear_all()
+    tecnico = fabrica.tecnico('Tecnico Cache', contato='11999990001', cidade='Natal', estado='RN')
+    db.session.commit()
+
+    antes = TagService.get_all_unique()
+    assert TagService.get_all_unique() is antes  # hit
+
+    db.session.add(Tag(nome='CACHE', cor='#00ff00', tecnico_id=tecnico.id))
+    db.session.flush()
+    assert TagService.get_all_unique() is antes  # ainda não commitado
+
+    db.session.commit()
+    depois = TagService.get_all_unique()
+    assert ('CACHE', '#00ff00') in [tuple(r) for r in depois]
+
+    # Escrita em outra tabela não invalida
+    ativos = ClienteService.get_ativos()
+    db.session.add(Tag(nome='OUTRA', cor='#000000', tecnico_id=tecnico.id))
+    db.session.commit()
+    assert ClienteService.get_ativos() is ativos
+
+    # UPDATE em massa (sem unit of work) também invalida
+    Cliente.query.filter(Cliente.id == -1).update({'ativo': False})
+    db.session.commit()
+    assert ClienteService.get_ativos() is not ativos
+
+
+def test_rollback_descarta_tabelas(app):
+    clear_all()
+    ativos = ClienteService.get_ativos()
+
+    db.session.add(Cliente(nome='Cliente Rollback'))
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+
+    assert ClienteService.get_ativos() is ativos
+
+
+def test_rollback_de_savepoint_mantem_tabelas_da_transacao(app):
+    clear_all()
+    ativos = ClienteService.get_ativos()
+
+    Cliente.query.filter(Cliente.id == -1).update({'ativo': False})
+    savepoint = db.session.begin_nested()
+    db.session.add(Cliente(nome='Cliente Savepoint'))
+    db.session.flush()
+    savepoint.rollback()
+    db.session.commit()
+
+    # A escrita de fora do SAVEPOINT continua invalidando a região
+    assert ClienteService.get_ativos() is not ativos
+    assert Cliente.query.filter_by(nome='Cliente Savepoint').count() == 0
@@ -0,0 +1,59 @@
+"""
+Aprovação de solicitações de reposição em lote: ENVIOs agrupados por
+(técnico, item), status e notificações em comandos únicos.
+"""
+import pytest
+
+from src.models import db, Notification, SolicitacaoReposicao, StockMovement, TecnicoStock
+from src.services.stock_service import StockService
+
+
+@pytest.fixture
+def solicitacoes(db, fabrica):
+    tecnico = fabrica.tecnico('Lote Solic A')
+    cabo = fabrica.item('Lote Solic Cabo')
+    fonte = fabrica.item('Lote Solic Fonte')
+    solicitante = fabrica.user('lote_solicitante', role='Operador')
+
+    def nova(item, qtd, status='Pendente'):
+        return SolicitacaoReposicao(tecnico_id=tecnico.id, item_lpu_id=item.id, quantidade=qtd,
+                                    status=status, created_by_id=solicitante.id)
+
+    pedidos = [nova(cabo, 2), nova(cabo, 3), nova(fonte, 1), nova(fonte, 9, status='Enviada')]
+    db.session.add_all(pedidos)
+    db.session.commit()
+
+    return tecnico, cabo, fonte, solicitante, pedidos
+
+
+def test_aprovacao_em_lote(app, solicitacoes):
+    tecnico, cabo, fonte, solicitante, pedidos = solicitacoes
+    ids = [p.id for p in pedidos]
+
+    resultado = StockService.aprovar_solicitacoes_lote(ids, user_id=None, resposta='Ok lote')
+    db.session.commit()
+
+    assert resultado == {'aprovadas': ids[:3], 'ignoradas': [ids[3]], 'movimentos': 2}
+
+    saldos = {s.item_lpu_id: s.quantidade for s in TecnicoStock.query.filter_by(tecnico_id=tecnico.id)}
+    assert saldos == {cabo.id: 5, fonte.id: 1}
+
+    envio_cabo = StockMovement.query.filter_by(destino_tecnico_id=tecnico.id, item_lpu_id=cabo.id).one()
+    assert envio_cabo.tipo_movimento == 'ENVIO' and envio_cabo.quantidade == 5
+    assert f"#{ids[0]}, #{ids[1]}" in envio_cabo.observacao
+
+    status = {s.id: (s.status, s.resposta_admin) for s in SolicitacaoReposicao.query.filter(
+        SolicitacaoReposicao.id.in_(ids))}
+    assert [status[i] for i in ids] == [('Enviada', 'Ok lote')] * 3 + [('Enviada', None)]
+
+    notificacoes = Notification.query.filter_by(user_id=solicitante.id).all()
+    assert len(notificacoes) == 1 and notificacoes[0].message.startswith('3 ')
+
+    # segunda aprovação do mesmo lote não envia de novo
+    again = StockService.aprovar_solicitacoes_lote(ids, user_id=None)
+    assert again == {'aprovadas': [], 'ignoradas': ids, 'movimentos': 0}
+
+
+def test_lote_vazio(app):
+    with pytest.raises(ValueError):
+        StockService.aprovar_solicitacoes_lote([], user_id=None)
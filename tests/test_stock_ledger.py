@@ -0,0 +1,77 @@
+"""
+Saldo em data passada: checkpoint mensal mais próximo + movimentos desde ele.
+"""
+from datetime import date, datetime
+
+import pytest
+
+from src.models import db, StockMovement, StockSaldoCheckpoint
+from src.services.export_service import ExportService
+from src.services.stock_ledger_service import StockLedgerService
+from src.services.stock_service import StockService
+
+
+@pytest.fixture
+def historico(db, fabrica):
+    a = fabrica.tecnico('Ledger A', data_inicio=date(2020, 1, 1))
+    b = fabrica.tecnico('Ledger B', data_inicio=date(2020, 1, 1))
+    item = fabrica.item('Ledger Switch')
+    db.session.commit()
+
+    def em(data, fn, *args):
+        """Executa a movimentação e a data retroativamente."""
+        ultimo = db.session.query(db.func.max(StockMovement.id)).scalar() or 0
+        fn(*args)
+        db.session.flush()
+        StockMovement.query.filter(StockMovement.id > ultimo).update({'data_criacao': data})
+
+    em(datetime(2021, 1, 10), StockService.transferir_sede_para_tecnico, a.id, item.id, 5, None)
+    em(datetime(2021, 2, 5), StockService.devolver_tecnico_para_sede, a.id, item.id, 2, None)
+    em(datetime(2021, 2, 20), StockService.movimentar_lote, [
+        {'tipo': 'TRANSFERENCIA', 'tecnico_id': a.id, 'destino_tecnico_id': b.id,
+         'item_id': item.id, 'quantidade': 1}
+    ], None)
+    em(datetime(2021, 3, 3), StockService.transferir_sede_para_tecnico, a.id, item.id, 4, None)
+    db.session.commit()
+
+    return a, b, item
+
+
+def _saldos(resultado):
+    return {(s['tecnico'], s['item']): s['quantidade'] for s in resultado['saldos']}
+
+
+def test_saldo_em_sem_e_com_checkpoints(app, historico):
+    a, b, item = historico
+    esperado_fev = {('Ledger A', 'Ledger Switch'): 2, ('Ledger B', 'Ledger Switch'): 1}
+
+    # Sem checkpoint: replay desde o início
+    sem = StockLedgerService.saldo_em(date(2021, 2, 25), item_id=item.id)
+    assert sem['corte'] is None
+    assert _saldos(sem) == esperado_fev
+
+    # Cortes 2021-02-01, 2021-03-01, 2021-04-01 (só os do item deste teste)
+    for corte in (datetime(2021, 2, 1), datetime(2021, 3, 1), datetime(2021, 4, 1)):
+        StockLedgerService.gerar_checkpoint(corte)
+    db.session.commit()
+    cortes = dict(
+        ((c.data_corte, c.tecnico_id), c.quantidade)
+        for c in StockSaldoCheckpoint.query.filter_by(item_lpu_id=item.id)
+    )
+    assert cortes[(datetime(2021, 2, 1), a.id)] == 5
+    assert cortes[(datetime(2021, 4, 1), a.id)] == 6
+
+    com = StockLedgerService.saldo_em(date(2021, 2, 25), item_id=item.id)
+    assert com['corte'] == '2021-02-01T00:00:00'
+    assert _saldos(com) == esperado_fev
+
+    assert _saldos(StockLedgerService.saldo_em(date(2021, 1, 9), item_id=item.id)) == {}
+    assert _saldos(StockLedgerService.saldo_em(date(2021, 5, 1), tecnico_id=a.id, item_id=item.id)) == {
+        ('Ledger A', 'Ledger Switch'): 6
+    }
+
+
+def test_export_saldo_em(app, historico):
+    _, b, item = historico
+    dataset = ExportService.dataset_saldo_em(date(2021, 3, 31), tecnico_id=b.id, item_id=item.id)
+    assert list(dataset.rows) == [(date(2021, 3, 31), 'Ledger B', 'Ledger Switch', 1)]
@@ -0,0 +1,85 @@
+"""
+Movimentação de estoque em lote: upsert de saldos, lock ordenado, delta
+líquido por (técnico, item) e movimentos em um único executemany.
+"""
+import pytest
+
+from src.models import db, StockMovement
+from src.services.stock_service import StockService
+
+
+@pytest.fixture
+def estoque_lote(db, fabrica):
+    a, b = fabrica.tecnico('Lote A'), fabrica.tecnico('Lote B')
+    scanner, cabo = fabrica.item('Lote Scanner'), fabrica.item('Lote Cabo')
+    db.session.commit()
+    return a, b, scanner, cabo
+
+
+def _saldo(tecnico, item):
+    return StockService.get_saldo(tecnico.id, item.id)
+
+
+def test_lote_envio_transferencia_devolucao(app, estoque_lote):
+    a, b, scanner, cabo = estoque_lote
+    resultado = StockService.movimentar_lote([
+        {'tipo': 'ENVIO', 'tecnico_id': a.id, 'item_id': scanner.id, 'quantidade': 10, 'custo_unitario': '12.50'},
+        {'tipo': 'ENVIO', 'tecnico_id': a.id, 'item_id': cabo.id, 'quantidade': 5},
+        # transferência do que acabou de chegar: vale o delta líquido do lote
+        {'tipo': 'TRANSFERENCIA', 'tecnico_id': a.id, 'destino_tecnico_id': b.id,
+         'item_id': scanner.id, 'quantidade': 4},
+        {'tipo': 'DEVOLUCAO', 'tecnico_id': a.id, 'item_id': cabo.id, 'quantidade': 2},
+    ], user_id=None, obs='Reposição regional')
+    db.session.commit()
+
+    assert resultado['movimentos'] == 4
+    assert (_saldo(a, scanner), _saldo(b, scanner), _saldo(a, cabo)) == (6, 4, 3)
+
+    transf = StockMovement.query.filter_by(item_lpu_id=scanner.id, tipo_movimento='TRANSFERENCIA').one()
+    assert (transf.origem_tecnico_id, transf.destino_tecnico_id) == (a.id, b.id)
+    envio = StockMovement.query.filter_by(item_lpu_id=scanner.id, tipo_movimento='ENVIO').one()
+    assert str(envio.custo_unitario) == '12.50'
+    assert envio.observacao == 'Reposição regional'
+
+
+def test_lote_saldo_insuficiente_nao_aplica_nada(app, estoque_lote):
+    a, b, scanner, _ = estoque_lote
+    StockService.movimentar_lote([
+        {'tipo': 'ENVIO', 'tecnico_id': a.id, 'item_id': scanner.id, 'quantidade': 2},
+    ], user_id=None)
+    db.session.commit()
+
+    with pytest.raises(ValueError, match='Saldo insuficiente'):
+        StockService.movimentar_lote([
+            {'tipo': 'ENVIO', 'tecnico_id': b.id, 'item_id': scanner.id, 'quantidade': 1},
+            {'tipo': 'TRANSFERENCIA', 'tecnico_id': a.id, 'destino_tecnico_id': b.id,
+             'item_id': scanner.id, 'quantidade': 3},
+        ], user_id=None)
+    db.session.rollback()
+
+    assert (_saldo(a, scanner), _saldo(b, scanner)) == (2, 0)
+    assert StockMovement.query.filter_by(item_lpu_id=scanner.id).count() == 1
+
+
+def test_lote_validacao(app, estoque_lote):
+    a, _, scanner, _ = estoque_lote
+    casos = [
+        [],
+        [{'tipo': 'ENVIO', 'tecnico_id': a.id, 'item_id': scanner.id, 'quantidade': 0}],
+        [{'tipo': 'USO', 'tecnico_id': a.id, 'item_id': scanner.id, 'quantidade': 1}],
+        [{'tipo': 'TRANSFERENCIA', 'tecnico_id': a.id, 'destino_tecnico_id': a.id,
+          'item_id': scanner.id, 'quantidade': 1}],
+        [{'tipo': 'ENVIO', 'tecnico_id': a.id, 'item_id': 999999, 'quantidade': 1}],
+        [{'tipo': 1, 'tecnico_id': a.id, 'item_id': scanner.id, 'quantidade': 1}],
+        ['ENVIO'],
+        [{'tipo': 'ENVIO', 'tecnico_id': a.id, 'item_id': scanner.id, 'quantidade': 1,
+          'custo_unitario': 'abc'}],
+        [{'tipo': 'ENVIO', 'tecnico_id': a.id, 'item_id': scanner.id, 'quantidade': 1,
+          'custo_unitario': 'NaN'}],
+        [{'tipo': 'ENVIO', 'tecnico_id': a.id, 'item_id': scanner.id, 'quantidade': 1,
+          'custo_unitario': -1}],
+    ]
+    for linhas in casos:
+        with pytest.raises(ValueError):
+            StockService.movimentar_lote(linhas, user_id=None)
+        db.session.rollback()
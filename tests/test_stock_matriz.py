@@ -0,0 +1,63 @@
+"""
+Matriz de estoque: páginas por cursor, células esparsas não-zero e
+exportação pivot completa.
+"""
+import pytest
+
+from src.models import TecnicoStock
+from src.services.export_service import ExportService
+from src.services.stock_matrix_service import StockMatrixService
+
+
+@pytest.fixture
+def matriz(db, fabrica):
+    tecnicos = [fabrica.tecnico(f'Matriz {n}', cidade='Belém', estado='PA') for n in ('A', 'B', 'C')]
+    itens = [fabrica.item('Matriz Fonte'), fabrica.item('Matriz Leitor')]
+    a, b, c = tecnicos
+    fonte, leitor = itens
+    db.session.add_all([
+        TecnicoStock(tecnico_id=a.id, item_lpu_id=fonte.id, quantidade=3),
+        TecnicoStock(tecnico_id=a.id, item_lpu_id=leitor.id, quantidade=0),
+        TecnicoStock(tecnico_id=c.id, item_lpu_id=leitor.id, quantidade=5),
+    ])
+    db.session.commit()
+
+    return tecnicos, itens
+
+
+def test_paginas_por_cursor_com_celulas_esparsas(app, matriz):
+    (a, b, c), (fonte, leitor) = matriz
+    item_ids = [leitor.id, fonte.id]
+
+    primeira = StockMatrixService.pagina(limit=2, item_ids=item_ids, search='Matriz')
+    assert [r['id'] for r in primeira['rows']] == [a.id, b.id]
+    assert [c['id'] for c in primeira['columns']] == item_ids
+    # só a célula não-zero de A (fonte = coluna 1)
+    assert primeira['cells'] == [[0, 1, 3]]
+    assert primeira['next_cursor']
+
+    segunda = StockMatrixService.pagina(cursor=primeira['next_cursor'], limit=2,
+                                        item_ids=item_ids, search='Matriz')
+    assert [r['id'] for r in segunda['rows']] == [c.id]
+    assert segunda['cells'] == [[0, 0, 5]]
+    assert segunda['next_cursor'] is None
+
+
+def test_colunas_padrao_e_cursor_invalido(app, matriz):
+    (a, _, _), (fonte, _) = matriz
+    pagina = StockMatrixService.pagina(tecnico_id=a.id)
+    assert pagina['columns'] == [{'id': fonte.id, 'nome': 'Matriz Fonte'}]
+
+    with pytest.raises(ValueError):
+        StockMatrixService.pagina(cursor='nao-e-cursor')
+
+
+def test_export_pivot(app, matriz):
+    _, (fonte, leitor) = matriz
+    dataset = ExportService.dataset_matriz_estoque(search='Matriz')
+    assert dataset.header == ['Técnico', 'Cidade', 'Estado', 'Matriz Fonte', 'Matriz Leitor', 'Total']
+    assert list(dataset.rows) == [
+        ('Matriz A', 'Belém', 'PA', 3, 0, 3),
+        ('Matriz B', 'Belém', 'PA', 0, 0, 0),
+        ('Matriz C', 'Belém', 'PA', 0, 5, 5),
+    ]
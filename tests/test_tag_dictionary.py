@@ -0,0 +1,53 @@
+"""
+Dicionário de tags normalizado: definições únicas, filtro any-of/all-of e facetas.
+"""
+import pytest
+
+from src.models import db, Tag, TagDefinicao
+from src.services.tag_service import TagService
+from src.services.tecnico_service import TecnicoService
+
+
+@pytest.fixture
+def tecnicos_tags(db, fabrica):
+    def tecnico(nome):
+        return fabrica.tecnico(nome, contato='11999990004', cidade='Belém', estado='PA')
+
+    a, b, c = tecnico('Tag A'), tecnico('Tag B'), tecnico('Tag C')
+    for t, nomes in ((a, ['DICT-NOTURNO', 'DICT-MOTO']), (b, ['DICT-NOTURNO']), (c, [])):
+        for nome in nomes:
+            TagService.create_tag({'nome': nome, 'cor': '#123456', 'tecnico_id': t.id})
+    db.session.commit()
+    return a, b, c
+
+
+def _ids(filters):
+    result = TecnicoService.get_tecnicos_com_metricas(filters=filters, page=None)
+    return {m.tecnico.id for m in result['items']}
+
+
+def test_definicao_unica_e_interface_legada(app, tecnicos_tags):
+    a, b, _ = tecnicos_tags
+    assert TagDefinicao.query.filter_by(nome='DICT-NOTURNO').count() == 1
+
+    # Recriar a mesma tag no técnico é idempotente
+    TagService.create_tag({'nome': 'DICT-NOTURNO', 'tecnico_id': b.id})
+    db.session.commit()
+    assert Tag.query.filter_by(tecnico_id=b.id).count() == 1
+
+    tag = Tag.query.filter_by(tecnico_id=a.id).filter(Tag.nome == 'DICT-MOTO').one()
+    assert (tag.nome, tag.cor) == ('DICT-MOTO', '#123456')
+
+
+def test_filtro_any_e_all(app, tecnicos_tags):
+    a, b, c = tecnicos_tags
+    assert _ids({'tag': ['DICT-NOTURNO', 'DICT-MOTO']}) == {a.id, b.id}
+    assert _ids({'tag': ['DICT-NOTURNO', 'DICT-MOTO'], 'tag_modo': 'todas'}) == {a.id}
+    assert _ids({'tag': 'DICT-INEXISTENTE'}) == set()
+    assert c.id in _ids({'tag': []})
+
+
+def test_facetas_com_contagem(app, tecnicos_tags):
+    facetas = {f.nome: f.total for f in TagService.get_facets()}
+    assert facetas['DICT-NOTURNO'] == 2
+    assert facetas['DICT-MOTO'] == 1